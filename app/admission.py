@@ -0,0 +1,127 @@
+"""
+Admission control for POST /webhook/*: caps the webhooks in flight and the body bytes they hold
+(per process). Past either cap a webhook is shed with 503 + Retry-After, which Alertmanager retries,
+instead of queueing behind forwards stuck in backoff until the pod runs out of memory.
+
+ALERTBRIDGE_ADMISSION_CRITICAL_SHARE reserves that fraction of both caps for critical alerts: once
+a webhook is parsed, a non-critical one is shed when non-critical webhooks alone would exceed the
+remaining share.
+"""
+import os
+from typing import AsyncIterator, Callable, Optional
+
+from fastapi import HTTPException, Request
+
+from app.metrics import WEBHOOK_INFLIGHT, WEBHOOK_SHED_TOTAL
+
+MAX_INFLIGHT = int(os.getenv("ALERTBRIDGE_MAX_INFLIGHT", "256"))
+MAX_INFLIGHT_BYTES = int(os.getenv("ALERTBRIDGE_MAX_INFLIGHT_BYTES", str(128 * 1024 * 1024)))
+CRITICAL_SHARE = min(max(float(os.getenv("ALERTBRIDGE_ADMISSION_CRITICAL_SHARE", "0")), 0.0), 1.0)
+RETRY_AFTER_SEC = int(os.getenv("ALERTBRIDGE_RETRY_AFTER_SEC", "5"))
+
+
+class Ticket:
+    __slots__ = ("nbytes", "critical")
+
+    def __init__(self, nbytes: int) -> None:
+        self.nbytes = nbytes
+        # Unknown until the body is parsed; counted against the shared part until then.
+        self.critical = False
+
+
+class AdmissionController:
+    """Counters only touched from the event loop, so no lock. A limit <= 0 disables that cap."""
+
+    def __init__(
+        self,
+        max_inflight: int = MAX_INFLIGHT,
+        max_bytes: int = MAX_INFLIGHT_BYTES,
+        critical_share: float = CRITICAL_SHARE,
+    ) -> None:
+        self.max_inflight = max_inflight
+        self.max_bytes = max_bytes
+        self.critical_share = critical_share
+        self.inflight = 0
+        self.inflight_bytes = 0
+        self.normal_inflight = 0  # webhooks not known to be critical
+        self.normal_bytes = 0
+
+    def admit(self, nbytes: int) -> Optional[Ticket]:
+        """Ticket for a webhook that will buffer up to `nbytes`, or None (shed) when a cap is reached."""
+        if 0 < self.max_inflight <= self.inflight:
+            WEBHOOK_SHED_TOTAL.labels(reason="inflight").inc()
+            return None
+        if self.max_bytes > 0 and self.inflight_bytes + nbytes > self.max_bytes and self.inflight:
+            WEBHOOK_SHED_TOTAL.labels(reason="bytes").inc()
+            return None
+        ticket = Ticket(nbytes)
+        self.inflight += 1
+        self.inflight_bytes += nbytes
+        self.normal_inflight += 1
+        self.normal_bytes += nbytes
+        WEBHOOK_INFLIGHT.inc()
+        return ticket
+
+    def classify(self, ticket: Ticket, critical: bool) -> bool:
+        """
+        Settle a parsed webhook's class. Critical ones leave the shared part; False means a
+        non-critical webhook must be shed because the critical reserve would be used.
+        """
+        if critical:
+            if not ticket.critical:
+                ticket.critical = True
+                self.normal_inflight -= 1
+                self.normal_bytes -= ticket.nbytes
+            return True
+        if self.critical_share <= 0:
+            return True
+        share = 1.0 - self.critical_share
+        if (self.max_inflight > 0 and self.normal_inflight > int(self.max_inflight * share)) or (
+            self.max_bytes > 0 and self.normal_bytes > int(self.max_bytes * share) and self.normal_inflight > 1
+        ):
+            WEBHOOK_SHED_TOTAL.labels(reason="critical_reserve").inc()
+            return False
+        return True
+
+    def release(self, ticket: Ticket) -> None:
+        self.inflight -= 1
+        self.inflight_bytes -= ticket.nbytes
+        if not ticket.critical:
+            self.normal_inflight -= 1
+            self.normal_bytes -= ticket.nbytes
+        WEBHOOK_INFLIGHT.dec()
+
+
+ADMISSION = AdmissionController()
+
+
+def busy() -> HTTPException:
+    """503 for a shed webhook; Alertmanager honours Retry-After."""
+    return HTTPException(
+        status_code=503,
+        detail="Too many webhooks in flight, retry later",
+        headers={"Retry-After": str(RETRY_AFTER_SEC)},
+    )
+
+
+def admission(max_body_bytes: int) -> Callable[[Request], AsyncIterator[Ticket]]:
+    """
+    Dependency for webhook routes: admits the request (Content-Length, else `max_body_bytes`, is
+    what it may buffer) or raises 503, and releases the ticket when the handler is done.
+    """
+
+    async def admit(request: Request) -> AsyncIterator[Ticket]:
+        declared = request.headers.get("content-length")
+        try:
+            nbytes = min(int(declared), max_body_bytes) if declared else max_body_bytes
+        except ValueError:
+            nbytes = max_body_bytes
+        ticket = ADMISSION.admit(max(nbytes, 0))
+        if ticket is None:
+            raise busy()
+        try:
+            yield ticket
+        finally:
+            ADMISSION.release(ticket)
+
+    return admit
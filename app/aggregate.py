@@ -0,0 +1,96 @@
+"""Time-window grouping of transformed alerts per route before forwarding (bounded, in-process)."""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from app.rules import AggregateConfig, RouteConfig, _get_by_path, run_transform_plan
+
+
+class AlertGroup(NamedTuple):
+    route: RouteConfig
+    key: Dict[str, Any]
+    items: List[Any]
+    # Webhooks that contributed items (daily counters count the group's forward once per webhook).
+    request_ids: Set[str]
+
+
+class AggregateBuffer:
+    """
+    Transformed alerts buffered by (route, group key). A group is emitted when it reaches
+    max_group_size, when group_wait_ms elapsed since its first alert (see due()), or early when the
+    route already holds max_groups groups and a new one starts (oldest first).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # route name -> canonical key -> (opened monotonic, group); oldest group first per route.
+        self._routes: "Dict[str, OrderedDict[str, Tuple[float, AlertGroup]]]" = {}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(groups) for groups in self._routes.values())
+
+    def add(
+        self, route: RouteConfig, output: Any, now: Optional[float] = None, request_id: Optional[str] = None
+    ) -> List[AlertGroup]:
+        """Buffer one transformed alert; returns groups that must be emitted right away."""
+        config = route.aggregate
+        now = time.monotonic() if now is None else now
+        key = group_key(config, output)
+        slot = json.dumps(key, sort_keys=True, ensure_ascii=False, default=str)
+        ready: List[AlertGroup] = []
+        with self._lock:
+            groups = self._routes.setdefault(route.name, OrderedDict())
+            entry = groups.get(slot)
+            if entry is None:
+                while groups and len(groups) >= config.max_groups:
+                    ready.append(groups.popitem(last=False)[1][1])
+                entry = groups[slot] = (now, AlertGroup(route=route, key=key, items=[], request_ids=set()))
+            entry[1].items.append(output)
+            if request_id:
+                entry[1].request_ids.add(request_id)
+            if len(entry[1].items) >= config.max_group_size:
+                ready.append(groups.pop(slot)[1])
+        return ready
+
+    def due(self, now: Optional[float] = None) -> List[AlertGroup]:
+        """Remove and return groups whose group_wait_ms elapsed (checks stop at a route's first open one)."""
+        now = time.monotonic() if now is None else now
+        ready: List[AlertGroup] = []
+        with self._lock:
+            for groups in self._routes.values():
+                while groups:
+                    opened, group = next(iter(groups.values()))
+                    if (now - opened) * 1000 < group.route.aggregate.group_wait_ms:
+                        break
+                    ready.append(groups.popitem(last=False)[1][1])
+        return ready
+
+    def drain(self) -> List[AlertGroup]:
+        """Remove and return every buffered group (shutdown)."""
+        with self._lock:
+            groups = [group for route_groups in self._routes.values() for _, group in route_groups.values()]
+            self._routes.clear()
+        return groups
+
+
+def group_key(config: AggregateConfig, output: Any) -> Dict[str, Any]:
+    key: Dict[str, Any] = {}
+    for path in config.group_by:
+        found, value = _get_by_path(output, path)
+        key[path] = value if found else None
+    return key
+
+
+def combine_group(group: AlertGroup) -> Any:
+    """One payload for a group: {group, count, alerts}, reshaped by aggregate.output_template when set."""
+    combined = {"group": group.key, "count": len(group.items), "alerts": group.items}
+    plan = group.route.aggregate.combine_plan()
+    if plan is None:
+        return combined
+    return run_transform_plan(combined, plan)
+
+
+AGGREGATOR = AggregateBuffer()
@@ -0,0 +1,264 @@
+"""Alert bundle analysis for UI feeds and DLQ rows: names, statuses, worst severity, previews."""
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Rank of critical / disaster / emergency / fatal labels (see _severity_rank_value).
+SEVERITY_RANK_CRITICAL = 100
+
+
+def _severity_rank_value(label: str) -> int:
+    """Higher = more severe; used to pick one label when a webhook bundles several alerts."""
+    t = (label or "").strip().lower()
+    if not t:
+        return -1
+    if re.search(r"\b(disaster|emergency|fatal|critical)\b", t):
+        return SEVERITY_RANK_CRITICAL
+    if re.search(r"\b(error|major|high)\b", t):
+        return 80
+    if re.search(r"\b(warning|warn)\b", t):
+        return 60
+    if re.search(r"\binfo(rmation)?\b", t):
+        return 40
+    if re.search(r"\b(page|none|normal|low)\b", t):
+        return 20
+    return 5
+
+
+def _firing_status(value: Any) -> str:
+    if isinstance(value, str):
+        lv = value.strip().lower()
+        if lv in ("firing", "resolved"):
+            return lv
+    return ""
+
+
+def _first_text(labels: Any, annotations: Any) -> str:
+    labels = labels if isinstance(labels, dict) else {}
+    annotations = annotations if isinstance(annotations, dict) else {}
+    for key in ("alertname", "summary", "description"):
+        v = labels.get(key) or annotations.get(key)
+        if v and isinstance(v, str):
+            return v[:100]
+    return ""
+
+
+class AlertBundleSummary:
+    """
+    Everything the feeds need from one payload (Alertmanager bundle / shard, flat JSON or transformed
+    output), computed in a single walk over alerts[]. preview/detail are built on first access.
+    """
+
+    __slots__ = ("names", "statuses", "firing", "severity", "severity_rank", "summary", "_ui")
+
+    def __init__(self, payload: Any) -> None:
+        self.names: List[str] = []
+        self.statuses: List[str] = []
+        self.firing = ""
+        self.severity = ""
+        self.severity_rank = -1
+        self.summary = ""
+        self._ui: Optional[Tuple[str, str]] = None
+        if not payload or not isinstance(payload, dict):
+            return
+        alerts = payload.get("alerts")
+        has_alerts = isinstance(alerts, list) and bool(alerts)
+        worst = ""
+        if has_alerts:
+            states = set()
+            for i, a in enumerate(alerts):
+                if not isinstance(a, dict):
+                    self.names.append(f"(invalid #{i})")
+                    self.statuses.append("")
+                    continue
+                status = _firing_status(a.get("status"))
+                self.statuses.append(status)
+                if status:
+                    states.add(status)
+                labels = a.get("labels")
+                labels = labels if isinstance(labels, dict) else {}
+                name = labels.get("alertname")
+                if isinstance(name, str) and name.strip():
+                    self.names.append(name.strip()[:200])
+                else:
+                    ann = a.get("annotations")
+                    s = (ann.get("summary") or ann.get("description")) if isinstance(ann, dict) else None
+                    if isinstance(s, str) and s.strip():
+                        self.names.append(s.strip()[:120])
+                    else:
+                        self.names.append(f"(alert #{i})")
+                sv = labels.get("severity")
+                if sv and isinstance(sv, str) and sv.strip():
+                    rank = _severity_rank_value(sv)
+                    if rank > self.severity_rank:
+                        self.severity_rank = rank
+                        worst = sv.strip()
+            if states:
+                self.firing = states.pop() if len(states) == 1 else "mixed"
+        else:
+            self.firing = _firing_status(payload.get("status"))
+        self.severity = worst[:40] if worst else self._fallback_severity(payload)
+        self.summary = self._summary(payload, alerts if has_alerts else None)
+
+    @staticmethod
+    def _fallback_severity(payload: Dict[str, Any]) -> str:
+        v = payload.get("severity")
+        if v is not None and not isinstance(v, (dict, list)):
+            s = str(v).strip()
+            if s:
+                return s[:40]
+        for group_key in ("commonLabels", "groupLabels"):
+            grp = payload.get(group_key)
+            if isinstance(grp, dict):
+                sv = grp.get("severity")
+                if sv and isinstance(sv, str):
+                    return sv.strip()[:40]
+        labels = payload.get("labels")
+        if isinstance(labels, dict):
+            sv = labels.get("severity")
+            if sv and isinstance(sv, str):
+                return sv.strip()[:40]
+        return ""
+
+    @staticmethod
+    def _summary(payload: Dict[str, Any], alerts: Optional[List[Any]]) -> str:
+        # Flat JSON (no alerts[]): description, alertId, severity, etc.
+        for k in ("description", "alertId", "severity"):
+            v = payload.get(k)
+            if v and isinstance(v, str):
+                return v[:100]
+        # OCP Alertmanager: alerts[0].labels.alertname, annotations.summary, annotations.description
+        if alerts and isinstance(alerts[0], dict):
+            text = _first_text(alerts[0].get("labels"), alerts[0].get("annotations"))
+            if text:
+                return text
+        # Single alert (no alerts array)
+        return _first_text(payload.get("labels"), payload.get("annotations"))
+
+    def status_at(self, index: int) -> str:
+        """alerts[index].status (firing | resolved) or ''."""
+        return self.statuses[index] if 0 <= index < len(self.statuses) else ""
+
+    @property
+    def preview(self) -> str:
+        return self.ui()[0]
+
+    @property
+    def detail(self) -> str:
+        return self.ui()[1]
+
+    def ui(self) -> Tuple[str, str]:
+        """(preview, detail) for Live / Failed / DLQ rows, built once."""
+        if self._ui is None:
+            self._ui = self._build_ui()
+        return self._ui
+
+    def _build_ui(self) -> Tuple[str, str]:
+        names = self.names
+        if not names:
+            single = self.summary
+            if single:
+                return (single[:120] + ("…" if len(single) > 120 else ""), single)
+            return ("", "")
+        mixed = self.firing == "mixed"
+        lines: List[str] = []
+        parts: List[str] = []
+        for i, n in enumerate(names):
+            suf = self.statuses[i] if mixed else ""
+            lines.append(f"[{i}] {n} — {suf}" if suf else f"[{i}] {n}")
+            if i < 6:
+                parts.append(f"[{i}] {n} ({suf})" if suf else f"[{i}] {n}")
+        preview = " · ".join(parts)
+        if len(names) > 6:
+            preview += f" (+{len(names) - 6} more)"
+        if len(preview) > 220:
+            preview = preview[:217] + "…"
+        return (preview, "\n".join(lines))
+
+
+class BundleSummaries:
+    """Per-request memo: each payload object is analyzed once, whichever feed or row asks first."""
+
+    def __init__(self) -> None:
+        # id(obj) -> (obj, summary); holding obj keeps its id from being reused meanwhile.
+        self._done: Dict[int, Tuple[Any, AlertBundleSummary]] = {}
+
+    def __call__(self, payload: Any) -> AlertBundleSummary:
+        hit = self._done.get(id(payload))
+        if hit is not None and hit[0] is payload:
+            return hit[1]
+        summary = AlertBundleSummary(payload)
+        self._done[id(payload)] = (payload, summary)
+        return summary
+
+    def stored_firing(self, sanitized_output: Any, inbound_shard: Any, total_shards: int) -> str:
+        """resolve_stored_alert_firing for an unrolled shard (its alert is alerts[0])."""
+        s = self(sanitized_output).status_at(0)
+        if s:
+            return s
+        inbound = self(inbound_shard)
+        return inbound.status_at(0) if total_shards > 1 else inbound.firing
+
+
+def extract_alert_summary(payload: Any) -> str:
+    """Extract alert name/summary from Alertmanager-shaped or flat JSON on /webhook/ocp."""
+    return AlertBundleSummary(payload).summary
+
+
+def extract_bundle_alert_names(payload: Any) -> List[str]:
+    """Ordered human-readable name per alerts[] entry (alertname, else annotation snippet)."""
+    return AlertBundleSummary(payload).names
+
+
+def format_alert_bundle_for_ui(payload: Any) -> Tuple[str, str]:
+    """
+    One-line preview + newline-separated detail ([0] name …) for Live/Failed rows.
+    When the bundle is mixed (some firing, some resolved), each detail line includes
+    that alert's status so the tooltip is unambiguous. Falls back to extract_alert_summary
+    when no alerts[] (e.g. flat JSON).
+    """
+    return AlertBundleSummary(payload).ui()
+
+
+def extract_alert_severity(payload: Any) -> str:
+    """
+    Extract severity/risk level from Alertmanager-shaped payloads, flat JSON, or transformed output.
+    When alerts[] is present, prefers the worst severity among all alert labels (group
+    commonLabels often disagrees with per-alert labels). Otherwise checks top-level
+    severity, commonLabels, groupLabels, and top-level labels.
+    """
+    return AlertBundleSummary(payload).severity
+
+
+def extract_bundle_firing_status(payload: Any) -> str:
+    """
+    Aggregate Alertmanager alerts[].status for the webhook row: firing | resolved | mixed | ''.
+    """
+    return AlertBundleSummary(payload).firing
+
+
+def extract_shard_firing_status(sanitized: Any) -> str:
+    """Single transformed shard: alerts[0].status (firing | resolved)."""
+    return AlertBundleSummary(sanitized).status_at(0)
+
+
+def extract_inbound_alert_status_by_index(payload: Any, index: int) -> str:
+    """Alertmanager alerts[i].status on the inbound webhook (before transform drops fields)."""
+    return AlertBundleSummary(payload).status_at(index)
+
+
+def resolve_stored_alert_firing(
+    sanitized_output: Any,
+    inbound_payload: Any,
+    shard_index: int,
+    total_shards: int,
+) -> str:
+    """
+    Firing/resolved for DLQ / RECENT_SENT when the transformed body may omit alerts[].status
+    (e.g. output_template). Prefer sanitized output; then inbound shard i when unroll; else bundle aggregate.
+    """
+    s = extract_shard_firing_status(sanitized_output)
+    if s:
+        return s
+    if total_shards > 1:
+        return extract_inbound_alert_status_by_index(inbound_payload, shard_index)
+    return extract_bundle_firing_status(inbound_payload)
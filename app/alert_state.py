@@ -0,0 +1,255 @@
+"""In-memory alert state table (keyed by fingerprint) with periodic snapshots on the PVC."""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.dlq import dlq_file_path
+from app.filelock import FileLock
+from app.rules import RouteConfig
+from app.shared import SHARED
+
+_lock = threading.Lock()
+_logger = logging.getLogger("alertbridge")
+
+ALERT_STATE_MAX = int(os.getenv("ALERTBRIDGE_ALERT_STATE_MAX", "50000"))
+ALERT_STATE_SNAPSHOT_SEC = int(os.getenv("ALERTBRIDGE_ALERT_STATE_SNAPSHOT_SEC", "60"))
+
+# fingerprint -> {fingerprint, route, status, labels, startsAt, endsAt, first_seen, last_seen, last_forwarded,
+# forwarded_status} (times in epoch seconds; last_forwarded / forwarded_status None until a notification
+# for the alert was forwarded successfully, see mark_forwarded).
+_table: Dict[str, Dict[str, Any]] = {}
+_dirty = False
+
+
+def alert_state_file_path() -> str:
+    """
+    Snapshot path on persistent storage.
+    Priority:
+    1) ALERTBRIDGE_ALERT_STATE_FILE
+    2) <dirname(ALERTBRIDGE_DLQ_FILE)>/state/alerts.json
+    """
+    explicit = os.getenv("ALERTBRIDGE_ALERT_STATE_FILE", "").strip()
+    if explicit:
+        return explicit
+    dlq = dlq_file_path()
+    if not dlq:
+        return ""
+    return os.path.join(os.path.dirname(dlq) or ".", "state", "alerts.json")
+
+
+# Multi-worker mode: every worker merges its table into the one snapshot file under this lock.
+_file_lock = FileLock(alert_state_file_path)
+
+
+def alert_fingerprint(alert: Dict[str, Any]) -> str:
+    """Alertmanager fingerprint when present, else a hash of the sorted labels."""
+    fp = alert.get("fingerprint")
+    if fp:
+        return str(fp)
+    labels = alert.get("labels") if isinstance(alert.get("labels"), dict) else {}
+    canonical = json.dumps(labels, sort_keys=True, ensure_ascii=False, default=str)
+    return "labels:" + hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def _alerts_of(shard: Any) -> List[Dict[str, Any]]:
+    """Alerts of an Alertmanager bundle/shard; a flat payload with labels counts as one alert."""
+    if not isinstance(shard, dict):
+        return []
+    alerts = shard.get("alerts")
+    if isinstance(alerts, list):
+        return [a for a in alerts if isinstance(a, dict)]
+    return [shard] if isinstance(shard.get("labels"), dict) else []
+
+
+def _status_of(alert: Dict[str, Any], shard: Dict[str, Any]) -> str:
+    for value in (alert.get("status"), shard.get("status")):
+        if isinstance(value, str) and value.strip():
+            return value.strip().lower()
+    return ""
+
+
+def _evict() -> None:
+    """
+    Caller holds _lock. Past ALERT_STATE_MAX, drop resolved alerts first, then the least recently
+    seen, down to 90% of the cap, so the sort runs once per many new alerts rather than per webhook.
+    """
+    if len(_table) <= ALERT_STATE_MAX:
+        return
+    excess = len(_table) - ALERT_STATE_MAX * 9 // 10
+    by_age = sorted(_table.values(), key=lambda r: (r["status"] != "resolved", r["last_seen"]))
+    for record in by_age[:excess]:
+        _table.pop(record["fingerprint"], None)
+
+
+def observe_alerts(route: RouteConfig, shard: Any, now: Optional[float] = None) -> bool:
+    """
+    Record every alert of the shard and return whether the route should forward it. Routes in
+    forward_mode "all" always forward; "transitions_only" forwards when an alert is new or its status
+    differs from the last forwarded one, or when heartbeat_sec elapsed since that alert was last
+    forwarded. Nothing counts as forwarded until mark_forwarded, so a failed or paused forward of a
+    transition is retried by the next re-send.
+    """
+    global _dirty
+    now = time.time() if now is None else now
+    alerts = _alerts_of(shard)
+    transitions_only = route.forward_mode == "transitions_only"
+    forward = not transitions_only or not alerts
+    with _lock:
+        for alert in alerts:
+            fp = alert_fingerprint(alert)
+            status = _status_of(alert, shard)
+            record = _table.get(fp)
+            if record is None:
+                record = _table[fp] = {
+                    "fingerprint": fp,
+                    "first_seen": now,
+                    "last_forwarded": None,
+                    "forwarded_status": None,
+                }
+                changed = True
+            else:
+                changed = record.get("forwarded_status") != status
+            labels = alert.get("labels")
+            record.update(
+                route=route.name,
+                status=status,
+                labels=labels if isinstance(labels, dict) else {},
+                startsAt=alert.get("startsAt"),
+                endsAt=alert.get("endsAt"),
+                last_seen=now,
+            )
+            if changed:
+                forward = True
+            elif route.heartbeat_sec and now - (record["last_forwarded"] or 0.0) >= route.heartbeat_sec:
+                forward = True
+        _dirty = True
+        _evict()
+    return forward
+
+
+def mark_forwarded(shard: Any, now: Optional[float] = None) -> None:
+    """Record that the shard's alerts were forwarded (with the status they carried)."""
+    global _dirty
+    now = time.time() if now is None else now
+    with _lock:
+        for alert in _alerts_of(shard):
+            record = _table.get(alert_fingerprint(alert))
+            if record is not None:
+                record["last_forwarded"] = now
+                record["forwarded_status"] = _status_of(alert, shard)
+                _dirty = True
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat(timespec="milliseconds")
+
+
+def active_alerts(route: Optional[str] = None, limit: int = 500) -> List[Dict[str, Any]]:
+    """Firing alerts from memory, most recently seen first."""
+    with _lock:
+        rows = [
+            dict(r)
+            for r in _table.values()
+            if r.get("status") == "firing" and (route is None or r.get("route") == route)
+        ]
+    rows.sort(key=lambda r: r["last_seen"], reverse=True)
+    out = rows[: max(1, min(int(limit), ALERT_STATE_MAX))]
+    for row in out:
+        for key in ("first_seen", "last_seen", "last_forwarded"):
+            row[key] = _iso(row[key])
+    return out
+
+
+def _read_snapshot(path: str) -> List[Dict[str, Any]]:
+    """Records of the snapshot file ([] when missing or unreadable)."""
+    if not os.path.isfile(path):
+        return []
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            data = json.load(handle) or {}
+    except (OSError, json.JSONDecodeError) as exc:
+        _logger.warning("alert_state_load_failed path=%s: %s", path, exc)
+        return []
+    records = data.get("alerts") if isinstance(data, dict) else None
+    return [r for r in records or [] if isinstance(r, dict) and r.get("fingerprint") and "last_seen" in r]
+
+
+def _merge_snapshot(path: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Multi-worker mode: this worker's records merged into the ones other workers wrote, per
+    fingerprint the most recently seen wins; capped at ALERT_STATE_MAX most recently seen.
+    """
+    merged = {str(r["fingerprint"]): r for r in _read_snapshot(path)}
+    for record in records:
+        other = merged.get(record["fingerprint"])
+        if other is None or other["last_seen"] <= record["last_seen"]:
+            merged[record["fingerprint"]] = record
+    if len(merged) <= ALERT_STATE_MAX:
+        return list(merged.values())
+    return sorted(merged.values(), key=lambda r: r["last_seen"], reverse=True)[:ALERT_STATE_MAX]
+
+
+def snapshot_alert_state(force: bool = False) -> bool:
+    """
+    Write the table to the snapshot file (tmp + rename) when it changed; False if not configured/failed.
+    In multi-worker mode the workers' tables are merged into the file, so a restart restores all of them.
+    """
+    global _dirty
+    path = alert_state_file_path()
+    if not path:
+        return False
+    with _lock:
+        if not (_dirty or force):
+            return True
+        records = list(_table.values())
+        _dirty = False
+    try:
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with _file_lock:
+            if SHARED is not None:
+                records = _merge_snapshot(path, records)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as handle:
+                json.dump({"version": 1, "alerts": records}, handle, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, path)
+        return True
+    except OSError as exc:
+        with _lock:
+            _dirty = True
+        _logger.warning("alert_state_snapshot_failed path=%s: %s", path, exc)
+        return False
+
+
+def load_alert_state() -> int:
+    """Restore the table from the snapshot file (startup); returns the number of alerts loaded."""
+    path = alert_state_file_path()
+    if not path:
+        return 0
+    with _file_lock:
+        records = _read_snapshot(path)
+    loaded = 0
+    with _lock:
+        for record in records:
+            # Snapshots written before forwarded_status: the last forward carried the stored status.
+            record.setdefault("forwarded_status", record.get("status") if record.get("last_forwarded") else None)
+            _table[str(record["fingerprint"])] = record
+            loaded += 1
+        _evict()
+    return loaded
+
+
+def reset_alert_state() -> None:
+    """Clear the in-memory table (tests)."""
+    global _dirty
+    with _lock:
+        _table.clear()
+        _dirty = False
@@ -0,0 +1,128 @@
+"""
+Incremental parser behind POST /webhook/{source}/batch. The body is either NDJSON (one payload per
+line) or a JSON array of payloads; chunks are fed as they arrive and complete items come out as soon
+as they are parsed, so the item cap is enforced while the body is still streaming.
+"""
+import codecs
+import json
+import os
+import re
+from typing import Any, List, Optional
+
+from app.codec import loads
+
+BATCH_MAX_ITEMS = int(os.getenv("ALERTBRIDGE_BATCH_MAX_ITEMS", "500"))
+BATCH_MAX_BYTES = int(os.getenv("ALERTBRIDGE_BATCH_MAX_BYTES", str(8 * 1024 * 1024)))
+
+_WS = re.compile(r"[ \t\r\n]*")
+_WS_BYTES = b" \t\r\n"
+
+
+class BatchFormatError(ValueError):
+    """Body is neither valid NDJSON nor a valid JSON array."""
+
+
+class BatchParser:
+    """Feed body chunks with feed(), then close(); `items` holds every payload parsed so far."""
+
+    def __init__(self) -> None:
+        self.items: List[Any] = []
+        self._mode: Optional[str] = None  # "ndjson" | "array", from the first non-blank byte
+        self._pending = bytearray()
+        # JSON array state
+        self._text = ""
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._expect = "open"  # open | first | item | sep | done
+        self._retry_at = 0
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def feed(self, chunk: bytes) -> None:
+        if self._mode is None:
+            self._pending += chunk
+            head = self._pending.lstrip(_WS_BYTES)
+            if not head:
+                return
+            self._mode = "array" if head[:1] == b"[" else "ndjson"
+            chunk, self._pending = bytes(self._pending), bytearray()
+        if self._mode == "ndjson":
+            self._feed_lines(chunk, final=False)
+        else:
+            self._feed_array(chunk, final=False)
+
+    def close(self) -> None:
+        if self._mode == "ndjson":
+            self._feed_lines(b"", final=True)
+        elif self._mode == "array":
+            self._feed_array(b"", final=True)
+            if self._expect != "done":
+                raise BatchFormatError("Unterminated JSON array")
+
+    def _feed_lines(self, chunk: bytes, final: bool) -> None:
+        self._pending += chunk
+        start = 0
+        while True:
+            end = self._pending.find(b"\n", start)
+            if end < 0:
+                break
+            self._parse_line(memoryview(self._pending)[start:end])
+            start = end + 1
+        if final:
+            self._parse_line(memoryview(self._pending)[start:])
+            start = len(self._pending)
+        if start:
+            del self._pending[:start]
+
+    def _parse_line(self, line: memoryview) -> None:
+        try:
+            self.items.append(loads(line))
+        except json.JSONDecodeError as exc:
+            if not bytes(line).strip():
+                return  # blank line
+            raise BatchFormatError(f"Invalid JSON at item {len(self.items)}: {exc}") from exc
+
+    def _feed_array(self, chunk: bytes, final: bool) -> None:
+        try:
+            self._text += self._utf8.decode(chunk, final)
+        except UnicodeDecodeError as exc:
+            raise BatchFormatError(f"Invalid UTF-8: {exc}") from exc
+        text, pos = self._text, 0
+        while True:
+            pos = _WS.match(text, pos).end()
+            if pos == len(text):
+                break
+            ch = text[pos]
+            if self._expect == "open":
+                if ch != "[":
+                    raise BatchFormatError("Expected a JSON array")
+                self._expect, pos = "first", pos + 1
+            elif self._expect == "sep":
+                if ch not in ",]":
+                    raise BatchFormatError(f"Expected ',' or ']' after item {len(self.items) - 1}")
+                self._expect, pos = ("item" if ch == "," else "done"), pos + 1
+            elif self._expect == "done":
+                raise BatchFormatError("Unexpected data after the JSON array")
+            elif ch == "]" and self._expect == "first":
+                self._expect, pos = "done", pos + 1
+            else:
+                # An item cut by a chunk boundary fails to parse; retry once the buffer has doubled,
+                # so a large item is rescanned O(log n) times rather than once per chunk.
+                if not final and len(text) < self._retry_at:
+                    break
+                try:
+                    value, end = self._decoder.raw_decode(text, pos)
+                except json.JSONDecodeError as exc:
+                    if final:
+                        raise BatchFormatError(f"Invalid JSON at item {len(self.items)}: {exc}") from exc
+                    self._retry_at = 2 * (len(text) - pos) + pos
+                    break
+                if end == len(text) and not final and not isinstance(value, (dict, list)):
+                    break  # a bare number may continue in the next chunk
+                self.items.append(value)
+                self._expect, pos, self._retry_at = "sep", end, 0
+        if pos:
+            self._text = text[pos:]
+            if self._retry_at:
+                self._retry_at -= pos
@@ -0,0 +1,105 @@
+"""
+JSON codec used on the hot paths (webhook parse, API responses, DLQ / success log lines, outbound
+bodies): orjson when installed, else msgspec, else the stdlib. Output is compact UTF-8 in all cases.
+"""
+import json
+import re
+from typing import Any, Union
+
+from fastapi.responses import JSONResponse
+
+Buffer = Union[bytes, bytearray, memoryview, str]
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional dependency
+    msgspec = None
+
+
+# Digit runs that may be an integer outside the 64-bit range, which orjson / msgspec turn into a float
+# (a false hit, e.g. inside a string, only costs the stdlib parse).
+_WIDE_INT = re.compile(rb"-\d{19}|\d{20}")
+_WIDE_INT_STR = re.compile(r"-\d{19}|\d{20}")
+
+
+def _has_wide_int(data: Buffer) -> bool:
+    return (_WIDE_INT_STR if isinstance(data, str) else _WIDE_INT).search(data) is not None
+
+
+def _stdlib_loads(data: Buffer) -> Any:
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _stdlib_dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), sort_keys=sort_keys, default=str).encode("utf-8")
+
+
+if orjson is not None:
+    CODEC = "orjson"
+    _OPTS = orjson.OPT_NON_STR_KEYS
+
+    def loads(data: Buffer) -> Any:
+        """
+        Parse JSON; raises json.JSONDecodeError. Wide integers and what orjson rejects but the
+        stdlib accepts (NaN, Infinity) go through the stdlib, so payloads are not altered.
+        """
+        if _has_wide_int(data):
+            return _stdlib_loads(data)
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return _stdlib_loads(data)
+
+    def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+        """Compact UTF-8 JSON; unknown types are stringified (like default=str)."""
+        try:
+            return orjson.dumps(obj, default=str, option=_OPTS | (orjson.OPT_SORT_KEYS if sort_keys else 0))
+        except TypeError:
+            # e.g. integers beyond 64 bits, which the stdlib still handles
+            return _stdlib_dumps(obj, sort_keys)
+
+elif msgspec is not None:
+    CODEC = "msgspec"
+    _decoder = msgspec.json.Decoder()
+    _encoder = msgspec.json.Encoder(enc_hook=str)
+
+    def loads(data: Buffer) -> Any:
+        """Parse JSON; raises json.JSONDecodeError. Falls back to the stdlib like the orjson branch."""
+        if _has_wide_int(data):
+            return _stdlib_loads(data)
+        try:
+            return _decoder.decode(data)
+        except msgspec.DecodeError:
+            return _stdlib_loads(data)
+
+    def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+        """Compact UTF-8 JSON; unknown types are stringified (like default=str)."""
+        if sort_keys:
+            return _stdlib_dumps(obj, sort_keys)
+        try:
+            return _encoder.encode(obj)
+        except (TypeError, OverflowError):
+            return _stdlib_dumps(obj, sort_keys)
+
+else:
+    CODEC = "json"
+    loads = _stdlib_loads
+    dumps = _stdlib_dumps
+
+
+def dumps_str(obj: Any) -> str:
+    return dumps(obj).decode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the codec above (default response class of the app)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
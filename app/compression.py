@@ -0,0 +1,108 @@
+"""
+Negotiated gzip / br compression for the large admin and feed API responses (opt-in per endpoint;
+webhook responses are never compressed). br needs the optional `brotli` package.
+"""
+import asyncio
+import gzip
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("ALERTBRIDGE_COMPRESS_MIN_BYTES", "1024"))
+# Bodies at least this large are compressed in a worker thread instead of on the event loop.
+COMPRESS_THREAD_BYTES = int(os.getenv("ALERTBRIDGE_COMPRESS_THREAD_BYTES", "65536"))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+_CACHE_MAX = 32
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """br when accepted and available, else gzip when accepted; None for identity."""
+    accepted = {}
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip()] = q
+    star = accepted.get("*", 0.0)
+    if brotli is not None and accepted.get("br", star) > 0:
+        return "br"
+    if accepted.get("gzip", star) > 0:
+        return "gzip"
+    return None
+
+
+def compress_bytes(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class _CompressedCache:
+    """
+    Last few compressed bodies keyed by (body object, encoding). Versioned bodies (see app.etag) are
+    the same bytes object until their resource changes, so repeat polls skip compression entirely.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # (id(body), encoding) -> (body, compressed); holding body keeps its id from being reused.
+        self._items: "OrderedDict[Tuple[int, str], Tuple[bytes, bytes]]" = OrderedDict()
+
+    def get(self, body: bytes, encoding: str) -> Optional[bytes]:
+        with self._lock:
+            hit = self._items.get((id(body), encoding))
+            if hit is None or hit[0] is not body:
+                return None
+            self._items.move_to_end((id(body), encoding))
+            return hit[1]
+
+    def put(self, body: bytes, encoding: str, compressed: bytes) -> None:
+        with self._lock:
+            self._items[(id(body), encoding)] = (body, compressed)
+            while len(self._items) > _CACHE_MAX:
+                self._items.popitem(last=False)
+
+
+_compressed = _CompressedCache()
+
+
+async def compressed(request: Request, response: Response) -> Response:
+    """Compress `response` in place when the client accepts it and the body is large enough."""
+    response.headers.append("Vary", "Accept-Encoding")
+    body = response.body
+    if (
+        response.status_code != 200
+        or len(body) < COMPRESS_MIN_BYTES
+        or "content-encoding" in response.headers
+    ):
+        return response
+    encoding = choose_encoding(request.headers.get("accept-encoding", ""))
+    if encoding is None:
+        return response
+    packed = _compressed.get(body, encoding)
+    if packed is None:
+        if len(body) >= COMPRESS_THREAD_BYTES:
+            packed = await asyncio.to_thread(compress_bytes, body, encoding)
+        else:
+            packed = compress_bytes(body, encoding)
+        _compressed.put(body, encoding, packed)
+    response.body = packed
+    response.headers["Content-Length"] = str(len(packed))
+    response.headers["Content-Encoding"] = encoding
+    return response
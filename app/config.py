@@ -6,7 +6,8 @@ from typing import Optional
 
 import yaml
 
-from app.rules import Defaults, RuleSet
+from app.rules import Defaults, RuleSet, compile_route_plans
+from app.shared import SHARED
 
 logger = logging.getLogger("alertbridge")
 RULES_PATH = Path(os.getenv("ALERTBRIDGE_RULES_PATH", "/etc/alertbridge/rules.yaml"))
@@ -17,6 +18,10 @@ CONFIG_WATCH_INTERVAL = int(os.getenv("ALERTBRIDGE_CONFIG_WATCH_INTERVAL", "30")
 _lock = RLock()
 _rules_cache: Optional[RuleSet] = None
 _rules_loaded = False
+# Bumped on every set_rules (load, reload, UI save) — ETag version of GET /api/config.
+_rules_version = 0
+# Multi-worker mode: generation of the rules last published to / applied from the shared store.
+_shared_generation = 0
 
 
 def _rules_dict_with_patterns(rules: RuleSet) -> dict:
@@ -41,6 +46,7 @@ def persist_rules(rules: RuleSet) -> None:
 
     patched, patch_err = persist_rules_to_configmap(rules_yaml)
     if patched:
+        _publish_rules_yaml(rules_yaml)
         return
 
     # ConfigMap update failed or not configured. If we're in OCP (configmap name set) or
@@ -65,6 +71,32 @@ def persist_rules(rules: RuleSet) -> None:
                 "or update the ConfigMap manually and call /admin/reload."
             ) from e
         raise
+    _publish_rules_yaml(rules_yaml)
+
+
+def publish_rules(rules: RuleSet) -> None:
+    """Multi-worker mode: hand rules (+ saved patterns) applied in this worker to the others."""
+    if SHARED is not None:
+        _publish_rules_yaml(yaml.safe_dump(_rules_dict_with_patterns(rules), sort_keys=False))
+
+
+def _publish_rules_yaml(rules_yaml: str) -> None:
+    global _shared_generation
+    if SHARED is not None:
+        _shared_generation = SHARED.publish_text("rules", rules_yaml)
+
+
+def sync_shared_rules() -> bool:
+    """Multi-worker mode: apply rules another worker published since the last sync. True if applied."""
+    global _shared_generation
+    if SHARED is None:
+        return False
+    generation, rules_yaml = SHARED.text_since("rules", _shared_generation)
+    if rules_yaml is None:
+        return False
+    _shared_generation = generation
+    set_rules(load_rules_from_yaml_text(rules_yaml))
+    return True
 
 
 def enforce_ocp_inbound_only(rules: RuleSet) -> RuleSet:
@@ -84,6 +116,32 @@ def enforce_ocp_inbound_only(rules: RuleSet) -> RuleSet:
     return rules.model_copy(update={"routes": kept})
 
 
+def enforce_single_worker_options(rules: RuleSet) -> None:
+    """
+    Multi-worker mode: the dedup window, the alert state behind forward_mode transitions_only and
+    aggregation buffers live in each worker, so routes using them are rejected (ValueError).
+    """
+    if SHARED is None:
+        return
+    bad = []
+    for r in rules.routes:
+        per_worker = [
+            opt
+            for opt, used in (
+                ("dedup", r.dedup is not None),
+                ("forward_mode: transitions_only", r.forward_mode == "transitions_only"),
+                ("aggregate", r.aggregate is not None),
+            )
+            if used
+        ]
+        if per_worker:
+            bad.append(f"{r.name}({', '.join(per_worker)})")
+    if bad:
+        raise ValueError(
+            "Route option(s) kept per worker are not supported with ALERTBRIDGE_WORKERS > 1: " + "; ".join(bad)
+        )
+
+
 def load_rules_from_yaml_text(yaml_text: str) -> RuleSet:
     """Parse rules.yaml content (includes optional `patterns` list)."""
     from app.patterns import init_patterns
@@ -91,8 +149,9 @@ def load_rules_from_yaml_text(yaml_text: str) -> RuleSet:
     data = yaml.safe_load(yaml_text) or {}
     patterns = data.pop("patterns", None)
     init_patterns(patterns)
-    rules = RuleSet.model_validate(data)
-    return enforce_ocp_inbound_only(rules)
+    rules = enforce_ocp_inbound_only(RuleSet.model_validate(data))
+    enforce_single_worker_options(rules)
+    return rules
 
 
 def load_rules_from_file(path: Path = RULES_PATH) -> RuleSet:
@@ -110,10 +169,16 @@ def save_rules_to_file(rules: RuleSet, path: Path = RULES_PATH) -> None:
 
 
 def set_rules(rules: RuleSet) -> None:
-    global _rules_cache, _rules_loaded
+    global _rules_cache, _rules_loaded, _rules_version
+    compile_route_plans(rules)
     with _lock:
         _rules_cache = rules
         _rules_loaded = True
+        _rules_version += 1
+
+
+def rules_version() -> int:
+    return _rules_version
 
 
 def get_rules() -> RuleSet:
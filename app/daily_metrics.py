@@ -2,13 +2,12 @@
 import json
 import logging
 import os
-import threading
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 
 from app.dlq import dlq_file_path
+from app.filelock import FileLock
 
-_lock = threading.Lock()
 _logger = logging.getLogger("alertbridge")
 BANGKOK = timezone(timedelta(hours=7))
 
@@ -30,6 +29,9 @@ def daily_metrics_file_path() -> str:
     return os.path.join(base, "metrics", "daily.json")
 
 
+_lock = FileLock(daily_metrics_file_path)
+
+
 def _load_all(path: str) -> Dict[str, Dict[str, Any]]:
     if not os.path.isfile(path):
         return {}
@@ -57,7 +59,8 @@ def increment_daily(metric: str, amount: int = 1, when: Optional[datetime] = Non
     metric: incoming | forward_success | forward_fail | dlq
 
     Semantics (main webhook handler):
-    - incoming: one per webhook accepted for processing (after API key, route, HMAC, JSON OK — not counted on 4xx rejects)
+    - incoming: one per webhook accepted for processing (after API key, route, HMAC, JSON OK — not counted on 4xx rejects
+      or when dedup / forward_mode transitions_only held back every alert of it)
     - forward_success: one per webhook when all outbounds for that webhook succeeded (same cap as incoming; unroll does not multiply)
     - forward_fail: one per incoming webhook that had at least one failed forward (paired with dlq below)
     - dlq: same increment as forward_fail for daily totals; DLQ JSONL file may have more lines when unrolling
@@ -90,6 +93,16 @@ def increment_daily(metric: str, amount: int = 1, when: Optional[datetime] = Non
         _logger.warning("daily_metrics_write_failed path=%s: %s", path, exc)
 
 
+def daily_metrics_signature() -> str:
+    """mtime_ns-size of the counters file ('' when absent): changes whenever the file is rewritten."""
+    path = daily_metrics_file_path()
+    try:
+        st = os.stat(path) if path else None
+    except OSError:
+        st = None
+    return f"{st.st_mtime_ns:x}-{st.st_size:x}" if st else ""
+
+
 def read_daily(days: int = 30) -> List[Dict[str, Any]]:
     """Read newest N days of persisted counters (newest first)."""
     path = daily_metrics_file_path()
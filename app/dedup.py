@@ -0,0 +1,167 @@
+"""Per-route suppression of repeated Alertmanager notifications within a TTL window (in-process)."""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.metrics import DEDUP_TOTAL
+from app.rules import DedupConfig, RouteConfig, _get_by_path
+
+_lock = threading.Lock()
+
+
+class DedupWindow:
+    """
+    Bounded LRU of alert identities. Each entry keeps the last status seen and, per status, when the
+    TTL window opened by the last forwarded notification ends. Repeats inside that window are
+    suppressed; the window is not extended by suppressed repeats.
+    """
+
+    def __init__(self, config: DedupConfig) -> None:
+        self.config = config
+        self._entries: "OrderedDict[str, Tuple[str, Dict[str, float]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def admit(self, identity: str, status: str, now: Optional[float] = None) -> Optional["DedupMark"]:
+        """Mark of the window opened for this notification; None = repeat within the window."""
+        now = time.monotonic() if now is None else now
+        previous_status: Optional[str] = None
+        entry = self._entries.get(identity)
+        if entry is not None:
+            last_status, expires = entry
+            previous_status = last_status
+            transition = last_status != status
+            if not (transition and self.config.pass_status_transitions) and expires.get(status, 0.0) > now:
+                self._entries[identity] = (status, expires)
+                self._entries.move_to_end(identity)
+                return None
+        else:
+            expires = {}
+        mark = DedupMark(self, identity, status, now + self.config.ttl_sec, previous_status, expires.get(status))
+        expires[status] = mark.expiry
+        self._entries[identity] = (status, expires)
+        self._entries.move_to_end(identity)
+        while len(self._entries) > self.config.max_entries:
+            self._entries.popitem(last=False)
+        return mark
+
+    def rollback(self, mark: "DedupMark") -> None:
+        """Undo an admit whose forward did not go out, unless the identity was admitted again since."""
+        entry = self._entries.get(mark.identity)
+        if entry is None:
+            return
+        last_status, expires = entry
+        if expires.get(mark.status) != mark.expiry:
+            return
+        if mark.previous_expiry is None:
+            del expires[mark.status]
+        else:
+            expires[mark.status] = mark.previous_expiry
+        if not expires:
+            del self._entries[mark.identity]
+        elif last_status == mark.status and mark.previous_status is not None:
+            self._entries[mark.identity] = (mark.previous_status, expires)
+
+
+class DedupMark:
+    """What DedupWindow.admit changed for one notification, so dedup_rollback can restore it."""
+
+    __slots__ = ("window", "identity", "status", "expiry", "previous_status", "previous_expiry")
+
+    def __init__(
+        self,
+        window: DedupWindow,
+        identity: str,
+        status: str,
+        expiry: float,
+        previous_status: Optional[str],
+        previous_expiry: Optional[float],
+    ) -> None:
+        self.window = window
+        self.identity = identity
+        self.status = status
+        self.expiry = expiry
+        self.previous_status = previous_status
+        self.previous_expiry = previous_expiry
+
+
+_windows: Dict[str, DedupWindow] = {}
+
+
+def _window_for(route: RouteConfig) -> DedupWindow:
+    """Caller holds _lock. A changed dedup config (rules reload) starts a fresh window."""
+    window = _windows.get(route.name)
+    if window is None or window.config != route.dedup:
+        window = _windows[route.name] = DedupWindow(route.dedup)
+    return window
+
+
+def _shard_status(inbound: Any, transformed: Any) -> str:
+    """Status of the single alert of a shard, else the bundle / flat status, else the transformed one."""
+    alerts = inbound.get("alerts") if isinstance(inbound, dict) else None
+    first = "alerts.0.status" if isinstance(alerts, list) and len(alerts) == 1 else "status"
+    for data, path in ((inbound, first), (inbound, "status"), (transformed, "status")):
+        found, value = _get_by_path(data, path)
+        if found and isinstance(value, str) and value.strip():
+            return value.strip().lower()
+    return ""
+
+
+def alert_identity(route: RouteConfig, inbound: Any, transformed: Any) -> str:
+    """
+    Dedup key (without status): dedup.key_paths read from the transformed body when configured,
+    else Alertmanager alerts[].fingerprint of the inbound shard, else its alerts[].labels.
+    """
+    config = route.dedup
+    if config is not None and config.key_paths:
+        values: List[Any] = []
+        for path in config.key_paths:
+            found, value = _get_by_path(transformed, path)
+            values.append(value if found else None)
+        basis = "keys:" + json.dumps(values, sort_keys=True, ensure_ascii=False, default=str)
+    else:
+        alerts = inbound.get("alerts") if isinstance(inbound, dict) else None
+        alerts = [a for a in alerts if isinstance(a, dict)] if isinstance(alerts, list) else []
+        fps = sorted(str(a["fingerprint"]) for a in alerts if a.get("fingerprint"))
+        if fps:
+            basis = "am:" + ",".join(fps)
+        else:
+            if alerts:
+                labels: Any = [a.get("labels") for a in alerts]
+            else:
+                labels = inbound.get("labels", inbound) if isinstance(inbound, dict) else inbound
+            basis = "labels:" + json.dumps(labels, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{route.name}\n{basis}".encode("utf-8")).hexdigest()[:32]
+
+
+def dedup_admit(route: RouteConfig, inbound: Any, transformed: Any) -> Tuple[bool, Optional[DedupMark]]:
+    """
+    (forward?, mark): forward is False for a repeat within the window; counts passed / suppressed.
+    The mark (None when the route has no dedup) is for dedup_rollback when the forward fails.
+    """
+    if route.dedup is None:
+        return True, None
+    identity = alert_identity(route, inbound, transformed)
+    status = _shard_status(inbound, transformed)
+    with _lock:
+        mark = _window_for(route).admit(identity, status)
+    DEDUP_TOTAL.labels(route=route.name, result="passed" if mark is not None else "suppressed").inc()
+    return mark is not None, mark
+
+
+def dedup_rollback(mark: Optional[DedupMark]) -> None:
+    """Forget an admitted notification that was not delivered, so its re-send is not suppressed."""
+    if mark is None:
+        return
+    with _lock:
+        mark.window.rollback(mark)
+
+
+def reset_dedup() -> None:
+    """Forget every window (tests)."""
+    with _lock:
+        _windows.clear()
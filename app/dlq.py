@@ -2,60 +2,340 @@
 import json
 import logging
 import os
+import hashlib
 import threading
 import uuid
-from typing import Any, Dict, List, Optional, Set, Tuple
+from contextlib import ExitStack
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+from app.codec import dumps
+from app.filelock import FileLock
+from app.jsonl_pages import read_jsonl_page
 
-_lock = threading.Lock()
 _logger = logging.getLogger("alertbridge")
 
+# Purge-by-ids appends ids to a sidecar file instead of rewriting the JSONL; readers skip those rows.
+# A background compaction rewrites the DLQ once tombstones reach this fraction of the row count.
+DLQ_COMPACT_RATIO = float(os.getenv("ALERTBRIDGE_DLQ_COMPACT_RATIO", "0.2"))
+_COPY_CHUNK_BYTES = 1024 * 1024
+# Index entries kept in memory (newest); searches read older ones from the .idx file.
+DLQ_INDEX_CACHE_MAX = int(os.getenv("ALERTBRIDGE_DLQ_INDEX_CACHE_MAX", "200000"))
+
+# Guards the cache and the compaction thread handle; sidecar writes take _tombstone_lock below.
+_tombstone_cache_lock = threading.Lock()
+_tombstone_cache: Dict[str, Any] = {"path": "", "sig": None, "ids": frozenset()}
+_compact_thread: Optional[threading.Thread] = None
+# Bumped by purge_dlq_all so an in-flight compaction does not resurrect truncated rows.
+_generation = 0
+
+# Sidecar index (<dlq>.idx): one small JSON object per DLQ row with its byte offset and the fields
+# operators filter on, so /api/dlq/search never decodes the full JSONL rows it does not return.
+_INDEX_FIELDS = (
+    "ts",
+    "route",
+    "error_type",
+    "http_status",
+    "alert_severity",
+    "dlq_id",
+    "request_id",
+    "fingerprint",
+    "first_seen",
+    "count",
+)
+DLQ_SEARCH_GROUP_FIELDS = ("route", "error_type", "http_status", "alert_severity")
+# "latest" maps fingerprint -> newest index entry, for routes that aggregate repeated failures.
+# "entries" holds at most DLQ_INDEX_CACHE_MAX of the newest rows; "dropped" rows before them (DLQ
+# bytes up to "head_end") are only on disk.
+_INDEX_CACHE_EMPTY: Dict[str, Any] = {
+    "path": "",
+    "ino": None,
+    "read": 0,
+    "entries": [],
+    "latest": {},
+    "dropped": 0,
+    "head_end": 0,
+}
+_index_cache: Dict[str, Any] = dict(_INDEX_CACHE_EMPTY)
+
 
 def dlq_file_path() -> str:
     return os.getenv("ALERTBRIDGE_DLQ_FILE", "").strip()
 
 
-def read_recent_dlq(limit: int = 50, max_read_bytes: int = 2_000_000) -> List[Dict[str, Any]]:
-    """
-    Return up to `limit` newest JSONL rows (newest first). Reads only the tail of the file for speed.
-    """
+def _compact_lock_path() -> str:
     path = dlq_file_path()
-    if not path or not os.path.isfile(path):
-        return []
-    limit = max(1, min(int(limit), 500))
+    return path + ".compact" if path else ""
+
+
+# Appends, truncation and the compaction swap; across workers too in multi-worker mode.
+_lock = FileLock(dlq_file_path)
+# One compaction at a time (they share the .compact temp file).
+_compact_lock = FileLock(_compact_lock_path)
+
+
+def _tombstone_file_path(path: str) -> str:
+    return path + ".tombstones"
+
+
+# Appends to and rewrites of the tombstone sidecar, across workers too.
+_tombstone_lock = FileLock(lambda: _tombstone_file_path(dlq_file_path()) if dlq_file_path() else "")
+
+
+def _read_tombstones(tpath: str) -> FrozenSet[str]:
+    with open(tpath, "r", encoding="utf-8") as handle:
+        return frozenset(ln.strip() for ln in handle if ln.strip())
+
+
+def _load_tombstones(path: str) -> FrozenSet[str]:
+    """Purged ids for the DLQ at `path` (cached until the sidecar file changes)."""
+    tpath = _tombstone_file_path(path)
     try:
-        size = os.path.getsize(path)
+        st = os.stat(tpath)
+        sig: Any = (st.st_ino, st.st_size, st.st_mtime_ns)
     except OSError:
-        return []
-    read_size = min(size, max_read_bytes)
+        sig = None
+    with _tombstone_cache_lock:
+        if _tombstone_cache["path"] == tpath and _tombstone_cache["sig"] == sig:
+            return _tombstone_cache["ids"]
+        ids: FrozenSet[str] = frozenset()
+        if sig is not None:
+            try:
+                ids = _read_tombstones(tpath)
+            except OSError as exc:
+                _logger.warning("dlq_tombstone_read_failed path=%s: %s", tpath, exc)
+        _tombstone_cache.update({"path": tpath, "sig": sig, "ids": ids})
+        return ids
+
+
+class StaleCursorError(ValueError):
+    """A DLQ cursor issued before the file was compacted or truncated: its byte offset moved."""
+
+
+def _epoch_file_path(path: str) -> str:
+    return path + ".epoch"
+
+
+def _read_epoch(path: str) -> int:
+    """Compaction epoch of the DLQ at `path`: bumped whenever its rows move (0 until the first bump)."""
     try:
-        with _lock:
-            with open(path, "rb") as handle:
-                if read_size < size:
-                    handle.seek(-read_size, os.SEEK_END)
-                else:
-                    handle.seek(0)
-                chunk = handle.read()
-    except OSError as exc:
-        _logger.warning("dlq_read_failed path=%s: %s", path, exc)
-        return []
-    lines = chunk.split(b"\n")
-    if read_size < size and lines:
-        lines = lines[1:]
-    out: List[Dict[str, Any]] = []
-    for raw in reversed(lines):
-        if len(out) >= limit:
-            break
-        line = raw.strip()
-        if not line:
-            continue
+        with open(_epoch_file_path(path), "r", encoding="utf-8") as handle:
+            return int(handle.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _bump_epoch(path: str) -> None:
+    """Caller holds _lock, having rewritten or truncated the DLQ: cursors issued so far are stale."""
+    tmp_path = f"{_epoch_file_path(path)}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        handle.write(str(_read_epoch(path) + 1))
+    os.replace(tmp_path, _epoch_file_path(path))
+
+
+def _make_cursor(epoch: int, offset: Optional[int]) -> Optional[str]:
+    return f"{epoch}:{offset}" if offset is not None else None
+
+
+def _cursor_offset(cursor: Optional[str], epoch: int) -> Optional[int]:
+    """
+    Byte offset of an "<epoch>:<offset>" cursor. ValueError when malformed, StaleCursorError when
+    issued in another epoch (the rows it pointed between have moved).
+    """
+    if cursor is None:
+        return None
+    epoch_part, sep, offset_part = str(cursor).partition(":")
+    if not sep:
+        raise ValueError("cursor must be '<epoch>:<offset>' as returned in next_cursor")
+    cursor_epoch, offset = int(epoch_part), int(offset_part)
+    if cursor_epoch != epoch:
+        raise StaleCursorError("DLQ was compacted since this cursor was issued; page again from the newest rows")
+    return offset
+
+
+def _index_file_path(path: str) -> str:
+    return path + ".idx"
+
+
+def _index_entry(record: Dict[str, Any], offset: int, length: int) -> Dict[str, Any]:
+    entry: Dict[str, Any] = {"offset": offset, "end": offset + length}
+    for key in _INDEX_FIELDS:
+        entry[key] = record.get(key)
+    return entry
+
+
+def _parse_ts(value: Any) -> Optional[float]:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+def _reset_index_cache(**fields: Any) -> None:
+    _index_cache.update(_INDEX_CACHE_EMPTY, entries=[], latest={}, **fields)
+
+
+def _write_index(path: str, entries: List[Dict[str, Any]], mode: str) -> None:
+    with open(_index_file_path(path), mode, encoding="utf-8") as handle:
+        handle.write("".join(json.dumps(e, ensure_ascii=False, default=str) + "\n" for e in entries))
+
+
+def _replace_index(path: str, entries: List[Dict[str, Any]]) -> None:
+    """Rewrite the index via a temp file, so a crash leaves the old or the new one, never a truncated one."""
+    tmp_path = _index_file_path(path) + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        handle.write("".join(json.dumps(e, ensure_ascii=False, default=str) + "\n" for e in entries))
+    os.replace(tmp_path, _index_file_path(path))
+
+
+def _trim_index_cache(entries: List[Dict[str, Any]]) -> None:
+    """Past DLQ_INDEX_CACHE_MAX, forget the oldest entries down to 90% of it (they stay in the .idx)."""
+    if DLQ_INDEX_CACHE_MAX <= 0 or len(entries) <= DLQ_INDEX_CACHE_MAX:
+        return
+    drop = len(entries) - DLQ_INDEX_CACHE_MAX * 9 // 10
+    _index_cache["head_end"] = entries[drop - 1]["end"]
+    _index_cache["dropped"] += drop
+    del entries[:drop]
+
+
+def _sync_index(path: str) -> List[Dict[str, Any]]:
+    """
+    Return the cached index entries (oldest first); with the rows before them that only the .idx
+    holds (see _index_head) they cover every complete DLQ row. Caller holds _lock.
+    Reads only idx bytes appended since the last call; rows missing from the index (legacy DLQ
+    written before the index existed) are scanned once from the JSONL and appended.
+    """
+    ipath = _index_file_path(path)
+    try:
+        ino = os.stat(ipath).st_ino
+    except OSError:
+        ino = None
+    if _index_cache["path"] != ipath or _index_cache["ino"] != ino:
+        _reset_index_cache(path=ipath, ino=ino)
+    entries: List[Dict[str, Any]] = _index_cache["entries"]
+    latest: Dict[str, Dict[str, Any]] = _index_cache["latest"]
+    if ino is not None:
+        with open(ipath, "rb") as handle:
+            handle.seek(_index_cache["read"])
+            for raw in handle:
+                if not raw.endswith(b"\n"):
+                    break
+                _index_cache["read"] += len(raw)
+                try:
+                    entry = json.loads(raw)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                entry["_t"] = _parse_ts(entry.get("ts"))
+                entries.append(entry)
+                if entry.get("fingerprint"):
+                    latest[entry["fingerprint"]] = entry
+                _trim_index_cache(entries)
+    covered = entries[-1]["end"] if entries else _index_cache["head_end"]
+    if covered < os.path.getsize(path):
+        missing: List[Dict[str, Any]] = []
+        with open(path, "rb") as handle:
+            handle.seek(covered)
+            offset = covered
+            for raw in handle:
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    obj = json.loads(raw)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    obj = None
+                if isinstance(obj, dict):
+                    missing.append(_index_entry(obj, offset, len(raw)))
+                offset += len(raw)
+        if missing:
+            _write_index(path, missing, "a")
+            _index_cache["ino"] = os.stat(ipath).st_ino
+            _index_cache["read"] = os.path.getsize(ipath)
+            for entry in missing:
+                entry["_t"] = _parse_ts(entry.get("ts"))
+                if entry.get("fingerprint"):
+                    latest[entry["fingerprint"]] = entry
+            entries.extend(missing)
+            _trim_index_cache(entries)
+    return entries
+
+
+def _index_head(handle: Any, head_end: int) -> Iterator[Dict[str, Any]]:
+    """Index entries (oldest first) of the rows before the cached ones, read from an open .idx."""
+    for raw in handle:
+        if not raw.endswith(b"\n"):
+            return
         try:
-            out.append(json.loads(line.decode("utf-8")))
+            entry = json.loads(raw)
         except (json.JSONDecodeError, UnicodeDecodeError):
             continue
-    return out
+        if entry.get("end", 0) > head_end:
+            return
+        entry["_t"] = _parse_ts(entry.get("ts"))
+        yield entry
+
+
+def _is_tombstoned(obj: Any, tombstones: FrozenSet[str]) -> bool:
+    if not tombstones or not isinstance(obj, dict):
+        return False
+    did = obj.get("dlq_id")
+    rid = obj.get("request_id")
+    return bool((did and str(did) in tombstones) or (rid and str(rid) in tombstones))
+
+
+def read_dlq_page(cursor: Optional[str] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Return (rows, next_cursor): up to `limit` rows older than `cursor` (newest first), skipping
+    purged rows. Pass next_cursor back to continue; None means the oldest row was reached.
+    Cursors are "<epoch>:<byte offset>"; one from before a compaction raises StaleCursorError.
+    """
+    path = dlq_file_path()
+    if not path or not os.path.isfile(path):
+        return [], None
+    tombstones = _load_tombstones(path)
+    while True:
+        epoch = _read_epoch(path)
+        offset = _cursor_offset(cursor, epoch)
+        try:
+            rows, next_offset = read_jsonl_page(
+                path,
+                _lock,
+                cursor=offset,
+                limit=limit,
+                skip=lambda obj: _is_tombstoned(obj, tombstones),
+            )
+        except OSError as exc:
+            _logger.warning("dlq_read_failed path=%s: %s", path, exc)
+            return [], None
+        # Compacted or truncated while reading: the offsets read may belong to either file version.
+        # Re-read (the first page) or report the cursor stale.
+        if _read_epoch(path) == epoch:
+            return rows, _make_cursor(epoch, next_offset)
+
+
+def read_recent_dlq(limit: int = 50) -> List[Dict[str, Any]]:
+    """Return up to `limit` newest JSONL rows (newest first)."""
+    return read_dlq_page(limit=limit)[0]
+
 
+def dlq_fingerprint(route_name: str, inbound: Any, transformed: Any) -> str:
+    """
+    Stable key for repeated failures of the same alert(s) on a route: Alertmanager alerts[].fingerprint
+    of the inbound shard when present, else the canonical transformed body.
+    """
+    alerts = inbound.get("alerts") if isinstance(inbound, dict) else None
+    fps = sorted(
+        str(a["fingerprint"]) for a in alerts or [] if isinstance(a, dict) and a.get("fingerprint")
+    ) if isinstance(alerts, list) else []
+    if fps:
+        basis = "am:" + ",".join(fps)
+    else:
+        basis = "body:" + json.dumps(transformed, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{route_name}\n{basis}".encode("utf-8")).hexdigest()[:32]
 
-def record_failed_forward(record: Dict[str, Any]) -> None:
+
+def record_failed_forward(record: Dict[str, Any], aggregate: bool = False) -> None:
     """
     Append one JSON line if ALERTBRIDGE_DLQ_FILE is set (absolute path recommended).
     Mount a PVC or hostPath on that path for durability across Pod restarts.
@@ -63,26 +343,70 @@ def record_failed_forward(record: Dict[str, Any]) -> None:
     One line per completed forward attempt that failed after internal retries (not per retry hop).
     If the route uses alert unrolling, one webhook may produce multiple lines (unroll_index /
     unroll_count); that is not duplicate retries.
+
+    With `aggregate` and a record["fingerprint"], the newest row for that fingerprint is
+    tombstoned and the appended row carries count / first_seen / last_seen, so the DLQ keeps one
+    live row per fingerprint (older copies are dropped by compaction).
     """
     path = dlq_file_path()
     if not path:
         return
     if not record.get("dlq_id"):
         record["dlq_id"] = str(uuid.uuid4())
-    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    fingerprint = record.get("fingerprint") if aggregate else None
     try:
         parent = os.path.dirname(path)
         if parent:
             os.makedirs(parent, exist_ok=True)
         with _lock:
-            with open(path, "a", encoding="utf-8") as handle:
-                handle.write(line)
+            replaced: Optional[str] = None
+            if fingerprint:
+                replaced = _merge_with_previous(path, record, fingerprint)
+            data = dumps(record) + b"\n"
+            with open(path, "ab") as handle:
+                offset = handle.tell()
+                handle.write(data)
+            # Without an index (legacy DLQ) the next search builds it from the JSONL instead.
+            if offset == 0 or os.path.isfile(_index_file_path(path)):
+                try:
+                    _write_index(path, [_index_entry(record, offset, len(data))], "w" if offset == 0 else "a")
+                except OSError as exc:
+                    _logger.warning("dlq_index_write_failed path=%s: %s", path, exc)
+            if replaced:
+                _append_tombstones(path, [replaced])
+                rows = _index_cache["dropped"] + len(_index_cache["entries"]) + 1
+                if len(_load_tombstones(path)) / rows >= DLQ_COMPACT_RATIO:
+                    schedule_dlq_compaction(path)
     except OSError as exc:
         _logger.warning("dlq_write_failed path=%s: %s", path, exc)
 
 
+def _merge_with_previous(path: str, record: Dict[str, Any], fingerprint: str) -> Optional[str]:
+    """Fill count / first_seen / last_seen from the live row with this fingerprint. Caller holds _lock."""
+    ts = record.get("ts")
+    record["count"] = 1
+    record["first_seen"] = ts
+    record["last_seen"] = ts
+    if not os.path.isfile(path):
+        return None
+    _sync_index(path)
+    prev = _index_cache["latest"].get(fingerprint)
+    if not prev or _is_tombstoned(prev, _load_tombstones(path)):
+        return None
+    record["count"] = int(prev.get("count") or 1) + 1
+    record["first_seen"] = prev.get("first_seen") or prev.get("ts") or ts
+    return str(prev["dlq_id"]) if prev.get("dlq_id") else None
+
+
+def _append_tombstones(path: str, ids: List[str]) -> None:
+    with _tombstone_lock:
+        with open(_tombstone_file_path(path), "a", encoding="utf-8") as handle:
+            handle.write("".join(f"{x}\n" for x in ids))
+
+
 def purge_dlq_all() -> Tuple[bool, Optional[str]]:
-    """Truncate the DLQ file. Returns (ok, error_message)."""
+    """Truncate the DLQ file and drop pending tombstones. Returns (ok, error_message)."""
+    global _generation
     path = dlq_file_path()
     if not path:
         return False, "ALERTBRIDGE_DLQ_FILE not set"
@@ -91,8 +415,14 @@ def purge_dlq_all() -> Tuple[bool, Optional[str]]:
         if parent:
             os.makedirs(parent, exist_ok=True)
         with _lock:
+            _generation += 1
             with open(path, "w", encoding="utf-8"):
                 pass
+            _bump_epoch(path)
+            _rewrite_tombstones(path)
+            if os.path.isfile(_index_file_path(path)):
+                os.unlink(_index_file_path(path))
+            _reset_index_cache()
         return True, None
     except OSError as exc:
         return False, str(exc)
@@ -100,9 +430,13 @@ def purge_dlq_all() -> Tuple[bool, Optional[str]]:
 
 def purge_dlq_by_ids(ids: Set[str]) -> Tuple[int, Optional[str]]:
     """
-    Remove JSONL lines whose parsed object has dlq_id or request_id in ids.
+    Hide JSONL rows whose parsed object has dlq_id or request_id in ids.
     (Legacy rows may only have request_id — UI sends that for purge-selected.)
-    Returns (removed_count, error_message).
+
+    Ids are appended to a tombstone sidecar (<dlq>.tombstones) so the call does not rewrite the
+    DLQ; readers skip tombstoned rows and a background compaction removes them from disk once
+    they exceed ALERTBRIDGE_DLQ_COMPACT_RATIO of the rows.
+    Returns (newly_purged_id_count, error_message).
     """
     path = dlq_file_path()
     if not path:
@@ -111,33 +445,245 @@ def purge_dlq_by_ids(ids: Set[str]) -> Tuple[int, Optional[str]]:
         return 0, None
     if not os.path.isfile(path):
         return 0, None
-    tmp_path = path + ".tmp"
+    clean = {str(i).strip() for i in ids if i and "\n" not in str(i) and "\r" not in str(i)}
+    new_ids = sorted(x for x in clean - _load_tombstones(path) if x)
+    if new_ids:
+        try:
+            _append_tombstones(path, new_ids)
+        except OSError as exc:
+            return 0, str(exc)
+        schedule_dlq_compaction(path)
+    return len(new_ids), None
+
+
+def _rewrite_tombstones(path: str, applied: Optional[FrozenSet[str]] = None) -> None:
+    """
+    Drop the `applied` ids from the sidecar (all of them when None). Caller holds _lock. The sidecar
+    is re-read under _tombstone_lock, so ids purged since `applied` was loaded are kept.
+    """
+    tpath = _tombstone_file_path(path)
+    with _tombstone_lock:
+        keep: FrozenSet[str] = frozenset()
+        if applied is not None and os.path.isfile(tpath):
+            keep = _read_tombstones(tpath) - applied
+        if keep:
+            tmp_path = tpath + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as handle:
+                handle.write("".join(f"{x}\n" for x in sorted(keep)))
+            os.replace(tmp_path, tpath)
+        elif os.path.isfile(tpath):
+            os.unlink(tpath)
+        with _tombstone_cache_lock:
+            _tombstone_cache.update({"path": "", "sig": None, "ids": frozenset()})
+
+
+def _count_rows(path: str) -> int:
+    rows = 0
+    with open(path, "rb") as handle:
+        while True:
+            block = handle.read(_COPY_CHUNK_BYTES)
+            if not block:
+                return rows
+            rows += block.count(b"\n")
+
+
+def _copy_live_rows(
+    inf: Any,
+    outf: Any,
+    tombstones: FrozenSet[str],
+    index: List[Dict[str, Any]],
+) -> Tuple[int, int]:
+    """
+    Copy complete lines from inf to outf, skipping tombstoned rows, and collect index entries at
+    their new offsets. Returns (bytes_consumed, rows_removed); a trailing partial line is left unread.
+    """
+    consumed = 0
     removed = 0
-    try:
-        with _lock:
-            with open(path, "r", encoding="utf-8") as inf, open(tmp_path, "w", encoding="utf-8") as outf:
-                for line in inf:
-                    raw = line.strip()
-                    if not raw:
-                        continue
-                    try:
-                        obj = json.loads(raw)
-                    except json.JSONDecodeError:
-                        outf.write(line)
-                        continue
-                    did = obj.get("dlq_id")
-                    rid = obj.get("request_id")
-                    match = (did and str(did) in ids) or (rid and str(rid) in ids)
-                    if match:
-                        removed += 1
-                    else:
-                        outf.write(line if line.endswith("\n") else line + "\n")
-            os.replace(tmp_path, path)
-        return removed, None
-    except OSError as exc:
+    for line in inf:
+        if not line.endswith(b"\n"):
+            break
+        consumed += len(line)
+        raw = line.strip()
+        if not raw:
+            continue
+        try:
+            obj = json.loads(raw.decode("utf-8"))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            outf.write(line)
+            continue
+        if _is_tombstoned(obj, tombstones):
+            removed += 1
+            continue
+        if isinstance(obj, dict):
+            index.append(_index_entry(obj, outf.tell(), len(line)))
+        outf.write(line)
+    return consumed, removed
+
+
+def compact_dlq(force: bool = False, path: Optional[str] = None) -> int:
+    """
+    Rewrite the DLQ without tombstoned rows and clear the ids that were applied.
+    Without `force`, only runs when tombstones reach DLQ_COMPACT_RATIO of the row count.
+    The bulk copy runs without the writer lock; only rows appended meanwhile are copied under it.
+    Returns the number of rows removed.
+    """
+    path = path or dlq_file_path()
+    if not path:
+        return 0
+    with _compact_lock:
+        tombstones = _load_tombstones(path)
+        if not tombstones or not os.path.isfile(path):
+            return 0
+        if not force:
+            rows = _count_rows(path)
+            if rows and len(tombstones) / rows < DLQ_COMPACT_RATIO:
+                return 0
+        generation = _generation
+        tmp_path = path + ".compact"
         try:
-            if os.path.isfile(tmp_path):
-                os.unlink(tmp_path)
+            index: List[Dict[str, Any]] = []
+            with open(tmp_path, "wb") as outf:
+                with open(path, "rb") as inf:
+                    offset, removed = _copy_live_rows(inf, outf, tombstones, index)
+                with _lock:
+                    # Truncated meanwhile (purge all, possibly by another worker): keep it empty.
+                    if generation != _generation or os.path.getsize(path) < offset:
+                        outf.close()
+                        os.unlink(tmp_path)
+                        return 0
+                    with open(path, "rb") as inf:
+                        inf.seek(offset)
+                        _, removed_tail = _copy_live_rows(inf, outf, tombstones, index)
+                        outf.write(inf.read())
+                    removed += removed_tail
+                    outf.close()
+                    os.replace(tmp_path, path)
+                    _bump_epoch(path)
+                    _replace_index(path, index)
+                    _reset_index_cache()
+                    _rewrite_tombstones(path, tombstones)
         except OSError:
+            try:
+                if os.path.isfile(tmp_path):
+                    os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+    _logger.info("dlq_compacted path=%s removed=%d", path, removed)
+    return removed
+
+
+def _compact_in_background(path: str) -> None:
+    try:
+        # Loop so ids purged while a pass was running are picked up without another trigger.
+        while compact_dlq(path=path) > 0:
             pass
-        return 0, str(exc)
+    except Exception as exc:
+        _logger.warning("dlq_compact_failed path=%s: %s", path, exc)
+
+
+def schedule_dlq_compaction(path: Optional[str] = None) -> None:
+    """Start a background compaction check unless one is already running."""
+    global _compact_thread
+    path = path or dlq_file_path()
+    if not path:
+        return
+    with _tombstone_cache_lock:
+        if _compact_thread is not None and _compact_thread.is_alive():
+            return
+        _compact_thread = threading.Thread(
+            target=_compact_in_background, args=(path,), name="dlq-compact", daemon=True
+        )
+        _compact_thread.start()
+
+
+def search_dlq(
+    route: Optional[str] = None,
+    error_type: Optional[str] = None,
+    http_status: Optional[int] = None,
+    severity: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    group_by: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = 50,
+) -> Dict[str, Any]:
+    """
+    Filter DLQ rows through the sidecar index (newest first). since/until are epoch seconds.
+    Only the returned page is read from the JSONL (by offset); `total` and `groups` (counts per
+    `group_by` value over all matches) come from the index alone. Pass next_cursor back as `cursor`
+    (StaleCursorError once the DLQ was compacted, as read_dlq_page).
+    """
+    empty: Dict[str, Any] = {"entries": [], "total": 0, "next_cursor": None, "groups": []}
+    path = dlq_file_path()
+    if not path or not os.path.isfile(path):
+        return empty
+    limit = max(1, min(int(limit), 500))
+    severity_lc = severity.strip().lower() if severity else None
+    tombstones = _load_tombstones(path)
+
+    def keep(e: Dict[str, Any]) -> bool:
+        if route is not None and e.get("route") != route:
+            return False
+        if error_type is not None and e.get("error_type") != error_type:
+            return False
+        if http_status is not None and e.get("http_status") != http_status:
+            return False
+        if severity_lc is not None and str(e.get("alert_severity") or "").strip().lower() != severity_lc:
+            return False
+        if since is not None or until is not None:
+            t = e.get("_t")
+            if t is None or (since is not None and t < since) or (until is not None and t > until):
+                return False
+        return not _is_tombstoned(e, tombstones)
+
+    # Both handles close on every exit, including an open() of the second one failing.
+    with ExitStack() as stack:
+        try:
+            with _lock:
+                epoch = _read_epoch(path)
+                offset = _cursor_offset(cursor, epoch)
+                entries = list(_sync_index(path))
+                head_end = _index_cache["head_end"]
+                # The open handles pin these file versions; compaction swaps files under _lock.
+                index_handle = stack.enter_context(open(_index_file_path(path), "rb")) if head_end else None
+                handle = stack.enter_context(open(path, "rb"))
+        except OSError as exc:
+            _logger.warning("dlq_search_failed path=%s: %s", path, exc)
+            return empty
+
+        matches = [e for e in reversed(entries) if keep(e)]
+        if index_handle is not None:
+            older = [e for e in _index_head(index_handle, head_end) if keep(e)]
+            older.reverse()
+            matches.extend(older)
+
+        groups: List[Dict[str, Any]] = []
+        if group_by:
+            counts: Dict[Any, int] = {}
+            for e in matches:
+                key = e.get(group_by)
+                counts[key] = counts.get(key, 0) + 1
+            groups = [
+                {"key": k, "count": n}
+                for k, n in sorted(counts.items(), key=lambda kv: (-kv[1], str(kv[0])))
+            ]
+
+        page = [e for e in matches if offset is None or e["offset"] < offset]
+        more = len(page) > limit
+        page = page[:limit]
+        rows: List[Dict[str, Any]] = []
+        for e in page:
+            handle.seek(e["offset"])
+            try:
+                obj = json.loads(handle.read(e["end"] - e["offset"]))
+            except (OSError, json.JSONDecodeError, UnicodeDecodeError):
+                continue
+            if isinstance(obj, dict):
+                rows.append(obj)
+    return {
+        "entries": rows,
+        "total": len(matches),
+        "next_cursor": _make_cursor(epoch, page[-1]["offset"]) if more and page else None,
+        "groups": groups,
+    }
@@ -0,0 +1,81 @@
+"""
+Weak ETags for polled portal endpoints. Each resource has a version (feed append counter, config
+snapshot counter, stats counter, file signature); the serialized JSON body is cached per version and
+an If-None-Match hit answers 304 without building or serializing anything.
+"""
+import threading
+import uuid
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.codec import dumps
+
+# Versions restart with the process; the boot token keeps an old ETag from matching a new process.
+_BOOT = uuid.uuid4().hex[:8]
+
+
+def weak_etag(version: Any) -> str:
+    return f'W/"{_BOOT}-{version}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match contains etag (weak comparison, as RFC 9110 prescribes for GET)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+class BodyCache:
+    """Serialized bodies keyed by resource name; one entry per name, replaced when the version moves."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._bodies: Dict[str, Tuple[str, bytes]] = {}
+
+    def get(self, name: str, etag: str, build: Callable[[], Any]) -> bytes:
+        with self._lock:
+            hit = self._bodies.get(name)
+        if hit is not None and hit[0] == etag:
+            return hit[1]
+        body = dumps(build())
+        with self._lock:
+            self._bodies[name] = (etag, body)
+        return body
+
+    def clear(self) -> None:
+        with self._lock:
+            self._bodies.clear()
+
+
+BODIES = BodyCache()
+
+
+def conditional_json(
+    request: Request,
+    name: str,
+    version: Any,
+    build: Callable[[], Any],
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    200 with the cached JSON body for `version`, or 304 when the client already holds it.
+    `name` must identify the representation (include query parameters that change the body).
+    """
+    etag = weak_etag(version)
+    out_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if headers:
+        out_headers.update(headers)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=out_headers)
+    return Response(BODIES.get(name, etag, build), media_type="application/json", headers=out_headers)
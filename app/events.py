@@ -0,0 +1,105 @@
+"""
+In-process pub/sub behind GET /api/stream (Server-Sent Events). Each subscriber has a bounded queue
+that drops its oldest events when the client falls behind; an event is formatted and serialized once,
+however many dashboards receive it.
+"""
+import asyncio
+import os
+from collections import deque
+from typing import Any, Callable, Optional
+
+from app.codec import dumps_str
+from app.metrics import STREAM_DROPPED_TOTAL
+
+STREAM_QUEUE_MAX = int(os.getenv("ALERTBRIDGE_STREAM_QUEUE_MAX", "256"))
+STREAM_STATS_SEC = int(os.getenv("ALERTBRIDGE_STREAM_STATS_MS", "2500")) / 1000
+STREAM_KEEPALIVE_SEC = 15.0
+
+
+class StreamEvent:
+    """One SSE event; `data` is a value or a zero-arg callable, rendered on first use."""
+
+    __slots__ = ("name", "_data", "_text")
+
+    def __init__(self, name: str, data: Any) -> None:
+        self.name = name
+        self._data = data
+        self._text: Optional[str] = None
+
+    def text(self) -> str:
+        if self._text is None:
+            data = self._data() if callable(self._data) else self._data
+            body = dumps_str(data)
+            self._text = f"event: {self.name}\ndata: {body}\n\n"
+            self._data = None
+        return self._text
+
+
+class Subscription:
+    """Bounded queue of one SSE client; publishing never blocks on a slow reader."""
+
+    def __init__(self, maxlen: int) -> None:
+        self._events: deque = deque(maxlen=maxlen)
+        self._ready = asyncio.Event()
+        self.dropped = 0
+
+    def put(self, event: StreamEvent) -> None:
+        if len(self._events) == self._events.maxlen:
+            self.dropped += 1
+            STREAM_DROPPED_TOTAL.inc()
+        self._events.append(event)
+        self._ready.set()
+
+    async def get(self, timeout: float) -> Optional[StreamEvent]:
+        """Next event, or None after `timeout` seconds without one."""
+        if not self._events:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._events.popleft()
+
+
+class EventBus:
+    def __init__(self, maxlen: int = STREAM_QUEUE_MAX) -> None:
+        self._maxlen = maxlen
+        self._subscribers: "set[Subscription]" = set()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        sub = Subscription(self._maxlen)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+
+    def publish(self, name: str, data: Any) -> None:
+        """Fan out to every subscriber (event loop only). No-op without subscribers."""
+        if not self._subscribers:
+            return
+        event = StreamEvent(name, data)
+        for sub in list(self._subscribers):
+            sub.put(event)
+
+
+def stats_delta(previous: Optional[dict], current: dict) -> dict:
+    """Top-level keys of `current` whose value differs from `previous` (all keys when None)."""
+    if previous is None:
+        return dict(current)
+    return {k: v for k, v in current.items() if previous.get(k) != v}
+
+
+BUS = EventBus()
+
+
+def publisher(name: str) -> Callable[[Any], None]:
+    """Bound BUS.publish for one event name (feeds hand it a row builder)."""
+
+    def publish(data: Any) -> None:
+        BUS.publish(name, data)
+
+    return publish
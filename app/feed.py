@@ -0,0 +1,372 @@
+"""
+Recent-activity feeds for the UI live panels. The webhook path only appends compact raw records
+(wall-clock float, ids, references to the parsed payload / transformed output); previews, ISO
+timestamps and sanitized copies are built when /api/recent-* is read, once per entry.
+"""
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from app.alert_bundle import BundleSummaries
+from app.codec import dumps, dumps_str, loads
+from app.rules import SanitizeCache
+from app.shared import SHARED, SharedStore
+
+# Bangkok (GMT+7) for all displayed timestamps
+BANGKOK = timezone(timedelta(hours=7))
+
+
+class FeedRecord:
+    """
+    One webhook / forward outcome as captured on the hot path. `payload` is the inbound bundle,
+    `shard` the inbound shard of an unrolled forward (None = whole bundle), `output` the transformed
+    body (unsanitized; never mutated after forwarding). Feeds that format on append keep only the
+    formatted `row` and drop those three references.
+    """
+
+    __slots__ = (
+        "ts",
+        "request_id",
+        "base_request_id",
+        "source",
+        "route",
+        "http_status",
+        "forwarded",
+        "payload",
+        "shard",
+        "shards",
+        "output",
+        "error",
+        "extra",
+        "row",
+    )
+
+    def __init__(
+        self,
+        request_id: str,
+        source: str,
+        route: str,
+        payload: Any = None,
+        output: Any = None,
+        shard: Any = None,
+        shards: int = 1,
+        http_status: Optional[int] = None,
+        forwarded: bool = False,
+        error: Optional[str] = None,
+        base_request_id: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.ts = time.time()
+        self.request_id = request_id
+        self.base_request_id = base_request_id
+        self.source = source
+        self.route = route
+        self.http_status = http_status
+        self.forwarded = forwarded
+        self.payload = payload
+        self.shard = shard
+        self.shards = shards
+        self.output = output
+        self.error = error
+        self.extra = extra
+        self.row: Optional[Dict[str, Any]] = None
+
+    def iso_ts(self) -> str:
+        return datetime.fromtimestamp(self.ts, BANGKOK).isoformat(timespec="milliseconds")
+
+
+RowFormatter = Callable[[FeedRecord, BundleSummaries, SanitizeCache], Dict[str, Any]]
+
+
+def _severity_and_firing(rec: FeedRecord, analyze: BundleSummaries, sanitize: SanitizeCache):
+    """Bundle severity / firing; the (sanitized) output fills in when the inbound bundle has none."""
+    bundle = analyze(rec.payload)
+    severity, firing = bundle.severity, bundle.firing
+    if rec.output is not None and not (severity and firing):
+        out = analyze(sanitize(rec.output))
+        severity = severity or out.severity
+        firing = firing or out.status_at(0)
+    return severity or None, firing or None
+
+
+def webhook_row(rec: FeedRecord, analyze: BundleSummaries, sanitize: SanitizeCache) -> Dict[str, Any]:
+    """Live feed: one row per webhook."""
+    bundle = analyze(rec.payload)
+    severity, firing = _severity_and_firing(rec, analyze, sanitize)
+    preview, detail = bundle.ui()
+    return {
+        "ts": rec.iso_ts(),
+        "request_id": rec.request_id,
+        "source": rec.source,
+        "route": rec.route,
+        "http_status": rec.http_status,
+        "forwarded": rec.forwarded,
+        "alert_summary": bundle.summary or None,
+        "alert_severity": severity,
+        "alerts_in_bundle": max(1, len(bundle.statuses)),
+        "alert_firing": firing,
+        "alert_bundle_preview": preview or None,
+        "alert_bundle_detail": detail or None,
+    }
+
+
+def payload_row(rec: FeedRecord, analyze: BundleSummaries, sanitize: SanitizeCache) -> Dict[str, Any]:
+    """Incoming payload (sanitized) for 'Use as source pattern'."""
+    severity, firing = _severity_and_firing(rec, analyze, sanitize)
+    return {
+        "ts": rec.iso_ts(),
+        "source": rec.source,
+        "route": rec.route,
+        "request_id": rec.request_id,
+        "payload": sanitize(rec.payload),
+        "alert_severity": severity,
+        "alert_firing": firing,
+    }
+
+
+def failed_row(rec: FeedRecord, analyze: BundleSummaries, sanitize: SanitizeCache) -> Dict[str, Any]:
+    """Failed / paused forward. Per-shard rows (shard set) take firing and bundle text from the shard."""
+    out_san = sanitize(rec.output)
+    out = analyze(out_san)
+    bundle = analyze(rec.payload)
+    if rec.shard is not None:
+        firing = analyze.stored_firing(out_san, rec.shard, rec.shards)
+        preview, detail = analyze(rec.shard).ui()
+    else:
+        firing = bundle.firing or out.status_at(0)
+        preview, detail = bundle.ui()
+    return {
+        "ts": rec.iso_ts(),
+        "request_id": rec.request_id,
+        "source": rec.source,
+        "route": rec.route,
+        "http_status": rec.http_status,
+        "payload_preview": dumps_str(out_san)[:200],
+        "error": rec.error,
+        "alert_severity": bundle.severity or out.severity or None,
+        "alert_firing": firing or None,
+        "alert_bundle_preview": preview or None,
+        "alert_bundle_detail": detail or None,
+    }
+
+
+def sent_row(rec: FeedRecord, analyze: BundleSummaries, sanitize: SanitizeCache) -> Dict[str, Any]:
+    """Successful outbound (one per shard / aggregated group), same shape as the success log line."""
+    out_san = sanitize(rec.output)
+    row = {
+        "ts": rec.iso_ts(),
+        "request_id": rec.request_id,
+        "base_request_id": rec.base_request_id or rec.request_id,
+        "source": rec.source,
+        "route": rec.route,
+        "transformed": out_san,
+        "alert_severity": analyze(out_san).severity or None,
+        "alert_firing": analyze.stored_firing(out_san, rec.shard, rec.shards) or None,
+    }
+    if rec.extra:
+        row.update(rec.extra)
+    return row
+
+
+class _Entry:
+    __slots__ = ("record", "row")
+
+    def __init__(self, record: FeedRecord) -> None:
+        self.record = record
+        self.row: Optional[Dict[str, Any]] = None
+
+
+class RecentFeed:
+    """
+    Bounded feed (newest last) of raw records; rows are formatted on first read and memoized.
+    `on_append` (e.g. a live-stream publisher) receives a zero-arg row builder for each new entry.
+    With `eager`, rows are formatted on append instead and the record lets go of the bodies, for
+    long feeds (Failed) that would otherwise pin a full inbound bundle per entry.
+    """
+
+    def __init__(
+        self,
+        maxlen: int,
+        formatter: RowFormatter,
+        on_append: Optional[Callable[[Callable[[], Dict[str, Any]]], None]] = None,
+        eager: bool = False,
+    ) -> None:
+        self._entries: deque = deque(maxlen=maxlen)
+        self._format = formatter
+        self._on_append = on_append
+        self._eager = eager
+        # Bumped on every change — ETag version of the /api/recent-* endpoint serving this feed.
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def __len__(self) -> int:
+        return len(self._snapshot())
+
+    def __iter__(self) -> Iterator[FeedRecord]:
+        return (e.record for e in self._snapshot())
+
+    def _snapshot(self) -> List[_Entry]:
+        """Current entries, oldest first."""
+        return list(self._entries)
+
+    @property
+    def maxlen(self) -> Optional[int]:
+        return self._entries.maxlen
+
+    def _prepare(
+        self, record: FeedRecord, analyze: Optional[BundleSummaries], sanitize: Optional[SanitizeCache]
+    ) -> None:
+        if self._eager and record.row is None:
+            record.row = self._format(record, analyze or BundleSummaries(), sanitize or SanitizeCache())
+            record.payload = record.shard = record.output = None
+
+    def append(
+        self,
+        record: FeedRecord,
+        analyze: Optional[BundleSummaries] = None,
+        sanitize: Optional[SanitizeCache] = None,
+    ) -> _Entry:
+        """`analyze` / `sanitize`: the request's memos, used when the feed formats on append."""
+        self._prepare(record, analyze, sanitize)
+        entry = _Entry(record)
+        self._entries.append(entry)
+        self._version += 1
+        if self._on_append is not None:
+            self._on_append(partial(self.row, entry))
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._version += 1
+
+    def sync(self) -> None:
+        """Publish entries other workers appended (SharedFeed); nothing to do for a process-local feed."""
+
+    def row(
+        self,
+        entry: _Entry,
+        analyze: Optional[BundleSummaries] = None,
+        sanitize: Optional[SanitizeCache] = None,
+    ) -> Dict[str, Any]:
+        if entry.row is None:
+            entry.row = entry.record.row
+        if entry.row is None:
+            entry.row = self._format(entry.record, analyze or BundleSummaries(), sanitize or SanitizeCache())
+        return entry.row
+
+    def rows(self, newest_first: bool = True) -> List[Dict[str, Any]]:
+        """Formatted rows; one summary / sanitize memo is shared by all rows built in this call."""
+        entries = self._snapshot()
+        if newest_first:
+            entries.reverse()
+        analyze, sanitize = BundleSummaries(), SanitizeCache()
+        return [self.row(e, analyze, sanitize) for e in entries]
+
+
+def _row_record(row: Dict[str, Any]) -> FeedRecord:
+    """Record of a row read back from the shared store (only `row` is set)."""
+    record = FeedRecord.__new__(FeedRecord)
+    for field in FeedRecord.__slots__:
+        setattr(record, field, None)
+    record.row = row
+    return record
+
+
+class SharedFeed(RecentFeed):
+    """
+    RecentFeed kept in the SharedStore (multi-worker mode) so every worker serves the same rows.
+    The store holds each entry's formatted row (JSON), not the record's bodies; the row is built and
+    written on the store's writer thread, off the event loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        store: SharedStore,
+        maxlen: int,
+        formatter: RowFormatter,
+        on_append: Optional[Callable[[Callable[[], Dict[str, Any]]], None]] = None,
+        eager: bool = False,
+    ) -> None:
+        super().__init__(maxlen, formatter, on_append, eager)
+        self.name = name
+        self._store = store
+        self._cache: Dict[int, _Entry] = {}  # seq -> entry, for the rows currently in the feed
+        self._synced: Optional[int] = None  # highest seq handed to on_append by sync()
+
+    @property
+    def version(self) -> int:
+        return self._store.feed_version(self.name)
+
+    def _snapshot(self) -> List[_Entry]:
+        cache: Dict[int, _Entry] = {}
+        for seq, _pid, blob in reversed(self._store.feed_rows(self.name, self.maxlen)):
+            cache[seq] = self._cache.get(seq) or _Entry(_row_record(loads(blob)))
+        self._cache = cache
+        return list(cache.values())
+
+    def append(
+        self,
+        record: FeedRecord,
+        analyze: Optional[BundleSummaries] = None,
+        sanitize: Optional[SanitizeCache] = None,
+    ) -> _Entry:
+        self._prepare(record, analyze, sanitize)
+        entry = _Entry(record)
+        self._store.submit(self._write, entry)
+        if self._on_append is not None:
+            self._on_append(partial(self.row, entry))
+        return entry
+
+    def _write(self, entry: _Entry) -> None:
+        """Writer thread: store the entry's row; the cache keeps a body-free copy."""
+        row = self.row(entry)
+        seq = self._store.feed_append(self.name, dumps(row), self.maxlen)
+        stored = _Entry(_row_record(row))
+        stored.row = row
+        cache = self._cache
+        cache[seq] = stored
+        if len(cache) > 2 * self.maxlen:
+            for old in sorted(list(cache))[: -self.maxlen]:
+                cache.pop(old, None)
+
+    def clear(self) -> None:
+        self._store.feed_clear(self.name)
+        self._cache.clear()
+
+    def sync(self) -> None:
+        """Hand entries appended by other workers since the last call to on_append (live stream)."""
+        if self._synced is None:
+            self._synced = self._store.feed_version(self.name)
+            return
+        rows = self._store.feed_rows(self.name, self.maxlen, after=self._synced)
+        if not rows:
+            return
+        self._synced = rows[0][0]
+        pid = os.getpid()
+        for seq, writer, blob in reversed(rows):
+            if writer == pid or self._on_append is None:
+                continue
+            entry = self._cache.get(seq)
+            if entry is None:
+                entry = self._cache[seq] = _Entry(_row_record(loads(blob)))
+            self._on_append(partial(self.row, entry))
+
+
+def make_feed(
+    name: str,
+    maxlen: int,
+    formatter: RowFormatter,
+    on_append: Optional[Callable[[Callable[[], Dict[str, Any]]], None]] = None,
+    eager: bool = False,
+) -> RecentFeed:
+    """SharedFeed in multi-worker mode, else a process-local RecentFeed."""
+    if SHARED is not None:
+        return SharedFeed(name, SHARED, maxlen, formatter, on_append, eager)
+    return RecentFeed(maxlen, formatter, on_append, eager)
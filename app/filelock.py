@@ -0,0 +1,55 @@
+"""
+Locks for files that every worker writes in multi-worker mode (DLQ, daily counters, success log):
+a thread lock plus fcntl.flock on "<file>.lock". In a single process only the thread lock is taken,
+as before.
+"""
+import os
+import threading
+from typing import Callable, Optional
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: thread lock only
+    fcntl = None
+
+from app.shared import SHARED
+
+
+class FileLock:
+    """Drop-in for threading.Lock around writes of the file named by `path_for()` (not reentrant)."""
+
+    def __init__(self, path_for: Callable[[], str]) -> None:
+        self._path_for = path_for
+        self._thread = threading.Lock()
+        self._fd: Optional[int] = None
+        self._fd_path = ""
+        self._held = False
+
+    def __enter__(self) -> "FileLock":
+        self._thread.acquire()
+        if SHARED is None or fcntl is None:
+            return self
+        try:
+            path = self._path_for()
+            if path:
+                if path != self._fd_path:
+                    if self._fd is not None:
+                        os.close(self._fd)
+                        self._fd = None
+                    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+                    self._fd = os.open(path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+                    self._fd_path = path
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+                self._held = True
+        except BaseException:
+            self._thread.release()
+            raise
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        try:
+            if self._held:
+                self._held = False
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            self._thread.release()
@@ -3,12 +3,14 @@ import os
 import ssl
 import time
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple, Union
+from typing import Any, Callable, Dict, Optional, Tuple, Union
 from urllib.parse import urlparse, urlunparse
 
 import httpx
 
+from app.codec import dumps
 from app.rules import Defaults, RouteConfig
+from app.shared import SHARED
 
 _client: Optional[httpx.AsyncClient] = None
 
@@ -20,6 +22,8 @@ STATUS_PROBE_TIMEOUT = httpx.Timeout(2.5, connect=1.0)
 
 # Circuit breaker: per-route state
 _circuit: Dict[str, Dict[str, Any]] = {}  # route_name -> {failures, last_fail, state}
+# Workers of multi-worker mode share the state (app.shared), so last_fail must be wall-clock time.
+_clock = time.time if SHARED is not None else time.monotonic
 CIRCUIT_FAILURE_THRESHOLD = 5
 CIRCUIT_RESET_SECONDS = 60
 CIRCUIT_STATE_CLOSED = "closed"
@@ -79,34 +83,70 @@ async def close_client() -> None:
         _client = None
 
 
+def _circuit_get(route_name: str) -> Dict[str, Any]:
+    if SHARED is not None:
+        return SHARED.circuit_get(route_name)
+    return _circuit.get(route_name, {})
+
+
+def _circuit_update(route_name: str, change: Callable[[Dict[str, Any]], None]) -> None:
+    """Apply `change` to the route's state; in multi-worker mode atomically in the shared store."""
+    if SHARED is not None:
+        SHARED.circuit_update(route_name, change)
+    else:
+        change(_circuit.setdefault(route_name, {}))
+
+
 def _circuit_allow(route_name: str) -> bool:
     """Check if circuit allows request. Returns False if open."""
-    c = _circuit.get(route_name, {})
+    c = _circuit_get(route_name)
     state = c.get("state", CIRCUIT_STATE_CLOSED)
     if state == CIRCUIT_STATE_CLOSED:
         return True
     if state == CIRCUIT_STATE_OPEN:
         last = c.get("last_fail", 0)
-        if time.monotonic() - last >= CIRCUIT_RESET_SECONDS:
-            _circuit[route_name] = {"failures": 0, "last_fail": last, "state": CIRCUIT_STATE_HALF_OPEN}
+        if _clock() - last >= CIRCUIT_RESET_SECONDS:
+            _circuit_update(route_name, _half_open)
             return True
         return False
     return True  # half_open: allow one try
 
 
+def _half_open(c: Dict[str, Any]) -> None:
+    c["failures"] = 0
+    c["state"] = CIRCUIT_STATE_HALF_OPEN
+
+
+def _closed(c: Dict[str, Any]) -> None:
+    c["failures"] = 0
+    c["state"] = CIRCUIT_STATE_CLOSED
+
+
+def _failed(c: Dict[str, Any]) -> None:
+    c["failures"] = c.get("failures", 0) + 1
+    c["last_fail"] = _clock()
+    if c["failures"] >= CIRCUIT_FAILURE_THRESHOLD:
+        c["state"] = CIRCUIT_STATE_OPEN
+    elif c.get("state") == CIRCUIT_STATE_HALF_OPEN:
+        c["state"] = CIRCUIT_STATE_OPEN
+
+
 def _circuit_record(route_name: str, success: bool) -> None:
     """Record success/failure for circuit breaker."""
-    c = _circuit.setdefault(route_name, {"failures": 0, "last_fail": 0, "state": CIRCUIT_STATE_CLOSED})
-    if success:
-        c["failures"] = 0
-        c["state"] = CIRCUIT_STATE_CLOSED
-    else:
-        c["failures"] = c.get("failures", 0) + 1
-        c["last_fail"] = time.monotonic()
-        if c["failures"] >= CIRCUIT_FAILURE_THRESHOLD:
-            c["state"] = CIRCUIT_STATE_OPEN
-        elif c.get("state") == CIRCUIT_STATE_HALF_OPEN:
-            c["state"] = CIRCUIT_STATE_OPEN
+    if not success:
+        _circuit_update(route_name, _failed)
+        return
+    c = _circuit_get(route_name)
+    # Already closed with no failures: skip the write (the common case on the forward path).
+    if c.get("failures", 0) or c.get("state", CIRCUIT_STATE_CLOSED) != CIRCUIT_STATE_CLOSED:
+        _circuit_update(route_name, _closed)
+
+
+async def _circuit_io(fn: Callable[..., Any], *args: Any) -> Any:
+    """Circuit check / record; in multi-worker mode on a thread, as the shared store may wait on a lock."""
+    if SHARED is not None:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
 
 
 async def forward_payload(
@@ -131,7 +171,7 @@ async def forward_payload(
             "retried": False,
         }
 
-    if not _circuit_allow(route.name):
+    if not await _circuit_io(_circuit_allow, route.name):
         return False, None, ValueError("Circuit breaker open (target degraded)"), {
             "attempts_used": 0,
             "max_attempts": len(BACKOFF_SCHEDULE),
@@ -164,6 +204,8 @@ async def forward_payload(
         connect=defaults.target_timeout_connect_sec,
     )
 
+    # Serialized once for every attempt.
+    body = dumps(payload)
     verify: Union[bool, ssl.SSLContext] = _build_verify(route)
     client, should_close = _client_for_verify(verify)
     last_error: Optional[Exception] = None
@@ -174,7 +216,7 @@ async def forward_payload(
             try:
                 response = await client.post(
                     url,
-                    json=payload,
+                    content=body,
                     headers=headers,
                     timeout=timeout,
                 )
@@ -184,14 +226,14 @@ async def forward_payload(
                     )
                     if attempt < len(BACKOFF_SCHEDULE):
                         continue
-                    _circuit_record(route.name, False)
+                    await _circuit_io(_circuit_record, route.name, False)
                     return False, response.status_code, last_error, {
                         "attempts_used": attempt,
                         "max_attempts": len(BACKOFF_SCHEDULE),
                         "circuit_open": False,
                         "retried": attempt > 1,
                     }
-                _circuit_record(route.name, True)
+                await _circuit_io(_circuit_record, route.name, True)
                 return response.is_success, response.status_code, None, {
                     "attempts_used": attempt,
                     "max_attempts": len(BACKOFF_SCHEDULE),
@@ -204,7 +246,7 @@ async def forward_payload(
                 last_error = exc
                 if attempt < len(BACKOFF_SCHEDULE):
                     continue
-                _circuit_record(route.name, False)
+                await _circuit_io(_circuit_record, route.name, False)
                 return False, None, last_error, {
                     "attempts_used": attempt,
                     "max_attempts": len(BACKOFF_SCHEDULE),
@@ -212,7 +254,7 @@ async def forward_payload(
                     "retried": attempt > 1,
                 }
             except Exception as exc:
-                _circuit_record(route.name, False)
+                await _circuit_io(_circuit_record, route.name, False)
                 return False, None, exc, {
                     "attempts_used": attempt,
                     "max_attempts": len(BACKOFF_SCHEDULE),
@@ -220,7 +262,7 @@ async def forward_payload(
                     "retried": attempt > 1,
                 }
 
-        _circuit_record(route.name, False)
+        await _circuit_io(_circuit_record, route.name, False)
         return False, None, last_error, {
             "attempts_used": len(BACKOFF_SCHEDULE),
             "max_attempts": len(BACKOFF_SCHEDULE),
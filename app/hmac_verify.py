@@ -2,13 +2,15 @@
 import hmac
 import hashlib
 import os
-from typing import Optional
+from typing import Optional, Union
 
 from app.rules import RouteConfig, VerifyHmac
 
+_DIGESTS = {"sha256": hashlib.sha256, "sha1": hashlib.sha1}
+
 
 def verify_hmac(
-    raw_body: bytes,
+    raw_body: Union[bytes, bytearray, memoryview],
     header_value: Optional[str],
     route: RouteConfig,
 ) -> tuple[bool, Optional[str]]:
@@ -29,8 +31,32 @@ def verify_hmac(
     return True, None
 
 
+def hmac_for_route(route: RouteConfig) -> tuple[Optional["hmac.HMAC"], Optional[str]]:
+    """
+    Incremental HMAC for a body read in chunks (update() each chunk, then verify_hmac_digest).
+    Returns (mac, None), (None, None) if route has no verify_hmac, or (None, error_message).
+    """
+    cfg: Optional[VerifyHmac] = getattr(route, "verify_hmac", None)
+    if not cfg:
+        return None, None
+    secret = os.getenv(cfg.secret_env)
+    if not secret:
+        return None, f"Missing env {cfg.secret_env} for HMAC"
+    digestmod = _DIGESTS.get(cfg.algorithm.lower().replace("-", ""))
+    if digestmod is None:
+        return None, "HMAC signature invalid"
+    return hmac.new(secret.encode("utf-8"), digestmod=digestmod), None
+
+
+def verify_hmac_digest(mac: "hmac.HMAC", header_value: Optional[str]) -> tuple[bool, Optional[str]]:
+    """Finish a hmac_for_route() digest and compare it with the header (same rules as verify_hmac)."""
+    if not header_value or not _header_matches(mac.hexdigest(), header_value, header_prefix=True):
+        return False, "HMAC signature invalid"
+    return True, None
+
+
 def _verify_digest(
-    raw_body: bytes,
+    raw_body: Union[bytes, bytearray, memoryview],
     header_value: Optional[str],
     secret: str,
     algorithm: str = "sha256",
@@ -39,15 +65,15 @@ def _verify_digest(
     """Compare body digest with header using timing-safe comparison."""
     if not header_value or not secret:
         return False
-    algo = algorithm.lower().replace("-", "")
-    if algo == "sha256":
-        digest = hmac.new(secret.encode("utf-8"), raw_body, hashlib.sha256).hexdigest()
-    elif algo == "sha1":
-        digest = hmac.new(secret.encode("utf-8"), raw_body, hashlib.sha1).hexdigest()
-    else:
+    digestmod = _DIGESTS.get(algorithm.lower().replace("-", ""))
+    if digestmod is None:
         return False
+    digest = hmac.new(secret.encode("utf-8"), raw_body, digestmod).hexdigest()
+    return _header_matches(digest, header_value, header_prefix)
+
 
-    expected = digest
+def _header_matches(expected: str, header_value: str, header_prefix: bool) -> bool:
+    """Timing-safe compare of a hex digest with the header value ("sha256=<hex>" when header_prefix)."""
     if header_prefix and "=" in header_value:
         parts = header_value.split("=", 1)
         if len(parts) == 2:
@@ -0,0 +1,61 @@
+"""Newest-first paging over append-only JSONL files (DLQ, success log) with byte-offset cursors."""
+import json
+import os
+from typing import Any, Callable, ContextManager, Dict, List, Optional, Tuple
+
+# Files are walked backwards in fixed-size blocks, so memory stays bounded by the page, not the file.
+READ_BLOCK_BYTES = 64 * 1024
+MAX_PAGE_ROWS = 500
+
+
+def read_jsonl_page(
+    path: str,
+    lock: ContextManager[Any],
+    cursor: Optional[int] = None,
+    limit: int = 50,
+    skip: Optional[Callable[[Dict[str, Any]], bool]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    Return (rows, next_cursor): up to `limit` rows ending before byte offset `cursor` (newest first;
+    None = end of file). next_cursor is the offset of the oldest returned row, or None at the start
+    of the file. Undecodable lines and rows for which `skip` returns True are passed over.
+    Raises OSError when the file cannot be read.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_ROWS))
+    out: List[Dict[str, Any]] = []
+    with open(path, "rb") as handle:
+        # Writers append whole lines under `lock`; sizing under it keeps the first page on a line boundary.
+        with lock:
+            size = os.fstat(handle.fileno()).st_size
+        pos = size if cursor is None else max(0, min(int(cursor), size))
+        carry = b""
+        while pos > 0:
+            start = max(0, pos - READ_BLOCK_BYTES)
+            handle.seek(start)
+            lines = (handle.read(pos - start) + carry).split(b"\n")
+            pos = start
+            if start > 0:
+                # First piece may continue in the previous block; finish it on the next pass.
+                carry = lines.pop(0)
+                line_start = start + len(carry) + 1
+            else:
+                carry = b""
+                line_start = 0
+            offsets: List[int] = []
+            for raw in lines:
+                offsets.append(line_start)
+                line_start += len(raw) + 1
+            for offset, raw in zip(reversed(offsets), reversed(lines)):
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line.decode("utf-8"))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+                if not isinstance(obj, dict) or (skip is not None and skip(obj)):
+                    continue
+                out.append(obj)
+                if len(out) >= limit:
+                    return out, (offset or None)
+    return out, None
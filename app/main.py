@@ -2,23 +2,21 @@ import asyncio
 import copy
 import json
 import logging
-import re
 import os
 import time
 import uuid
-from collections import deque
 from datetime import datetime, timedelta, timezone
 
 # Bangkok (GMT+7) for all displayed timestamps
 BANGKOK = timezone(timedelta(hours=7))
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import yaml
 from fastapi import Depends, FastAPI, HTTPException, Request, Response
-from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST
 
 from app.config import (
     CONFIG_WATCH_INTERVAL,
@@ -26,23 +24,77 @@ from app.config import (
     persist_rules,
     reload_rules,
     rules_loaded,
+    publish_rules,
+    rules_version,
     set_rules,
     enforce_ocp_inbound_only,
+    enforce_single_worker_options,
+    sync_shared_rules,
     watch_and_reload,
 )
-from app.daily_metrics import daily_metrics_file_path, increment_daily, read_daily
-from app.dlq import dlq_file_path, purge_dlq_all, purge_dlq_by_ids, read_recent_dlq, record_failed_forward
-from app.success_log import read_recent_success, record_success_forward, success_log_enabled, success_log_file_path
+from app.admission import ADMISSION, Ticket, admission, busy
+from app.aggregate import AGGREGATOR, AlertGroup, combine_group
+from app.alert_bundle import (
+    SEVERITY_RANK_CRITICAL,
+    AlertBundleSummary,
+    BundleSummaries,
+    extract_alert_summary,
+    extract_shard_firing_status,
+)
+from app.alert_state import (
+    ALERT_STATE_SNAPSHOT_SEC,
+    active_alerts,
+    alert_state_file_path,
+    load_alert_state,
+    mark_forwarded,
+    observe_alerts,
+    snapshot_alert_state,
+)
+from app.dedup import dedup_admit, dedup_rollback
+from app.codec import FastJSONResponse, dumps_str, loads as json_loads
+from app.compression import compressed
+from app.etag import conditional_json
+from app.events import BUS, STREAM_KEEPALIVE_SEC, STREAM_STATS_SEC, publisher, stats_delta
+from app.feed import FeedRecord, failed_row, make_feed, payload_row, sent_row, webhook_row
+from app.daily_metrics import daily_metrics_file_path, daily_metrics_signature, increment_daily, read_daily
+from app.dlq import (
+    DLQ_SEARCH_GROUP_FIELDS,
+    StaleCursorError,
+    dlq_file_path,
+    dlq_fingerprint,
+    purge_dlq_all,
+    purge_dlq_by_ids,
+    read_dlq_page,
+    record_failed_forward,
+    search_dlq,
+)
+from app.success_log import (
+    read_recent_success,
+    read_success_page,
+    record_success_forward,
+    success_log_enabled,
+    success_log_file_path,
+)
 from app.forwarder import check_target_status, close_client, forward_payload, get_client
 from app.logging_conf import configure_logging
-from app.hmac_verify import verify_hmac as verify_hmac_signature
+from app.middleware import RequestContextMiddleware
+from app.shared import SHARED, SHARED_SYNC_SEC
+from app.batch import BATCH_MAX_BYTES, BATCH_MAX_ITEMS, BatchFormatError, BatchParser
+from app.hmac_verify import hmac_for_route, verify_hmac as verify_hmac_signature, verify_hmac_digest
 from app.metrics import (
     CONFIG_RELOAD_TOTAL,
     FORWARD_LATENCY_SECONDS,
     FORWARD_TOTAL,
     HMAC_VERIFY_TOTAL,
     REQUESTS_TOTAL,
+    UNROUTED_ALERTS_TOTAL,
+    WEBHOOK_BATCH_ITEMS,
+    WEBHOOK_BATCH_SECONDS,
+    StageTimer,
+    bump_stats_version,
     get_request_stats,
+    render_metrics,
+    stats_version,
 )
 from app.basic_auth import require_basic_auth
 from app.api_key import (
@@ -59,7 +111,16 @@ from app.patterns import (
     save_pattern as save_pattern_data,
     delete_pattern as delete_pattern_data,
 )
-from app.rules import ApiKeyConfig, Defaults, RuleSet, sanitize_payload, select_route, transform_payload
+from app.rules import (
+    ApiKeyConfig,
+    Defaults,
+    RouteConfig,
+    RuleSet,
+    SanitizeCache,
+    select_route,
+    transform_many,
+    unroll_alert_bundle,
+)
 
 
 configure_logging()
@@ -69,6 +130,7 @@ app = FastAPI(
     title="AlertBridge",
     version=APP_VERSION,
     description="Stateless webhook relay and transformer. Author: Sontas Jiamsripong",
+    default_response_class=FastJSONResponse,
 )
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -78,16 +140,19 @@ TEMPLATE_FILE = BASE_DIR / "templates" / "index.html"
 MAX_WEBHOOK_BODY_BYTES = 1 * 1024 * 1024   # 1 MiB
 MAX_CONFIG_BODY_BYTES = 512 * 1024         # 512 KiB
 
-# In-memory recent webhook events for UI live feed (newest last in deque)
-RECENT_WEBHOOKS: deque = deque(maxlen=20)
-# Recent incoming payloads (sanitized) so UI can "Use as source pattern" from real traffic
-RECENT_PAYLOADS: deque = deque(maxlen=30)
-# Failed forward events (limited, stateless - lost on restart)
-RECENT_FAILED: deque = deque(maxlen=200)
+# In-memory recent webhook events for UI live feed (newest last). Feeds hold raw FeedRecords;
+# rows are formatted / sanitized when /api/recent-* reads them (see app.feed). In multi-worker mode
+# the records live in the shared store so every worker serves the same rows.
+RECENT_WEBHOOKS = make_feed("requests", 20, webhook_row, publisher("requests"))
+# Recent incoming payloads (sanitized on read) so UI can "Use as source pattern" from real traffic
+RECENT_PAYLOADS = make_feed("payloads", 30, payload_row, publisher("payloads"))
+# Failed forward events (limited, stateless - lost on restart). Formatted on append so the 200 rows do
+# not hold inbound bundles / outputs during a failure storm.
+RECENT_FAILED = make_feed("failed", 200, failed_row, publisher("failed"), eager=True)
 # Successfully forwarded (transformed) payloads — one entry per outbound success (unroll = multiple per webhook)
 RECENT_SENT_MAX = 50
 RECENT_SENT_API_LIMIT = 50
-RECENT_SENT: deque = deque(maxlen=RECENT_SENT_MAX)
+RECENT_SENT = make_feed("sent", RECENT_SENT_MAX, sent_row, publisher("sent"))
 
 app.mount("/static", StaticFiles(directory=BASE_DIR / "static"), name="static")
 
@@ -98,360 +163,211 @@ async def favicon() -> FileResponse:
     return FileResponse(BASE_DIR / "static" / "favicon.svg", media_type="image/svg+xml")
 
 
-def extract_alert_summary(payload: Any) -> str:
-    """Extract alert name/summary from Alertmanager-shaped or flat JSON on /webhook/ocp."""
-    if not payload or not isinstance(payload, dict):
-        return ""
-    # Flat JSON (no alerts[]): description, alertId, severity, etc.
-    for k in ("description", "alertId", "severity"):
-        v = payload.get(k)
-        if v and isinstance(v, str):
-            return v[:100]
-    # OCP Alertmanager: alerts[0].labels.alertname, annotations.summary, annotations.description
-    alerts = payload.get("alerts")
-    if isinstance(alerts, list) and alerts and isinstance(alerts[0], dict):
-        a = alerts[0]
-        labels = (a.get("labels") or {})
-        ann = (a.get("annotations") or {})
-        for key in ("alertname", "summary", "description"):
-            v = labels.get(key) or ann.get(key)
-            if v and isinstance(v, str):
-                return v[:100]
-    # Single alert (no alerts array)
-    labels = payload.get("labels") or {}
-    ann = payload.get("annotations") or {}
-    for key in ("alertname", "summary", "description"):
-        v = labels.get(key) or ann.get(key)
-        if v and isinstance(v, str):
-            return v[:100]
-    return ""
-
-
-def extract_bundle_alert_names(payload: Any) -> List[str]:
-    """Ordered human-readable name per alerts[] entry (alertname, else annotation snippet)."""
-    if not payload or not isinstance(payload, dict):
-        return []
-    alerts = payload.get("alerts")
-    if not isinstance(alerts, list) or not alerts:
-        return []
-    out: List[str] = []
-    for i, a in enumerate(alerts):
-        if not isinstance(a, dict):
-            out.append(f"(invalid #{i})")
-            continue
-        labels = a.get("labels") if isinstance(a.get("labels"), dict) else {}
-        name = labels.get("alertname") if isinstance(labels, dict) else None
-        if isinstance(name, str) and name.strip():
-            out.append(name.strip()[:200])
-            continue
-        ann = a.get("annotations") if isinstance(a.get("annotations"), dict) else {}
-        if isinstance(ann, dict):
-            s = ann.get("summary") or ann.get("description")
-            if isinstance(s, str) and s.strip():
-                out.append(s.strip()[:120])
-                continue
-        out.append(f"(alert #{i})")
-    return out
+_config_watch_task: Optional[asyncio.Task] = None
 
 
-def _per_alert_status_suffix(alert: Any) -> str:
-    if not isinstance(alert, dict):
-        return ""
-    st = alert.get("status")
-    if isinstance(st, str):
-        lv = st.strip().lower()
-        if lv in ("firing", "resolved"):
-            return lv
-    return ""
+async def _config_watch_loop() -> None:
+    """Background task: poll rules file mtime and auto-reload when changed."""
+    while CONFIG_WATCH_INTERVAL > 0:
+        await asyncio.sleep(CONFIG_WATCH_INTERVAL)
+        try:
+            watch_and_reload()
+        except Exception as exc:
+            logger.warning("Config watch loop error: %s", exc)
 
 
-def format_alert_bundle_for_ui(payload: Any) -> Tuple[str, str]:
-    """
-    One-line preview + newline-separated detail ([0] name …) for Live/Failed rows.
-    When the bundle is mixed (some firing, some resolved), each detail line includes
-    that alert's status so the tooltip is unambiguous. Falls back to extract_alert_summary
-    when no alerts[] (e.g. flat JSON).
-    """
-    names = extract_bundle_alert_names(payload)
-    if names:
-        alerts_list = payload.get("alerts") if isinstance(payload, dict) else None
-        mixed_bundle = extract_bundle_firing_status(payload) == "mixed"
-        detail_lines: List[str] = []
-        for i, n in enumerate(names):
-            line = f"[{i}] {n}"
-            if mixed_bundle and isinstance(alerts_list, list) and i < len(alerts_list):
-                suf = _per_alert_status_suffix(alerts_list[i])
-                if suf:
-                    line = f"{line} — {suf}"
-            detail_lines.append(line)
-        detail = "\n".join(detail_lines)
-        if len(names) <= 6:
-            preview_parts: List[str] = []
-            for i, n in enumerate(names):
-                if mixed_bundle and isinstance(alerts_list, list) and i < len(alerts_list):
-                    suf = _per_alert_status_suffix(alerts_list[i])
-                    preview_parts.append(f"[{i}] {n} ({suf})" if suf else f"[{i}] {n}")
-                else:
-                    preview_parts.append(f"[{i}] {n}")
-            preview = " · ".join(preview_parts)
-        else:
-            if mixed_bundle and isinstance(alerts_list, list):
-                prev_chunks = []
-                for i in range(min(6, len(names))):
-                    n = names[i]
-                    suf = _per_alert_status_suffix(alerts_list[i]) if i < len(alerts_list) else ""
-                    prev_chunks.append(f"[{i}] {n} ({suf})" if suf else f"[{i}] {n}")
-                preview = " · ".join(prev_chunks) + f" (+{len(names) - 6} more)"
-            else:
-                preview = " · ".join(f"[{i}] {n}" for i, n in enumerate(names[:6])) + f" (+{len(names) - 6} more)"
-        if len(preview) > 220:
-            preview = preview[:217] + "…"
-        return (preview, detail)
-    single = extract_alert_summary(payload)
-    if single:
-        return (single[:120] + ("…" if len(single) > 120 else ""), single)
-    return ("", "")
-
-
-def _severity_rank_value(label: str) -> int:
-    """Higher = more severe; used to pick one label when a webhook bundles several alerts."""
-    t = (label or "").strip().lower()
-    if not t:
-        return -1
-    if re.search(r"\b(disaster|emergency|fatal|critical)\b", t):
-        return 100
-    if re.search(r"\b(error|major|high)\b", t):
-        return 80
-    if re.search(r"\b(warning|warn)\b", t):
-        return 60
-    if re.search(r"\binfo(rmation)?\b", t):
-        return 40
-    if re.search(r"\b(page|none|normal|low)\b", t):
-        return 20
-    return 5
-
-
-def _worst_severity_from_alerts_list(alerts: list[Any]) -> str:
-    """Return the most severe non-empty alerts[].labels.severity string, or ""."""
-    best_raw = ""
-    best_rank = -1
-    for a in alerts:
-        if not isinstance(a, dict):
-            continue
-        labels = a.get("labels") or {}
-        if not isinstance(labels, dict):
-            continue
-        sv = labels.get("severity")
-        if not sv or not isinstance(sv, str):
-            continue
-        raw = sv.strip()
-        if not raw:
-            continue
-        r = _severity_rank_value(raw)
-        if r > best_rank:
-            best_rank = r
-            best_raw = raw
-    return best_raw
+_alert_state_task: Optional[asyncio.Task] = None
+_stream_stats_task: Optional[asyncio.Task] = None
+_shared_sync_task: Optional[asyncio.Task] = None
+_aggregate_task: Optional[asyncio.Task] = None
+_aggregate_forwards: "set[asyncio.Task]" = set()
+AGGREGATE_TICK_SEC = int(os.getenv("ALERTBRIDGE_AGGREGATE_TICK_MS", "250")) / 1000
 
 
-def extract_alert_severity(payload: Any) -> str:
+async def _file_io(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
     """
-    Extract severity/risk level from Alertmanager-shaped payloads, flat JSON, or transformed output.
-    When alerts[] is present, prefers the worst severity among all alert labels (group
-    commonLabels often disagrees with per-alert labels). Otherwise checks top-level
-    severity, commonLabels, groupLabels, and top-level labels.
+    DLQ / success-log / daily-counter access; in multi-worker mode on a thread, as its flock may wait
+    on another worker's write or DLQ compaction.
     """
-    if not payload or not isinstance(payload, dict):
-        return ""
-    alerts = payload.get("alerts")
-    if isinstance(alerts, list) and alerts:
-        worst = _worst_severity_from_alerts_list(alerts)
-        if worst:
-            return worst[:40]
-    v = payload.get("severity")
-    if v is not None and not isinstance(v, (dict, list)):
-        s = str(v).strip()
-        if s:
-            return s[:40]
-    for group_key in ("commonLabels", "groupLabels"):
-        grp = payload.get(group_key)
-        if isinstance(grp, dict):
-            sv = grp.get("severity")
-            if sv and isinstance(sv, str):
-                return sv.strip()[:40]
-    labels = payload.get("labels")
-    if isinstance(labels, dict):
-        sv = labels.get("severity")
-        if sv and isinstance(sv, str):
-            return sv.strip()[:40]
-    return ""
-
-
-def extract_bundle_firing_status(payload: Any) -> str:
-    """
-    Aggregate Alertmanager alerts[].status for the webhook row: firing | resolved | mixed | ''.
-    """
-    if not payload or not isinstance(payload, dict):
-        return ""
-    alerts = payload.get("alerts")
-    if isinstance(alerts, list) and alerts:
-        states: set[str] = set()
-        for a in alerts:
-            if not isinstance(a, dict):
-                continue
-            st = a.get("status")
-            if isinstance(st, str):
-                lv = st.strip().lower()
-                if lv in ("firing", "resolved"):
-                    states.add(lv)
-        if not states:
-            return ""
-        if states == {"firing"}:
-            return "firing"
-        if states == {"resolved"}:
-            return "resolved"
-        return "mixed"
-    st = payload.get("status")
-    if isinstance(st, str):
-        lv = st.strip().lower()
-        if lv in ("firing", "resolved"):
-            return lv
-    return ""
-
-
-def extract_shard_firing_status(sanitized: Any) -> str:
-    """Single transformed shard: alerts[0].status (firing | resolved)."""
-    if not sanitized or not isinstance(sanitized, dict):
-        return ""
-    alerts = sanitized.get("alerts")
-    if isinstance(alerts, list) and alerts and isinstance(alerts[0], dict):
-        st = alerts[0].get("status")
-        if isinstance(st, str):
-            lv = st.strip().lower()
-            if lv in ("firing", "resolved"):
-                return lv
-    return ""
-
-
-def extract_inbound_alert_status_by_index(payload: Any, index: int) -> str:
-    """Alertmanager alerts[i].status on the inbound webhook (before transform drops fields)."""
-    if not payload or not isinstance(payload, dict):
-        return ""
-    alerts = payload.get("alerts")
-    if not isinstance(alerts, list) or index < 0 or index >= len(alerts):
-        return ""
-    a = alerts[index]
-    if not isinstance(a, dict):
-        return ""
-    st = a.get("status")
-    if isinstance(st, str):
-        lv = st.strip().lower()
-        if lv in ("firing", "resolved"):
-            return lv
-    return ""
-
-
-def resolve_stored_alert_firing(
-    sanitized_output: Any,
-    inbound_payload: Any,
-    shard_index: int,
-    total_shards: int,
-) -> str:
+    if SHARED is not None:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
+
+
+async def _forward_alert_group(group: AlertGroup) -> None:
     """
-    Firing/resolved for DLQ / RECENT_SENT when the transformed body may omit alerts[].status
-    (e.g. output_template). Prefer sanitized output; then inbound shard i when unroll; else bundle aggregate.
+    Forward one aggregated group; success log / DLQ rows, Failed feed and daily counters as for a
+    webhook forward (the daily ones once per webhook that contributed to the group).
     """
-    s = extract_shard_firing_status(sanitized_output)
-    if s:
-        return s
-    if total_shards > 1:
-        return extract_inbound_alert_status_by_index(inbound_payload, shard_index)
-    return extract_bundle_firing_status(inbound_payload)
+    route = group.route
+    request_id = f"agg-{uuid.uuid4().hex[:12]}"
+    webhooks = max(1, len(group.request_ids))
+    try:
+        payload = combine_group(group)
+        start = time.monotonic()
+        ok, status_code, err, attempt_meta = await forward_payload(payload, route, request_id, get_rules().defaults)
+        FORWARD_LATENCY_SECONDS.labels(route=route.name).observe(time.monotonic() - start)
+        FORWARD_TOTAL.labels(route=route.name, result="success" if ok else "fail").inc()
+        bump_stats_version()
+        if ok:
+            entry = RECENT_SENT.append(
+                FeedRecord(
+                    request_id,
+                    route.match.source,
+                    route.name,
+                    output=payload,
+                    forwarded=True,
+                    extra={"aggregated_count": len(group.items)},
+                )
+            )
+            if success_log_enabled() and success_log_file_path():
+                await _file_io(record_success_forward, RECENT_SENT.row(entry))
+            await _file_io(increment_daily, "forward_success", webhooks)
+            return
+        sanitize = SanitizeCache()
+        out_san = sanitize(payload)
+        summary = AlertBundleSummary(out_san)
+        row = {
+            "ts": datetime.now(BANGKOK).isoformat(timespec="milliseconds"),
+            "request_id": request_id,
+            "base_request_id": request_id,
+            "source": route.match.source,
+            "route": route.name,
+            "transformed": out_san,
+            "alert_severity": summary.severity or None,
+            "alert_firing": summary.status_at(0) or None,
+            "aggregated_count": len(group.items),
+        }
+        row.update(
+            {
+                "http_status": status_code,
+                "error": str(err) if err else None,
+                "error_type": type(err).__name__ if err else None,
+                "attempts_used": int(attempt_meta.get("attempts_used", 0)),
+                "max_attempts": int(attempt_meta.get("max_attempts", 0)),
+                "final_failure": True,
+            }
+        )
+        await _file_io(record_failed_forward, row, aggregate=route.dlq_aggregate)
+        await _file_io(increment_daily, "forward_fail", webhooks)
+        await _file_io(increment_daily, "dlq", webhooks)
+        RECENT_FAILED.append(
+            FeedRecord(
+                request_id,
+                route.match.source,
+                route.name,
+                output=payload,
+                http_status=status_code,
+                error=str(err) if err else None,
+            ),
+            BundleSummaries(),
+            sanitize,
+        )
+        logger.error(
+            "forward_failed",
+            extra={"request_id": request_id, "route": route.name, "forward_result": "fail", "error_status": status_code},
+        )
+    except Exception as exc:
+        logger.warning("Aggregated forward error route=%s: %s", route.name, exc)
 
 
-_config_watch_task: Optional[asyncio.Task] = None
+def _spawn_group_forward(group: AlertGroup) -> None:
+    task = asyncio.create_task(_forward_alert_group(group))
+    _aggregate_forwards.add(task)
+    task.add_done_callback(_aggregate_forwards.discard)
 
 
-async def _config_watch_loop() -> None:
-    """Background task: poll rules file mtime and auto-reload when changed."""
-    while CONFIG_WATCH_INTERVAL > 0:
-        await asyncio.sleep(CONFIG_WATCH_INTERVAL)
+async def _aggregate_flush_loop() -> None:
+    """Background task: forward aggregation groups whose group_wait_ms elapsed."""
+    while True:
+        await asyncio.sleep(AGGREGATE_TICK_SEC)
+        for group in AGGREGATOR.due():
+            _spawn_group_forward(group)
+
+
+async def _alert_state_snapshot_loop() -> None:
+    """Background task: write the alert state table to the PVC when it changed."""
+    while True:
+        await asyncio.sleep(ALERT_STATE_SNAPSHOT_SEC)
         try:
-            watch_and_reload()
+            await asyncio.to_thread(snapshot_alert_state)
         except Exception as exc:
-            logger.warning("Config watch loop error: %s", exc)
+            logger.warning("Alert state snapshot loop error: %s", exc)
+
+
+async def _stream_stats_loop() -> None:
+    """Background task: publish changed /api/stats fields to live-stream subscribers (every tick, may be {})."""
+    previous: Optional[dict] = None
+    while True:
+        await asyncio.sleep(STREAM_STATS_SEC)
+        if not len(BUS):
+            previous = None
+            continue
+        current = get_request_stats()
+        BUS.publish("stats", stats_delta(previous, current))
+        previous = current
+
+
+async def _shared_sync_loop() -> None:
+    """Multi-worker mode: apply rules other workers published and stream the feed rows they append."""
+    while True:
+        await asyncio.sleep(SHARED_SYNC_SEC)
+        try:
+            if sync_shared_rules():
+                invalidate_target_status_cache()
+                logger.info("Config sync: applied rules published by another worker")
+            for feed in (RECENT_WEBHOOKS, RECENT_PAYLOADS, RECENT_FAILED, RECENT_SENT):
+                feed.sync()
+        except Exception as exc:
+            logger.warning("Shared state sync error: %s", exc)
 
 
 @app.on_event("startup")
 async def startup() -> None:
-    global _config_watch_task
+    global _config_watch_task, _alert_state_task, _aggregate_task, _stream_stats_task, _shared_sync_task
     get_client()
     reload_rules()
+    _aggregate_task = asyncio.create_task(_aggregate_flush_loop())
+    _stream_stats_task = asyncio.create_task(_stream_stats_loop())
+    if SHARED is not None:
+        # Rules applied by workers that started earlier win over the file just loaded.
+        sync_shared_rules()
+        _shared_sync_task = asyncio.create_task(_shared_sync_loop())
     if CONFIG_WATCH_INTERVAL > 0:
         _config_watch_task = asyncio.create_task(_config_watch_loop())
+    if alert_state_file_path():
+        restored = load_alert_state()
+        if restored:
+            logger.info("Alert state restored: %d alert(s)", restored)
+        if ALERT_STATE_SNAPSHOT_SEC > 0:
+            _alert_state_task = asyncio.create_task(_alert_state_snapshot_loop())
 
 
 @app.on_event("shutdown")
 async def shutdown() -> None:
-    global _config_watch_task
+    global _config_watch_task, _alert_state_task, _aggregate_task, _stream_stats_task, _shared_sync_task
     if _config_watch_task and not _config_watch_task.done():
         _config_watch_task.cancel()
+    if _stream_stats_task and not _stream_stats_task.done():
+        _stream_stats_task.cancel()
+    if _shared_sync_task and not _shared_sync_task.done():
+        _shared_sync_task.cancel()
+    if _aggregate_task and not _aggregate_task.done():
+        _aggregate_task.cancel()
+    # Buffered groups are forwarded now rather than lost with the process.
+    for group in AGGREGATOR.drain():
+        _spawn_group_forward(group)
+    if _aggregate_forwards:
+        await asyncio.gather(*list(_aggregate_forwards), return_exceptions=True)
+    if _alert_state_task and not _alert_state_task.done():
+        _alert_state_task.cancel()
+    await asyncio.to_thread(snapshot_alert_state)
+    if SHARED is not None:
+        await asyncio.to_thread(SHARED.flush)
     await close_client()
 
 
-@app.middleware("http")
-async def security_headers_middleware(request: Request, call_next) -> Response:
-    response: Response = await call_next(request)
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["Content-Security-Policy"] = (
-        "default-src 'self'; script-src 'self'; "
-        "style-src 'self' 'unsafe-inline'; font-src 'self'; connect-src 'self'"
-    )
-    return response
-
-
-@app.middleware("http")
-async def request_logging_middleware(request: Request, call_next) -> Response:
-    request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
-    request.state.request_id = request_id
-    request.state.source = None
-    request.state.route_name = None
-    request.state.forward_result = None
-
-    start_time = time.monotonic()
-    try:
-        response: Response = await call_next(request)
-        response.headers["X-Request-ID"] = request_id
-    except Exception:
-        duration_ms = round((time.monotonic() - start_time) * 1000, 2)
-        logger.exception(
-            "request_failed",
-            extra={
-                "request_id": request_id,
-                "source": getattr(request.state, "source", None),
-                "route": getattr(request.state, "route_name", None),
-                "forward_result": getattr(request.state, "forward_result", None),
-                "http_status": 500,
-                "duration_ms": duration_ms,
-            },
-        )
-        raise
-
-    duration_ms = round((time.monotonic() - start_time) * 1000, 2)
-    logger.info(
-        "request",
-        extra={
-            "request_id": request_id,
-            "source": getattr(request.state, "source", None),
-            "route": getattr(request.state, "route_name", None),
-            "forward_result": getattr(request.state, "forward_result", None),
-            "http_status": response.status_code,
-            "duration_ms": duration_ms,
-        },
-    )
-    return response
+app.add_middleware(RequestContextMiddleware)
 
 
 @app.get("/")
@@ -467,8 +383,11 @@ async def get_config(
     rules = get_rules()
     accept = request.headers.get("accept", "")
     if "text/yaml" in accept:
-        return PlainTextResponse(yaml.safe_dump(rules.model_dump(), sort_keys=False))
-    return JSONResponse(rules.model_dump())
+        return await compressed(request, PlainTextResponse(yaml.safe_dump(rules.model_dump(), sort_keys=False)))
+    return await compressed(
+        request,
+        conditional_json(request, "config", rules_version(), rules.model_dump, headers={"Vary": "Accept"}),
+    )
 
 
 @app.put("/api/config")
@@ -482,7 +401,7 @@ async def put_config(
     content_type = request.headers.get("content-type", "")
     try:
         if "application/json" in content_type:
-            data = json.loads(raw_body.decode("utf-8"))
+            data = json_loads(raw_body)
         else:
             data = yaml.safe_load(raw_body.decode("utf-8"))
         rules = RuleSet.model_validate(data)
@@ -491,6 +410,10 @@ async def put_config(
         raise HTTPException(status_code=400, detail="Invalid config format") from exc
 
     rules = enforce_ocp_inbound_only(rules)
+    try:
+        enforce_single_worker_options(rules)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     try:
         persist_rules(rules)
@@ -501,49 +424,104 @@ async def put_config(
     set_rules(rules)
     invalidate_target_status_cache()
     CONFIG_RELOAD_TOTAL.labels(result="success").inc()
-    return JSONResponse({"saved": True})
+    return FastJSONResponse({"saved": True})
 
 
 @app.post("/admin/reload")
 async def admin_reload(_: Optional[str] = Depends(require_basic_auth)) -> Response:
     try:
-        reload_rules()
+        publish_rules(reload_rules())
         invalidate_target_status_cache()
         CONFIG_RELOAD_TOTAL.labels(result="success").inc()
     except Exception as exc:
         CONFIG_RELOAD_TOTAL.labels(result="fail").inc()
         raise HTTPException(status_code=500, detail=str(exc)) from exc
-    return JSONResponse({"reloaded": True})
+    return FastJSONResponse({"reloaded": True})
+
+
+def _transform_by_route(payloads: List[Any], routes: List[RouteConfig]) -> List[Any]:
+    """Transform payloads[i] with routes[i]; one transform_many batch per distinct route, outputs in order."""
+    if routes and all(r is routes[0] for r in routes):
+        return transform_many(payloads, routes[0])
+    groups: Dict[int, List[int]] = {}
+    for i, r in enumerate(routes):
+        groups.setdefault(id(r), []).append(i)
+    outputs: List[Any] = [None] * len(payloads)
+    for positions in groups.values():
+        for pos, out in zip(positions, transform_many([payloads[p] for p in positions], routes[positions[0]])):
+            outputs[pos] = out
+    return outputs
+
+
+def _keep_shards(keep: List[int], *columns: List[Any]) -> Tuple[List[Any], ...]:
+    """Filter parallel per-shard lists down to the `keep` positions."""
+    if len(keep) == len(columns[0]):
+        return columns
+    return tuple([col[i] for i in keep] for col in columns)
+
+
+def _routes_label(routes: List[RouteConfig]) -> str:
+    """Request-level route label: the distinct shard route names in order, comma-separated."""
+    return ",".join(dict.fromkeys(r.name for r in routes))
+
+
+def _not_forwarded_result(
+    request: Request, source: str, route_name: str, request_id: str, reason: str
+) -> Tuple[int, dict]:
+    """200 for a webhook whose shards were all held back (reason: deduplicated | unchanged | buffered)."""
+    request.state.forward_result = reason
+    REQUESTS_TOTAL.labels(source=source, route=route_name, status="200").inc()
+    bump_stats_version()
+    return 200, {"status": "ok", "request_id": request_id, "forwarded": False, reason: True}
 
 
 @app.post("/api/transform/{source}")
 async def preview_transform(
     source: str,
     request: Request,
+    batch: bool = False,
     _: Optional[str] = Depends(require_basic_auth),
 ) -> Response:
+    """Preview a route transform. ?batch=1 takes a JSON array of payloads and returns the outputs in order."""
     payload = await _get_request_json(request, max_bytes=MAX_WEBHOOK_BODY_BYTES)
+    if batch and not isinstance(payload, list):
+        raise HTTPException(status_code=400, detail="batch=1 expects a JSON array of payloads")
     request.state.source = source
     rules = get_rules()
-    route = select_route(rules, source)
-    if not route:
+    if not select_route(rules, source):
         raise HTTPException(status_code=404, detail="Route not found")
-    request.state.route_name = route.name
+    items = payload if batch else [payload]
+    routes = [select_route(rules, source, item) for item in items]
+    if not all(routes):
+        raise HTTPException(status_code=404, detail="No route matches payload")
+    request.state.route_name = routes[0].name if routes else None
     request.state.forward_result = "preview"
 
-    output = transform_payload(payload, route)
-    return JSONResponse(output)
+    outputs = _transform_by_route(items, routes)
+    return FastJSONResponse(outputs if batch else outputs[0])
 
 
 @app.post("/webhook/{source}")
-async def webhook(source: str, request: Request) -> Response:
+async def webhook(
+    source: str,
+    request: Request,
+    ticket: Ticket = Depends(admission(MAX_WEBHOOK_BODY_BYTES)),
+) -> Response:
     request_id = request.state.request_id
     request.state.source = source
+    # Per-stage timings; RequestContextMiddleware (app/middleware.py) exports them (histogram + request log line).
+    timer = StageTimer()
+    request.state.stage_timer = timer
+    # Every feed / DLQ / log consumer of an object shares one sanitized copy.
+    sanitize = SanitizeCache()
+    # Names, statuses, worst severity and previews per payload object, each walked once.
+    analyze = BundleSummaries()
 
     rules = get_rules()
     
     # Verify API key if configured
-    api_key_name = verify_api_key(request, rules.auth.api_keys if rules.auth else None)
+    with timer.stage("api_key"):
+        api_key_name = verify_api_key(request, rules.auth.api_keys if rules.auth else None)
     request.state.api_key_name = api_key_name
     
     route = select_route(rules, source)
@@ -552,307 +530,525 @@ async def webhook(source: str, request: Request) -> Response:
 
     request.state.route_name = route.name
 
-    raw_body = await _read_body_with_limit(request, MAX_WEBHOOK_BODY_BYTES)
+    with timer.stage("body_read"):
+        raw_body = await _read_body_with_limit(request, MAX_WEBHOOK_BODY_BYTES)
     if route.verify_hmac:
-        header_value = request.headers.get(route.verify_hmac.header)
-        ok, err = verify_hmac_signature(raw_body, header_value, route)
+        with timer.stage("hmac"):
+            header_value = request.headers.get(route.verify_hmac.header)
+            ok, err = verify_hmac_signature(memoryview(raw_body), header_value, route)
         if not ok:
             HMAC_VERIFY_TOTAL.labels(route=route.name, result="fail").inc()
             raise HTTPException(status_code=401, detail=err or "HMAC verification failed")
         HMAC_VERIFY_TOTAL.labels(route=route.name, result="success").inc()
 
-    try:
-        payload = json.loads(raw_body) if raw_body else {}
-    except json.JSONDecodeError as exc:
-        raise HTTPException(status_code=400, detail=f"Invalid JSON: {exc}") from exc
-
-    # Count as "incoming" only after auth + route + body + JSON OK so daily: Incoming ≈ Fwd OK + Fwd Fail.
-    increment_daily("incoming")
+    with timer.stage("json_parse"):
+        try:
+            payload = json_loads(raw_body) if raw_body else {}
+        except json.JSONDecodeError as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {exc}") from exc
+    if ADMISSION.critical_share > 0:
+        with timer.stage("admission"):
+            critical = isinstance(payload, dict) and analyze(payload).severity_rank >= SEVERITY_RANK_CRITICAL
+        if not ADMISSION.classify(ticket, critical):
+            raise busy()
+
+    with timer.stage("route_select"):
+        inbound_shards, shard_routes = _route_shards(rules, source, route, payload, request_id)
+    # Request-level metrics and feeds carry every matched route; pause / forward metrics go per shard.
+    request.state.route_name = _routes_label(shard_routes)
 
     # Alert unrolling: split alerts[] and forward each (OCP Alertmanager)
-    outputs_to_forward: list[Any] = []
+    with timer.stage("transform"):
+        outputs_to_forward = _transform_by_route(inbound_shards, shard_routes)
+
+    http_status, body = await _deliver_shards(
+        request, rules, source, request_id, payload, inbound_shards, shard_routes, outputs_to_forward,
+        timer, sanitize, analyze,
+    )
+    return FastJSONResponse(body, status_code=http_status)
+
+
+def _route_shards(
+    rules: RuleSet, source: str, route: RouteConfig, payload: dict, request_id: str
+) -> Tuple[List[Any], List[RouteConfig]]:
+    """
+    Content-based routing: label/annotation predicates pick the route per alert when unrolling,
+    else per payload. Alerts no route matches are not forwarded; 404 when nothing matches.
+    """
+    unroll = getattr(route, "unroll_alerts", False) and isinstance(payload.get("alerts"), list) and payload["alerts"]
     inbound_shards: list[Any] = []
-    if getattr(route, "unroll_alerts", False) and isinstance(payload.get("alerts"), list) and payload["alerts"]:
-        for alert in payload["alerts"]:
-            sub = copy.deepcopy(payload)
-            sub["alerts"] = [alert]
+    shard_routes: list[RouteConfig] = []
+    for sub in unroll_alert_bundle(payload) if unroll else [payload]:
+        sub_route = select_route(rules, source, sub)
+        if sub_route is not None:
             inbound_shards.append(sub)
-            outputs_to_forward.append(transform_payload(sub, route))
-    else:
-        inbound_shards.append(payload)
-        outputs_to_forward.append(transform_payload(payload, route))
+            shard_routes.append(sub_route)
+    if not shard_routes:
+        alerts = payload.get("alerts")
+        UNROUTED_ALERTS_TOTAL.labels(source=source).inc(len(alerts) if isinstance(alerts, list) and alerts else 1)
+        raise HTTPException(status_code=404, detail="No route matches payload")
+    if unroll and len(shard_routes) < len(payload["alerts"]):
+        dropped = len(payload["alerts"]) - len(shard_routes)
+        UNROUTED_ALERTS_TOTAL.labels(source=source).inc(dropped)
+        logger.warning("unrouted_alerts", extra={"request_id": request_id, "source": source, "dropped": dropped})
+    return inbound_shards, shard_routes
+
+
+async def _deliver_shards(
+    request: Request,
+    rules: RuleSet,
+    source: str,
+    request_id: str,
+    payload: Any,
+    inbound_shards: List[Any],
+    shard_routes: List[RouteConfig],
+    outputs_to_forward: List[Any],
+    timer: StageTimer,
+    sanitize: SanitizeCache,
+    analyze: BundleSummaries,
+) -> Tuple[int, dict]:
+    """
+    Everything after transform for one inbound payload: dedup, alert state, pause, aggregation,
+    forward, DLQ, daily counters, metrics and feeds. Returns (http_status, response body).
+    Pause, forward metrics and per-shard feed / DLQ rows follow each shard's own route.
+    """
+    route_name = _routes_label(shard_routes)
+    request.state.route_name = route_name
+
+    # Dedup: notifications already forwarded within their route's window are dropped here. Marks of
+    # the admitted ones are rolled back when their forward fails or is paused, so re-sends get through.
+    dedup_marks: List[Any] = [None] * len(outputs_to_forward)
+    if any(r.dedup is not None for r in shard_routes):
+        with timer.stage("dedup"):
+            keep = []
+            for i, output in enumerate(outputs_to_forward):
+                admitted, dedup_marks[i] = dedup_admit(shard_routes[i], inbound_shards[i], output)
+                if admitted:
+                    keep.append(i)
+        inbound_shards, shard_routes, outputs_to_forward, dedup_marks = _keep_shards(
+            keep, inbound_shards, shard_routes, outputs_to_forward, dedup_marks
+        )
+        if not outputs_to_forward:
+            return _not_forwarded_result(request, source, route_name, request_id, "deduplicated")
+
+    # Alert state table sees every alert; transitions_only routes forward only changes (+ heartbeat).
+    with timer.stage("alert_state"):
+        keep = [i for i, sub in enumerate(inbound_shards) if observe_alerts(shard_routes[i], sub)]
+    inbound_shards, shard_routes, outputs_to_forward, dedup_marks = _keep_shards(
+        keep, inbound_shards, shard_routes, outputs_to_forward, dedup_marks
+    )
+    if not outputs_to_forward:
+        return _not_forwarded_result(request, source, route_name, request_id, "unchanged")
+
+    # Count as "incoming" only after auth + route + body + JSON OK and past dedup / alert state, so
+    # daily: Incoming ≈ Fwd OK + Fwd Fail.
+    with timer.stage("daily_metrics"):
+        await _file_io(increment_daily, "incoming")
 
     start = time.monotonic()
     all_success = True
     last_status_code: Optional[int] = None
     last_error: Optional[Exception] = None
     last_failed_output: Any = None
-    forward_enabled = getattr(route, "forward_enabled", True)
-
-    if not forward_enabled:
-        duration = time.monotonic() - start
-        FORWARD_TOTAL.labels(route=route.name, result="skipped").inc()
-        FORWARD_LATENCY_SECONDS.labels(route=route.name).observe(duration)
-        request.state.forward_result = "skipped"
-        http_status = 200
-        REQUESTS_TOTAL.labels(
-            source=source,
-            route=route.name,
-            status=str(http_status),
-        ).inc()
-        alert_summary = extract_alert_summary(payload)
+    last_failed_route = route_name
+
+    # Shard ids / indexes are fixed here, so paused, buffered and forwarded shards of one webhook never share one.
+    n_shards = len(outputs_to_forward)
+    shard_index = list(range(n_shards))
+    shard_ids = [f"{request_id}-{i}" if n_shards > 1 else request_id for i in shard_index]
+
+    # Forwarding pause is per route: shards of paused routes go to the Failed feed + DLQ, the rest are forwarded.
+    paused = [i for i, r in enumerate(shard_routes) if not getattr(r, "forward_enabled", True)]
+    if paused:
         err_pause = "Forwarding paused (outbound disabled for this route)"
-        n_pause = max(1, len(outputs_to_forward))
         ts_pause = datetime.now(BANGKOK).isoformat(timespec="milliseconds")
-        for i in range(n_pause):
+        for i in paused:
+            dedup_rollback(dedup_marks[i])
             out_i = outputs_to_forward[i]
-            san_i = sanitize_payload(out_i)
             shard_inbound = inbound_shards[i] if i < len(inbound_shards) else payload
-            rid_i = f"{request_id}-{i}" if n_pause > 1 else request_id
-            ab_p, ab_d = format_alert_bundle_for_ui(shard_inbound)
-            sev_i = extract_alert_severity(payload) or extract_alert_severity(san_i)
-            af_i = resolve_stored_alert_firing(san_i, payload, i, n_pause) or None
+            shard_route = shard_routes[i]
+            rid_i = shard_ids[i]
+            FORWARD_TOTAL.labels(route=shard_route.name, result="skipped").inc()
+            FORWARD_LATENCY_SECONDS.labels(route=shard_route.name).observe(time.monotonic() - start)
             RECENT_FAILED.append(
-                {
+                FeedRecord(
+                    rid_i,
+                    source,
+                    shard_route.name,
+                    payload=payload,
+                    output=out_i,
+                    shard=shard_inbound,
+                    shards=n_shards,
+                    http_status=200,
+                    error=err_pause,
+                ),
+                analyze,
+                sanitize,
+            )
+            if dlq_file_path():
+                with timer.stage("sanitize"):
+                    san_i = sanitize(out_i)
+                with timer.stage("ui_extract"):
+                    ab_p, ab_d = analyze(shard_inbound).ui()
+                    sev_i = analyze(payload).severity or analyze(san_i).severity
+                    af_i = analyze.stored_firing(san_i, shard_inbound, n_shards) or None
+                dlq_row = {
                     "ts": ts_pause,
                     "request_id": rid_i,
+                    "base_request_id": request_id,
+                    "unroll_index": shard_index[i],
+                    "unroll_count": n_shards,
                     "source": source,
-                    "route": route.name,
-                    "http_status": http_status,
-                    "payload_preview": json.dumps(san_i)[:200],
+                    "route": shard_route.name,
+                    "http_status": None,
                     "error": err_pause,
+                    "error_type": "ForwardPaused",
+                    "final_failure": True,
+                    "forward_paused": True,
+                    "transformed": san_i,
                     "alert_severity": sev_i or None,
                     "alert_firing": af_i,
                     "alert_bundle_preview": ab_p or None,
                     "alert_bundle_detail": ab_d or None,
                 }
+                with timer.stage("dlq_write"):
+                    if shard_route.dlq_aggregate:
+                        dlq_row["fingerprint"] = dlq_fingerprint(shard_route.name, shard_inbound, san_i)
+                    await _file_io(record_failed_forward, dlq_row, aggregate=shard_route.dlq_aggregate)
+        # Paused shards are this webhook's forward_fail / dlq tick, whatever happens to its other shards.
+        with timer.stage("daily_metrics"):
+            await _file_io(increment_daily, "forward_fail")
+            await _file_io(increment_daily, "dlq")
+        if len(paused) == n_shards:
+            request.state.forward_result = "skipped"
+            http_status = 200
+            REQUESTS_TOTAL.labels(
+                source=source,
+                route=route_name,
+                status=str(http_status),
+            ).inc()
+            bump_stats_version()
+            # The first output fills in severity / firing when the inbound bundle carries none.
+            record = FeedRecord(
+                request_id,
+                source,
+                route_name,
+                payload=payload,
+                output=outputs_to_forward[0] if outputs_to_forward else None,
+                http_status=http_status,
             )
-            if dlq_file_path():
-                record_failed_forward(
-                    {
-                        "ts": ts_pause,
-                        "request_id": rid_i,
-                        "base_request_id": request_id,
-                        "unroll_index": i,
-                        "unroll_count": n_pause,
-                        "source": source,
-                        "route": route.name,
-                        "http_status": None,
-                        "error": err_pause,
-                        "error_type": "ForwardPaused",
-                        "final_failure": True,
-                        "forward_paused": True,
-                        "transformed": san_i,
-                        "alert_severity": sev_i or None,
-                        "alert_firing": af_i,
-                        "alert_bundle_preview": ab_p or None,
-                        "alert_bundle_detail": ab_d or None,
-                    }
-                )
-        san_preview = sanitize_payload(outputs_to_forward[0] if outputs_to_forward else transform_payload(payload, route))
-        alert_severity = extract_alert_severity(payload) or extract_alert_severity(san_preview)
-        alert_firing_b = extract_bundle_firing_status(payload) or extract_shard_firing_status(san_preview) or None
-        ab_preview, ab_detail = format_alert_bundle_for_ui(payload)
-        increment_daily("forward_fail")
-        increment_daily("dlq")
-        raw_alerts_paused = payload.get("alerts")
-        if isinstance(raw_alerts_paused, list) and raw_alerts_paused:
-            alerts_in_bundle_paused = len(raw_alerts_paused)
-        else:
-            alerts_in_bundle_paused = 1
-        RECENT_WEBHOOKS.append({
-            "ts": datetime.now(BANGKOK).isoformat(timespec="milliseconds"),
-            "request_id": request_id,
-            "source": source,
-            "route": route.name,
-            "http_status": http_status,
-            "forwarded": False,
-            "alert_summary": alert_summary or None,
-            "alert_severity": alert_severity or None,
-            "alerts_in_bundle": alerts_in_bundle_paused,
-            "alert_firing": alert_firing_b,
-            "alert_bundle_preview": ab_preview or None,
-            "alert_bundle_detail": ab_detail or None,
-        })
-        RECENT_PAYLOADS.append({
-            "ts": datetime.now(BANGKOK).isoformat(timespec="milliseconds"),
-            "source": source,
-            "route": route.name,
-            "request_id": request_id,
-            "payload": sanitize_payload(payload),
-            "alert_severity": alert_severity or None,
-            "alert_firing": alert_firing_b,
-        })
-        return JSONResponse(
-            {
+            RECENT_WEBHOOKS.append(record)
+            RECENT_PAYLOADS.append(record)
+            return http_status, {
                 "status": "ok",
                 "request_id": request_id,
                 "forwarded": False,
                 "forward_paused": True,
-            },
-            status_code=http_status,
+            }
+        paused_set = set(paused)
+        inbound_shards, shard_routes, outputs_to_forward, dedup_marks, shard_ids, shard_index = _keep_shards(
+            [i for i in range(n_shards) if i not in paused_set],
+            inbound_shards, shard_routes, outputs_to_forward, dedup_marks, shard_ids, shard_index,
+        )
+
+    # Aggregation: routes with `aggregate` buffer their alerts; full groups are forwarded right away,
+    # the rest by _aggregate_flush_loop after group_wait_ms.
+    if any(r.aggregate is not None for r in shard_routes):
+        keep = []
+        for i, output in enumerate(outputs_to_forward):
+            if shard_routes[i].aggregate is None:
+                keep.append(i)
+                continue
+            # Handed to the aggregator: group forward failures go to the DLQ, not back to dedup / state.
+            mark_forwarded(inbound_shards[i])
+            for group in AGGREGATOR.add(shard_routes[i], output, request_id=request_id):
+                _spawn_group_forward(group)
+        inbound_shards, shard_routes, outputs_to_forward, dedup_marks, shard_ids, shard_index = _keep_shards(
+            keep, inbound_shards, shard_routes, outputs_to_forward, dedup_marks, shard_ids, shard_index
         )
+        if not outputs_to_forward:
+            http_status, body = _not_forwarded_result(request, source, route_name, request_id, "buffered")
+            if paused:
+                body["forward_paused"] = True
+            return http_status, body
 
-    n_fwd = len(outputs_to_forward)
     for i, output in enumerate(outputs_to_forward):
-        rid = f"{request_id}-{i}" if n_fwd > 1 else request_id
-        ok, status_code, err, attempt_meta = await forward_payload(output, route, rid, rules.defaults)
+        rid = shard_ids[i]
+        shard_inbound = inbound_shards[i] if i < len(inbound_shards) else payload
+        shard_route = shard_routes[i]
+        shard_start = time.monotonic()
+        with timer.stage("forward"):
+            ok, status_code, err, attempt_meta = await forward_payload(output, shard_route, rid, rules.defaults)
+        FORWARD_LATENCY_SECONDS.labels(route=shard_route.name).observe(time.monotonic() - shard_start)
+        FORWARD_TOTAL.labels(route=shard_route.name, result="success" if ok else "fail").inc()
         if ok:
-            out_san = sanitize_payload(output)
-            af_stored = resolve_stored_alert_firing(out_san, payload, i, n_fwd) or None
-            sent_row = {
-                "ts": datetime.now(BANGKOK).isoformat(timespec="milliseconds"),
-                "request_id": rid,
-                "base_request_id": request_id,
-                "source": source,
-                "route": route.name,
-                "transformed": out_san,
-                "alert_severity": extract_alert_severity(out_san) or None,
-                "alert_firing": af_stored,
-            }
-            RECENT_SENT.append(sent_row)
-            record_success_forward(sent_row)
+            mark_forwarded(shard_inbound)
+            sent = RECENT_SENT.append(
+                FeedRecord(
+                    rid,
+                    source,
+                    shard_route.name,
+                    payload=payload,
+                    output=output,
+                    shard=shard_inbound,
+                    shards=n_shards,
+                    forwarded=True,
+                    base_request_id=request_id,
+                )
+            )
+            if success_log_enabled() and success_log_file_path():
+                with timer.stage("success_log_write"):
+                    await _file_io(record_success_forward, RECENT_SENT.row(sent, analyze, sanitize))
         else:
+            dedup_rollback(dedup_marks[i])
             all_success = False
             last_status_code = status_code
             last_error = err
             last_failed_output = output
+            last_failed_route = shard_route.name
             # One DLQ line per forward outcome after internal retries complete (not per retry attempt).
             # When unroll_alerts splits one webhook into N forwards, N lines share base_request_id;
             # suffix -0/-1 on request_id is the shard index, not HTTP retry.
-            n_out = n_fwd
-            out_san = sanitize_payload(output)
-            sev = extract_alert_severity(out_san) or extract_alert_severity(payload)
-            af_dlq = resolve_stored_alert_firing(out_san, payload, i, n_out) or None
-            shard_inbound = inbound_shards[i] if i < len(inbound_shards) else payload
-            ab_p, ab_d = format_alert_bundle_for_ui(shard_inbound)
-            record_failed_forward(
-                {
-                    "ts": datetime.now(BANGKOK).isoformat(timespec="milliseconds"),
-                    "request_id": rid,
-                    "base_request_id": request_id,
-                    "unroll_index": i,
-                    "unroll_count": n_out,
-                    "source": source,
-                    "route": route.name,
-                    "http_status": status_code,
-                    "error": str(err) if err else None,
-                    "error_type": type(err).__name__ if err else None,
-                    "attempts_used": int(attempt_meta.get("attempts_used", 0)),
-                    "max_attempts": int(attempt_meta.get("max_attempts", 0)),
-                    "is_retry": bool(attempt_meta.get("retried", False)),
-                    "retry_count": max(int(attempt_meta.get("attempts_used", 0)) - 1, 0),
-                    "circuit_open": bool(attempt_meta.get("circuit_open", False)),
-                    "final_failure": True,
-                    "transformed": out_san,
-                    "alert_severity": sev or None,
-                    "alert_firing": af_dlq,
-                    "alert_bundle_preview": ab_p or None,
-                    "alert_bundle_detail": ab_d or None,
-                }
-            )
-    # Daily forward_success: one per incoming webhook only when every outbound succeeded (unroll → N HTTP calls, still 1 tick).
-    if forward_enabled and outputs_to_forward and all_success:
-        increment_daily("forward_success")
-    # Daily forward_fail / dlq: one tick per incoming webhook if any outbound failed (not per unrolled alert).
-    # DLQ JSONL may still hold one line per failed shard for operations.
-    if forward_enabled and not all_success and outputs_to_forward:
-        increment_daily("forward_fail")
-        increment_daily("dlq")
+            with timer.stage("sanitize"):
+                out_san = sanitize(output)
+            with timer.stage("ui_extract"):
+                sev = analyze(out_san).severity or analyze(payload).severity
+                af_dlq = analyze.stored_firing(out_san, shard_inbound, n_shards) or None
+                ab_p, ab_d = analyze(shard_inbound).ui()
+            dlq_row = {
+                "ts": datetime.now(BANGKOK).isoformat(timespec="milliseconds"),
+                "request_id": rid,
+                "base_request_id": request_id,
+                "unroll_index": shard_index[i],
+                "unroll_count": n_shards,
+                "source": source,
+                "route": shard_route.name,
+                "http_status": status_code,
+                "error": str(err) if err else None,
+                "error_type": type(err).__name__ if err else None,
+                "attempts_used": int(attempt_meta.get("attempts_used", 0)),
+                "max_attempts": int(attempt_meta.get("max_attempts", 0)),
+                "is_retry": bool(attempt_meta.get("retried", False)),
+                "retry_count": max(int(attempt_meta.get("attempts_used", 0)) - 1, 0),
+                "circuit_open": bool(attempt_meta.get("circuit_open", False)),
+                "final_failure": True,
+                "transformed": out_san,
+                "alert_severity": sev or None,
+                "alert_firing": af_dlq,
+                "alert_bundle_preview": ab_p or None,
+                "alert_bundle_detail": ab_d or None,
+            }
+            with timer.stage("dlq_write"):
+                if shard_route.dlq_aggregate:
+                    dlq_row["fingerprint"] = dlq_fingerprint(shard_route.name, shard_inbound, out_san)
+                await _file_io(record_failed_forward, dlq_row, aggregate=shard_route.dlq_aggregate)
+    # A webhook with paused shards already took its forward_fail / dlq tick above.
+    if not paused:
+        with timer.stage("daily_metrics"):
+            # Daily forward_success: one per incoming webhook only when every outbound succeeded (unroll → N HTTP calls, still 1 tick).
+            if all_success:
+                await _file_io(increment_daily, "forward_success")
+            # Daily forward_fail / dlq: one tick per incoming webhook if any outbound failed (not per unrolled alert).
+            # DLQ JSONL may still hold one line per failed shard for operations.
+            else:
+                await _file_io(increment_daily, "forward_fail")
+                await _file_io(increment_daily, "dlq")
     success = all_success
     duration = time.monotonic() - start
 
-    FORWARD_LATENCY_SECONDS.labels(route=route.name).observe(duration)
-    FORWARD_TOTAL.labels(route=route.name, result="success" if success else "fail").inc()
-
     request.state.forward_result = "success" if success else "fail"
     http_status = 200 if success else 202
     REQUESTS_TOTAL.labels(
         source=source,
-        route=route.name,
+        route=route_name,
         status=str(http_status),
     ).inc()
+    bump_stats_version()
 
     # One line per webhook in Live / Failed feeds: severity from full inbound payload first
     # (worst across alerts[]), not from the last failed shard only — avoids WARNING vs CRITICAL mismatch.
-    alert_summary = extract_alert_summary(payload)
-    alert_severity_bundle = extract_alert_severity(payload)
-    alert_firing_bundle = extract_bundle_firing_status(payload)
-    ab_preview, ab_detail = format_alert_bundle_for_ui(payload)
-    raw_alerts = payload.get("alerts")
-    if isinstance(raw_alerts, list) and raw_alerts:
-        alerts_in_bundle = len(raw_alerts)
-    else:
-        alerts_in_bundle = 1
-
     if not success:
         failed_output = last_failed_output if last_failed_output is not None else (
             outputs_to_forward[-1] if outputs_to_forward else {}
         )
+        with timer.stage("sanitize"):
+            failed_san = sanitize(failed_output)
         logger.error(
             "forward_failed",
             extra={
                 "request_id": request_id,
                 "source": source,
-                "route": route.name,
+                "route": last_failed_route,
                 "forward_result": "fail",
                 "http_status": http_status,
                 "duration_ms": round(duration * 1000, 2),
                 "error_type": type(last_error).__name__ if last_error else None,
                 "error_status": last_status_code,
-                "sanitized_payload": sanitize_payload(failed_output),
+                "sanitized_payload": failed_san,
             },
         )
-        failed_san = sanitize_payload(failed_output)
-        RECENT_FAILED.append({
-            "ts": datetime.now(BANGKOK).isoformat(timespec="milliseconds"),
-            "request_id": request_id,
-            "source": source,
-            "route": route.name,
-            "http_status": http_status,
-            "payload_preview": json.dumps(failed_san)[:200],
-            "error": str(last_error) if last_error else None,
-            "alert_severity": alert_severity_bundle or extract_alert_severity(failed_san) or None,
-            "alert_firing": alert_firing_bundle or extract_shard_firing_status(failed_san) or None,
-            "alert_bundle_preview": ab_preview or None,
-            "alert_bundle_detail": ab_detail or None,
-        })
-
-    # Append to live feed for UI (newest at end; API returns reversed)
-    RECENT_WEBHOOKS.append({
-        "ts": datetime.now(BANGKOK).isoformat(timespec="milliseconds"),
-        "request_id": request_id,
-        "source": source,
-        "route": route.name,
-        "http_status": http_status,
-        "forwarded": success,
-        "alert_summary": alert_summary or None,
-        "alert_severity": alert_severity_bundle or None,
-        "alerts_in_bundle": alerts_in_bundle,
-        "alert_firing": alert_firing_bundle or None,
-        "alert_bundle_preview": ab_preview or None,
-        "alert_bundle_detail": ab_detail or None,
-    })
-    # Store sanitized incoming payload so UI can use as source pattern (real traffic shape)
-    RECENT_PAYLOADS.append({
-        "ts": datetime.now(BANGKOK).isoformat(timespec="milliseconds"),
-        "source": source,
-        "route": route.name,
-        "request_id": request_id,
-        "payload": sanitize_payload(payload),
-        "alert_severity": alert_severity_bundle or None,
-        "alert_firing": alert_firing_bundle or None,
-    })
+        RECENT_FAILED.append(
+            FeedRecord(
+                request_id,
+                source,
+                last_failed_route,
+                payload=payload,
+                output=failed_output,
+                http_status=http_status,
+                error=str(last_error) if last_error else None,
+            ),
+            analyze,
+            sanitize,
+        )
 
-    return JSONResponse(
-        {"status": "ok", "request_id": request_id, "forwarded": success},
-        status_code=http_status,
+    # Append to live feed for UI (newest at end; API returns reversed). The same raw record backs the
+    # payload feed, which the UI uses as source pattern (real traffic shape); sanitized on read.
+    record = FeedRecord(request_id, source, route_name, payload=payload, http_status=http_status, forwarded=success)
+    RECENT_WEBHOOKS.append(record)
+    RECENT_PAYLOADS.append(record)
+
+    body = {"status": "ok", "request_id": request_id, "forwarded": success}
+    if paused:
+        body["forward_paused"] = True
+    return http_status, body
+
+
+@app.post("/webhook/{source}/batch")
+async def webhook_batch(
+    source: str,
+    request: Request,
+    ticket: Ticket = Depends(admission(BATCH_MAX_BYTES)),
+) -> Response:
+    """
+    Many payloads in one request: NDJSON (one per line) or a JSON array, parsed while the body streams
+    in under ALERTBRIDGE_BATCH_MAX_ITEMS / ALERTBRIDGE_BATCH_MAX_BYTES. API key and HMAC are checked
+    once for the whole body; each item then runs the /webhook pipeline as request_id "<id>.<index>"
+    and gets its own entry in `results`. 200 when every item got 200, else 202.
+    """
+    started = time.monotonic()
+    request_id = request.state.request_id
+    request.state.source = source
+    timer = StageTimer()
+    request.state.stage_timer = timer
+    # Shared across items: a payload object repeated in feeds / DLQ is sanitized and summarized once.
+    sanitize = SanitizeCache()
+    analyze = BundleSummaries()
+
+    rules = get_rules()
+    with timer.stage("api_key"):
+        request.state.api_key_name = verify_api_key(request, rules.auth.api_keys if rules.auth else None)
+    route = select_route(rules, source)
+    if not route:
+        raise HTTPException(status_code=404, detail="Route not found")
+    request.state.route_name = route.name
+
+    mac, err = hmac_for_route(route)
+    if err:
+        HMAC_VERIFY_TOTAL.labels(route=route.name, result="fail").inc()
+        raise HTTPException(status_code=401, detail=err)
+    declared = _declared_content_length(request)
+    if declared is not None and declared > BATCH_MAX_BYTES:
+        raise HTTPException(status_code=413, detail="Request body too large")
+    parser = BatchParser()
+    parse_error: Optional[BatchFormatError] = None
+    too_many = False
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > BATCH_MAX_BYTES:
+            raise HTTPException(status_code=413, detail="Request body too large")
+        if mac is not None:
+            with timer.stage("hmac"):
+                mac.update(chunk)
+        if parse_error is None and not too_many:
+            with timer.stage("json_parse"):
+                try:
+                    parser.feed(chunk)
+                except BatchFormatError as exc:
+                    # Reported after the signature check, so unsigned callers learn nothing of the body.
+                    parse_error = exc
+            # Parsing stops here (no more items buffered); reported after the signature check too.
+            too_many = len(parser) > BATCH_MAX_ITEMS
+    if mac is not None:
+        with timer.stage("hmac"):
+            ok, err = verify_hmac_digest(mac, request.headers.get(route.verify_hmac.header))
+        if not ok:
+            HMAC_VERIFY_TOTAL.labels(route=route.name, result="fail").inc()
+            raise HTTPException(status_code=401, detail=err or "HMAC verification failed")
+        HMAC_VERIFY_TOTAL.labels(route=route.name, result="success").inc()
+    if parse_error is None and not too_many:
+        with timer.stage("json_parse"):
+            try:
+                parser.close()
+            except BatchFormatError as exc:
+                parse_error = exc
+    if parse_error is not None:
+        raise HTTPException(status_code=400, detail=str(parse_error))
+    if len(parser) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {BATCH_MAX_ITEMS} items")
+    items = parser.items
+    if ADMISSION.critical_share > 0:
+        with timer.stage("admission"):
+            critical = any(
+                isinstance(item, dict) and analyze(item).severity_rank >= SEVERITY_RANK_CRITICAL for item in items
+            )
+        if not ADMISSION.classify(ticket, critical):
+            raise busy()
+    if not items:
+        raise HTTPException(status_code=400, detail="Empty batch")
+    WEBHOOK_BATCH_ITEMS.labels(route=route.name).observe(len(items))
+
+    results: List[Optional[dict]] = [None] * len(items)
+    routed: List[Tuple[int, str, dict, List[Any], List[RouteConfig]]] = []
+    with timer.stage("route_select"):
+        for i, item in enumerate(items):
+            rid = f"{request_id}.{i}"
+            if not isinstance(item, dict):
+                results[i] = {"index": i, "http_status": 400, "request_id": rid, "detail": "Item is not a JSON object"}
+                continue
+            try:
+                shards, shard_routes = _route_shards(rules, source, route, item, rid)
+            except HTTPException as exc:
+                results[i] = {"index": i, "http_status": exc.status_code, "request_id": rid, "detail": exc.detail}
+                continue
+            routed.append((i, rid, item, shards, shard_routes))
+    # One transform pass over the shards of every item, grouped by route (see _transform_by_route).
+    with timer.stage("transform"):
+        outputs = _transform_by_route(
+            [shard for r in routed for shard in r[3]], [shard_route for r in routed for shard_route in r[4]]
+        )
+
+    # Items are delivered one after another, in batch order: dedup and alert-state transitions
+    # (firing then resolved in the same batch) see them exactly as separate webhooks.
+    offset = 0
+    for i, rid, item, shards, shard_routes in routed:
+        n = len(shards)
+        http_status, body = await _deliver_shards(
+            request, rules, source, rid, item, shards, shard_routes, outputs[offset:offset + n],
+            timer, sanitize, analyze,
+        )
+        offset += n
+        results[i] = {"index": i, "http_status": http_status, **body}
+
+    request.state.route_name = route.name
+    request.state.forward_result = "batch"
+    WEBHOOK_BATCH_SECONDS.labels(route=route.name).observe(time.monotonic() - started)
+    all_ok = all(r["http_status"] == 200 for r in results)
+    return FastJSONResponse(
+        {
+            "status": "ok",
+            "request_id": request_id,
+            "items": len(items),
+            "forwarded": sum(1 for r in results if r.get("forwarded")),
+            "results": results,
+        },
+        status_code=200 if all_ok else 202,
     )
 
 
 @app.get("/healthz")
 async def healthz() -> Response:
-    return JSONResponse({"ok": True})
+    return FastJSONResponse({"ok": True})
 
 
 def _request_hostname_for_site(request: Request) -> str:
@@ -902,7 +1098,7 @@ async def version(request: Request) -> Response:
     site = os.getenv("ALERTBRIDGE_SITE", "").strip()
     if not site:
         site = _infer_site_from_request_host(_request_hostname_for_site(request)) or ""
-    return JSONResponse({
+    return FastJSONResponse({
         "version": APP_VERSION,
         "author": "Sontas Jiamsripong",
         "git_sha": git_sha,
@@ -916,55 +1112,87 @@ async def readyz() -> Response:
     rules_ok = rules_loaded()
     client_ready = get_client() is not None
     ready = rules_ok and client_ready
-    return JSONResponse(
+    return FastJSONResponse(
         {"ready": ready, "rules_loaded": rules_ok, "http_client_ready": client_ready}
     )
 
 
 @app.get("/api/stats")
-async def api_stats() -> Response:
+async def api_stats(request: Request) -> Response:
     """Return request/forward counts for UI (no auth so dashboard always shows data)."""
-    return JSONResponse(get_request_stats())
+    return conditional_json(request, "stats", stats_version(), get_request_stats)
+
+
+async def _stream_events(request: Request):
+    """SSE body for one subscriber: full stats first, then feed rows and stats deltas as published."""
+    sub = BUS.subscribe()
+    try:
+        stats = dumps_str(get_request_stats())
+        yield f"retry: 3000\nevent: stats\ndata: {stats}\n\n"
+        while True:
+            event = await sub.get(STREAM_KEEPALIVE_SEC)
+            if event is None:
+                if await request.is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
+            yield event.text()
+    finally:
+        BUS.unsubscribe(sub)
+
+
+@app.get("/api/stream")
+async def api_stream(request: Request) -> Response:
+    """
+    Server-Sent Events for the portal (no auth, like /api/recent-*): events `requests`, `failed`,
+    `sent`, `payloads` carry one new feed row each; `stats` carries changed /api/stats fields.
+    """
+    return StreamingResponse(
+        _stream_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/api/recent-requests")
-async def api_recent_requests() -> Response:
+async def api_recent_requests(request: Request) -> Response:
     """Return last N webhook requests (newest first) for UI live feed (no auth)."""
-    # Newest first: reverse the deque snapshot
-    snapshot = list(RECENT_WEBHOOKS)
-    snapshot.reverse()
-    return JSONResponse(snapshot)
+    return conditional_json(request, "recent-requests", RECENT_WEBHOOKS.version, RECENT_WEBHOOKS.rows)
 
 
 @app.get("/api/recent-failed")
-async def api_recent_failed() -> Response:
+async def api_recent_failed(request: Request) -> Response:
     """Return last N failed forward events (limited, stateless). No auth."""
-    snapshot = list(RECENT_FAILED)
-    snapshot.reverse()
-    return JSONResponse(snapshot)
+    return await compressed(
+        request, conditional_json(request, "recent-failed", RECENT_FAILED.version, RECENT_FAILED.rows)
+    )
 
 
 def _recent_sent_newest_first() -> list:
     """Newest successful forward first (by `ts`), for UI 'latest' row."""
     if success_log_enabled() and success_log_file_path():
         return read_recent_success(limit=RECENT_SENT_API_LIMIT)
-    rows = [x for x in RECENT_SENT if isinstance(x, dict)]
+    rows = RECENT_SENT.rows()
     rows.sort(key=lambda r: str(r.get("ts") or ""), reverse=True)
     return rows[:RECENT_SENT_API_LIMIT]
 
 
 @app.get("/api/recent-sent")
-async def api_recent_sent() -> Response:
+async def api_recent_sent(request: Request) -> Response:
     """Return newest successfully forwarded (transformed) payloads for UI verification."""
-    return JSONResponse(_recent_sent_newest_first())
+    # Every success (webhook or aggregated group) is appended to RECENT_SENT, also when the rows
+    # are served from the success log, so its version covers both sources.
+    return await compressed(
+        request, conditional_json(request, "recent-sent", RECENT_SENT.version, _recent_sent_newest_first)
+    )
 
 
 @app.get("/api/recent-payloads")
-async def api_recent_payloads() -> Response:
+async def api_recent_payloads(request: Request) -> Response:
     """Return last N incoming payloads (sanitized) so UI can use as source pattern from real traffic (no auth)."""
-    snapshot = list(RECENT_PAYLOADS)
-    snapshot.reverse()
-    return JSONResponse(snapshot)
+    return await compressed(
+        request, conditional_json(request, "recent-payloads", RECENT_PAYLOADS.version, RECENT_PAYLOADS.rows)
+    )
 
 
 def _enrich_dlq_entry_alert_firing(entry: Dict[str, Any]) -> None:
@@ -992,21 +1220,134 @@ def _enrich_dlq_entry_alert_bundle(entry: Dict[str, Any]) -> None:
 
 @app.get("/api/dlq/recent")
 async def api_dlq_recent(
+    request: Request,
     _: Optional[str] = Depends(require_basic_auth),
     limit: int = 50,
+    cursor: Optional[str] = None,
 ) -> Response:
-    """Latest rows from the on-disk DLQ (JSONL). Requires Basic Auth."""
+    """
+    Rows from the on-disk DLQ (JSONL), newest first. Requires Basic Auth.
+    Pass the returned next_cursor as ?cursor= to page to older rows (null = no older rows);
+    409 when the DLQ was compacted since the cursor was issued (start again without one).
+    """
     if not dlq_file_path():
-        return JSONResponse(
+        return FastJSONResponse(
             {"configured": False, "entries": [], "detail": "ALERTBRIDGE_DLQ_FILE not set"},
             status_code=503,
         )
     lim = max(1, min(int(limit), 200))
-    entries = read_recent_dlq(limit=lim)
+    try:
+        entries, next_cursor = await _file_io(read_dlq_page, cursor=cursor, limit=lim)
+    except StaleCursorError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+    for e in entries:
+        _enrich_dlq_entry_alert_firing(e)
+        _enrich_dlq_entry_alert_bundle(e)
+    return await compressed(
+        request,
+        FastJSONResponse({"configured": True, "entries": entries, "count": len(entries), "next_cursor": next_cursor}),
+    )
+
+
+def _parse_time_filter(name: str, value: Optional[str]) -> Optional[float]:
+    """ISO 8601 query value -> epoch seconds (naive times are taken as GMT+7, like stored ts)."""
+    if value is None or not value.strip():
+        return None
+    try:
+        dt = datetime.fromisoformat(value.strip())
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"{name} must be an ISO 8601 timestamp") from exc
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=BANGKOK)
+    return dt.timestamp()
+
+
+@app.get("/api/dlq/search")
+async def api_dlq_search(
+    request: Request,
+    _: Optional[str] = Depends(require_basic_auth),
+    route: Optional[str] = None,
+    error_type: Optional[str] = None,
+    http_status: Optional[int] = None,
+    severity: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    group_by: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Response:
+    """
+    Server-side DLQ filter (route, error_type, http_status, severity, since/until ISO time) answered
+    from the sidecar index. Optional group_by (route | error_type | http_status | alert_severity)
+    returns counts over all matches. Cursor paging as /api/dlq/recent. Requires Basic Auth.
+    """
+    if not dlq_file_path():
+        return FastJSONResponse(
+            {"configured": False, "entries": [], "detail": "ALERTBRIDGE_DLQ_FILE not set"},
+            status_code=503,
+        )
+    if group_by and group_by not in DLQ_SEARCH_GROUP_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"group_by must be one of: {', '.join(DLQ_SEARCH_GROUP_FIELDS)}",
+        )
+    try:
+        result = await _file_io(
+            search_dlq,
+            route=route or None,
+            error_type=error_type or None,
+            http_status=http_status,
+            severity=severity or None,
+            since=_parse_time_filter("since", since),
+            until=_parse_time_filter("until", until),
+            group_by=group_by or None,
+            cursor=cursor,
+            limit=max(1, min(int(limit), 200)),
+        )
+    except StaleCursorError as exc:
+        raise HTTPException(status_code=409, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+    entries = result["entries"]
     for e in entries:
         _enrich_dlq_entry_alert_firing(e)
         _enrich_dlq_entry_alert_bundle(e)
-    return JSONResponse({"configured": True, "entries": entries, "count": len(entries)})
+    body: Dict[str, Any] = {
+        "configured": True,
+        "entries": entries,
+        "count": len(entries),
+        "total": result["total"],
+        "next_cursor": result["next_cursor"],
+    }
+    if group_by:
+        body["groups"] = result["groups"]
+    return await compressed(request, FastJSONResponse(body))
+
+
+@app.get("/api/success-log/recent")
+async def api_success_log_recent(
+    request: Request,
+    _: Optional[str] = Depends(require_basic_auth),
+    limit: int = 50,
+    cursor: Optional[int] = None,
+) -> Response:
+    """
+    Rows from the on-disk success log (JSONL), newest first. Requires Basic Auth.
+    Same cursor paging as /api/dlq/recent.
+    """
+    if not (success_log_enabled() and success_log_file_path()):
+        return FastJSONResponse(
+            {"configured": False, "entries": [], "detail": "ALERTBRIDGE_SUCCESS_LOG_FILE not set or disabled"},
+            status_code=503,
+        )
+    lim = max(1, min(int(limit), 200))
+    entries, next_cursor = read_success_page(cursor=cursor, limit=lim)
+    return await compressed(
+        request,
+        FastJSONResponse({"configured": True, "entries": entries, "count": len(entries), "next_cursor": next_cursor}),
+    )
 
 
 @app.post("/api/dlq/purge")
@@ -1014,47 +1355,67 @@ async def api_dlq_purge(
     request: Request,
     _: Optional[str] = Depends(require_basic_auth),
 ) -> Response:
-    """Remove DLQ rows after review. Body: {\"all\": true} or {\"ids\": [...]}. Each id may be dlq_id or request_id. Requires Basic Auth."""
+    """
+    Remove DLQ rows after review. Body: {\"all\": true} or {\"ids\": [...]}. Each id may be dlq_id or request_id.
+    Id purges are tombstoned (hidden immediately, compacted on disk in the background). Requires Basic Auth.
+    """
     if not dlq_file_path():
-        return JSONResponse(
+        return FastJSONResponse(
             {"ok": False, "detail": "ALERTBRIDGE_DLQ_FILE not set"},
             status_code=503,
         )
     body = await _read_json_with_limit(request, max_bytes=262144)
     if body.get("all") is True:
-        ok, err = purge_dlq_all()
+        ok, err = await _file_io(purge_dlq_all)
         if not ok:
-            return JSONResponse({"ok": False, "detail": err or "purge failed"}, status_code=500)
-        return JSONResponse({"ok": True, "removed": "all"})
+            return FastJSONResponse({"ok": False, "detail": err or "purge failed"}, status_code=500)
+        return FastJSONResponse({"ok": True, "removed": "all"})
     ids = body.get("ids")
     if isinstance(ids, list):
         id_set = {str(x).strip() for x in ids if x}
         if not id_set:
             raise HTTPException(status_code=400, detail="ids must be non-empty")
-        removed, err = purge_dlq_by_ids(id_set)
+        removed, err = await _file_io(purge_dlq_by_ids, id_set)
         if err:
-            return JSONResponse({"ok": False, "detail": err}, status_code=500)
-        return JSONResponse({"ok": True, "removed": removed})
+            return FastJSONResponse({"ok": False, "detail": err}, status_code=500)
+        return FastJSONResponse({"ok": True, "removed": removed})
     raise HTTPException(
         status_code=400,
         detail='Expected JSON body: {"all": true} or {"ids": ["..."]}',
     )
 
 
+@app.get("/api/alerts/active")
+async def api_alerts_active(
+    _: Optional[str] = Depends(require_basic_auth),
+    route: Optional[str] = None,
+    limit: int = 500,
+) -> Response:
+    """Currently firing alerts from the in-memory alert state table, most recently seen first."""
+    rows = active_alerts(route=route, limit=limit)
+    return FastJSONResponse({"count": len(rows), "alerts": rows})
+
+
 @app.get("/api/metrics/daily")
 async def api_metrics_daily(
+    request: Request,
     _: Optional[str] = Depends(require_basic_auth),
     days: int = 30,
 ) -> Response:
     """Persisted daily counters on PVC (counts only, no event detail)."""
     p = daily_metrics_file_path()
     if not p:
-        return JSONResponse(
+        return FastJSONResponse(
             {"configured": False, "entries": [], "detail": "DLQ path not configured"},
             status_code=503,
         )
     lim = max(1, min(int(days), 365))
-    return JSONResponse({"configured": True, "entries": read_daily(lim)})
+    return conditional_json(
+        request,
+        f"metrics-daily-{lim}",
+        daily_metrics_signature(),
+        lambda: {"configured": True, "entries": read_daily(lim)},
+    )
 
 
 def _internal_webhook_base() -> str:
@@ -1077,7 +1438,7 @@ def _internal_webhook_base() -> str:
 async def api_in_cluster_webhook_base() -> Response:
     """In-cluster webhook base (HTTP Service DNS) for UI copy-paste. No auth."""
     base = _internal_webhook_base()
-    return JSONResponse({"internal_webhook_base": base or None})
+    return FastJSONResponse({"internal_webhook_base": base or None})
 
 
 @app.get("/api/config/targets")
@@ -1088,7 +1449,7 @@ async def api_config_targets() -> Response:
     for r in rules.routes:
         url = (r.target.url or "").strip() or os.getenv(r.target.url_env) or None
         out.append({"route": r.name, "source": r.match.source, "target_url": url or "(not set)"})
-    return JSONResponse(out)
+    return FastJSONResponse(out)
 
 
 def _paused_route_status(route) -> Dict[str, Any]:
@@ -1176,10 +1537,10 @@ async def _get_target_status_snapshot() -> Dict[str, Any]:
 async def api_target_status() -> Response:
     """Two-phase check: Phase1 server reachable, Phase2 API handshake OK. No auth."""
     try:
-        return JSONResponse(await _get_target_status_snapshot())
+        return FastJSONResponse(await _get_target_status_snapshot())
     except Exception as exc:
         logger.exception("target_status_failed")
-        return JSONResponse(
+        return FastJSONResponse(
             {"routes": [], "has_any_target": False, "all_ok": False, "error": str(exc)},
             status_code=200,
         )
@@ -1261,7 +1622,7 @@ async def api_portal_status() -> Response:
 
     dlq = _portal_dlq_badge()
 
-    return JSONResponse(
+    return FastJSONResponse(
         {
             "incoming": incoming,
             "forward": forward,
@@ -1276,15 +1637,15 @@ async def api_portal_status() -> Response:
 # ---------- Field mapper / patterns (optional Basic Auth) ----------
 
 @app.get("/api/pattern-schemas")
-async def api_pattern_schemas(_: Optional[str] = Depends(require_basic_auth)) -> Response:
+async def api_pattern_schemas(request: Request, _: Optional[str] = Depends(require_basic_auth)) -> Response:
     """Return built-in source schemas (OCP Alertmanager 4.20) and target fields for the mapper UI."""
-    return JSONResponse(list_schemas())
+    return await compressed(request, FastJSONResponse(list_schemas()))
 
 
 @app.get("/api/patterns")
 async def api_list_patterns(_: Optional[str] = Depends(require_basic_auth)) -> Response:
     """List all saved field-mapping patterns."""
-    return JSONResponse(list_patterns())
+    return FastJSONResponse(list_patterns())
 
 
 @app.get("/api/patterns/{pattern_id}")
@@ -1296,7 +1657,7 @@ async def api_get_pattern(
     pattern = get_pattern(pattern_id)
     if not pattern:
         raise HTTPException(status_code=404, detail="Pattern not found")
-    return JSONResponse(pattern)
+    return FastJSONResponse(pattern)
 
 
 @app.post("/api/patterns")
@@ -1339,7 +1700,7 @@ async def api_save_pattern(
         else:
             delete_pattern_data(saved["id"])
         raise HTTPException(status_code=409, detail=str(exc)) from exc
-    return JSONResponse(saved)
+    return FastJSONResponse(saved)
 
 
 @app.delete("/api/patterns/{pattern_id}")
@@ -1363,7 +1724,7 @@ async def api_delete_pattern(
             pattern_id=old["id"],
         )
         raise HTTPException(status_code=409, detail=str(exc)) from exc
-    return JSONResponse({"deleted": True})
+    return FastJSONResponse({"deleted": True})
 
 
 @app.post("/api/patterns/apply")
@@ -1382,16 +1743,16 @@ async def api_apply_pattern(
     try:
         body = await _read_json_with_limit(request)
     except Exception as e:
-        return JSONResponse({"detail": str(e)}, status_code=400)
+        return FastJSONResponse({"detail": str(e)}, status_code=400)
 
     route_name = body.get("route_name")
     if not route_name:
-        return JSONResponse({"detail": "route_name required"}, status_code=400)
+        return FastJSONResponse({"detail": "route_name required"}, status_code=400)
 
     rules = get_rules()
     route = next((r for r in rules.routes if r.name == route_name), None)
     if not route:
-        return JSONResponse({"detail": "Route not found"}, status_code=404)
+        return FastJSONResponse({"detail": "Route not found"}, status_code=404)
 
     raw_mappings = body.get("mappings")
     pattern_id = body.get("pattern_id")
@@ -1404,11 +1765,11 @@ async def api_apply_pattern(
     # Form apply: non-empty mappings — route transform from form; library row must exist (Save first).
     if raw_mappings is not None and len(raw_mappings) > 0:
         if len(raw_mappings) > 500:
-            return JSONResponse({"detail": "Too many mappings"}, status_code=400)
+            return FastJSONResponse({"detail": "Too many mappings"}, status_code=400)
         mappings = raw_mappings
         pattern_name = (body.get("pattern_name") or "").strip()
         if not pattern_name:
-            return JSONResponse(
+            return FastJSONResponse(
                 {"detail": "pattern_name required — save your pattern to the library first, then apply."},
                 status_code=400,
             )
@@ -1416,15 +1777,15 @@ async def api_apply_pattern(
         if optional_pid:
             p = get_pattern(str(optional_pid))
             if not p:
-                return JSONResponse({"detail": "Pattern not found"}, status_code=404)
+                return FastJSONResponse({"detail": "Pattern not found"}, status_code=404)
             if (p.get("name") or "").strip() != pattern_name:
-                return JSONResponse({"detail": "pattern_name does not match the selected pattern"}, status_code=400)
+                return FastJSONResponse({"detail": "pattern_name does not match the selected pattern"}, status_code=400)
             active_id = str(optional_pid)
             active_nm = p.get("name")
         else:
             existing_id = find_pattern_id_by_name(pattern_name)
             if not existing_id:
-                return JSONResponse(
+                return FastJSONResponse(
                     {
                         "detail": "No saved pattern with this name. Save the pattern in the library first, "
                         "then apply."
@@ -1433,19 +1794,19 @@ async def api_apply_pattern(
                 )
             p = get_pattern(existing_id)
             if not p:
-                return JSONResponse({"detail": "Pattern not found"}, status_code=404)
+                return FastJSONResponse({"detail": "Pattern not found"}, status_code=404)
             active_id = existing_id
             active_nm = p.get("name")
     elif pattern_id:
         pattern = get_pattern(pattern_id)
         if not pattern:
-            return JSONResponse({"detail": "Pattern not found"}, status_code=404)
+            return FastJSONResponse({"detail": "Pattern not found"}, status_code=404)
         mappings = pattern["mappings"]
         active_id = pattern_id
         active_nm = pattern.get("name")
         severity_from_resolved_status = bool(pattern.get("severity_from_resolved_status", False))
     else:
-        return JSONResponse({"detail": "Provide pattern_id or non-empty mappings"}, status_code=400)
+        return FastJSONResponse({"detail": "Provide pattern_id or non-empty mappings"}, status_code=400)
 
     try:
         new_transform = build_transform_from_mapping(
@@ -1470,17 +1831,17 @@ async def api_apply_pattern(
         CONFIG_RELOAD_TOTAL.labels(result="success").inc()
 
         out: Dict[str, Any] = {"applied": True, "route_name": route_name}
-        return JSONResponse(out)
+        return FastJSONResponse(out)
     except HTTPException:
         raise
     except Exception as e:
         logger.exception("patterns_apply_failed")
-        return JSONResponse({"detail": str(e)}, status_code=500)
+        return FastJSONResponse({"detail": str(e)}, status_code=500)
 
 
 @app.get("/metrics")
 async def metrics() -> Response:
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+    return Response(render_metrics(), media_type=CONTENT_TYPE_LATEST)
 
 
 # ---------- API Key Management (requires Basic Auth) ----------
@@ -1488,7 +1849,7 @@ async def metrics() -> Response:
 @app.get("/api/api-keys")
 async def api_list_api_keys(_: Optional[str] = Depends(require_basic_auth)) -> Response:
     """List all API keys (without exposing full key values)."""
-    return JSONResponse(get_api_keys())
+    return FastJSONResponse(get_api_keys())
 
 
 @app.post("/api/api-keys")
@@ -1526,7 +1887,7 @@ async def api_create_api_key(
     
     set_rules(rules)
     
-    return JSONResponse({
+    return FastJSONResponse({
         "name": new_key.name,
         "key": new_key.key,  # Return full key only on creation
         "created_at": new_key.created_at,
@@ -1556,7 +1917,7 @@ async def api_delete_api_key(
         raise HTTPException(status_code=409, detail=str(exc)) from exc
     
     set_rules(rules)
-    return JSONResponse({"deleted": True, "name": name})
+    return FastJSONResponse({"deleted": True, "name": name})
 
 
 @app.put("/api/api-keys/config")
@@ -1584,17 +1945,61 @@ async def api_update_api_key_config(
         raise HTTPException(status_code=409, detail=str(exc)) from exc
     
     set_rules(rules)
-    return JSONResponse({"required": required})
+    return FastJSONResponse({"required": required})
 
 
-async def _read_body_with_limit(request: Request, max_bytes: int) -> bytes:
-    """Read request body with size limit (DoS mitigation). Raises 413 if exceeded."""
-    body = b""
+def _declared_content_length(request: Request) -> Optional[int]:
+    value = request.headers.get("content-length")
+    if value is None:
+        return None
+    try:
+        length = int(value)
+    except ValueError:
+        return None
+    return length if length >= 0 else None
+
+
+async def _read_body_with_limit(request: Request, max_bytes: int) -> Union[bytes, bytearray]:
+    """
+    Read request body with size limit (DoS mitigation). Raises 413 if exceeded — before reading
+    anything when Content-Length already says so. With Content-Length the chunks are copied into one
+    preallocated bytearray; without it (chunked) they are joined once. A body that arrives in a
+    single chunk is returned as-is. The JSON codec and hmac take the result without another copy.
+    """
+    declared = _declared_content_length(request)
+    if declared is not None and declared > max_bytes:
+        raise HTTPException(status_code=413, detail="Request body too large")
+    first: Optional[bytes] = None
+    buf: Optional[bytearray] = None
+    chunks: List[bytes] = []
+    size = 0
     async for chunk in request.stream():
-        body += chunk
-        if len(body) > max_bytes:
+        if not chunk:
+            continue
+        end = size + len(chunk)
+        if end > max_bytes:
             raise HTTPException(status_code=413, detail="Request body too large")
-    return body
+        if first is None:
+            first = chunk
+        elif declared is not None and end <= declared:
+            if buf is None:
+                buf = bytearray(declared)
+                buf[:size] = first
+            memoryview(buf)[size:end] = chunk
+        else:
+            # No (or a wrong) Content-Length: collect and join once.
+            if buf is not None:
+                chunks, buf = [bytes(memoryview(buf)[:size])], None
+            elif not chunks:
+                chunks.append(first)
+            chunks.append(chunk)
+        size = end
+    if chunks:
+        return b"".join(chunks)
+    if buf is not None:
+        del buf[size:]
+        return buf
+    return first if first is not None else b""
 
 
 async def _read_json_with_limit(request: Request, max_bytes: int = MAX_CONFIG_BODY_BYTES) -> Any:
@@ -1603,7 +2008,7 @@ async def _read_json_with_limit(request: Request, max_bytes: int = MAX_CONFIG_BO
     if not raw:
         return {}
     try:
-        return json.loads(raw.decode("utf-8"))
+        return json_loads(raw)
     except json.JSONDecodeError as exc:
         logger.warning("Invalid JSON body: %s", exc)
         raise HTTPException(status_code=400, detail="Invalid JSON") from exc
@@ -1612,7 +2017,7 @@ async def _read_json_with_limit(request: Request, max_bytes: int = MAX_CONFIG_BO
 async def _get_request_json(request: Request, max_bytes: int = MAX_WEBHOOK_BODY_BYTES) -> Any:
     try:
         body = await _read_body_with_limit(request, max_bytes)
-        return json.loads(body) if body else {}
+        return json_loads(body) if body else {}
     except HTTPException:
         raise
     except Exception as exc:
@@ -1,4 +1,15 @@
-from prometheus_client import Counter, Histogram
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+
+from app.shared import SHARED
+
+# Set by app/serve.py in multi-worker mode (before prometheus_client is imported by a worker):
+# each worker writes its samples there and /metrics, /api/stats aggregate them.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR", "").strip()
 
 REQUESTS_TOTAL = Counter(
     "alertbridge_requests_total",
@@ -18,6 +29,55 @@ FORWARD_LATENCY_SECONDS = Histogram(
     ["route"],
 )
 
+WEBHOOK_STAGE_SECONDS = Histogram(
+    "alertbridge_webhook_stage_seconds",
+    "Time spent per webhook pipeline stage (summed over unrolled shards) in seconds",
+    ["stage", "route"],
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+
+WEBHOOK_SHED_TOTAL = Counter(
+    "alertbridge_webhook_shed_total",
+    "Webhooks rejected with 503 by admission control",
+    ["reason"],
+)
+
+WEBHOOK_INFLIGHT = Gauge(
+    "alertbridge_webhook_inflight",
+    "Webhook requests currently admitted",
+    multiprocess_mode="livesum",
+)
+
+WEBHOOK_BATCH_ITEMS = Histogram(
+    "alertbridge_webhook_batch_items",
+    "Payloads per POST /webhook/{source}/batch request",
+    ["route"],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500),
+)
+
+WEBHOOK_BATCH_SECONDS = Histogram(
+    "alertbridge_webhook_batch_duration_seconds",
+    "Batch webhook request time (body read through last item forwarded) in seconds",
+    ["route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+UNROUTED_ALERTS_TOTAL = Counter(
+    "alertbridge_unrouted_alerts_total",
+    "Alerts dropped because no route's match predicates selected them",
+    ["source"],
+)
+DEDUP_TOTAL = Counter(
+    "alertbridge_dedup_total",
+    "Notifications checked by a route dedup window",
+    ["route", "result"],
+)
+
+STREAM_DROPPED_TOTAL = Counter(
+    "alertbridge_stream_dropped_total",
+    "Live stream (SSE) events dropped because a subscriber queue was full",
+)
+
 CONFIG_RELOAD_TOTAL = Counter(
     "alertbridge_config_reload_total",
     "Config reload/save attempts",
@@ -31,6 +91,71 @@ HMAC_VERIFY_TOTAL = Counter(
 )
 
 
+# Bumped with every REQUESTS_TOTAL / FORWARD_TOTAL increment — ETag version of GET /api/stats.
+_stats_version = 0
+
+
+def bump_stats_version() -> None:
+    global _stats_version
+    if SHARED is not None:
+        SHARED.submit(SHARED.bump, "stats")
+        return
+    _stats_version += 1
+
+
+def stats_version() -> int:
+    """Per process; in multi-worker mode a shared counter, as /api/stats sums every worker."""
+    if SHARED is not None:
+        return SHARED.value("stats")
+    return _stats_version
+
+
+def render_metrics() -> bytes:
+    """Text exposition for /metrics; in multi-worker mode the samples of all workers combined."""
+    if not MULTIPROC_DIR:
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=MULTIPROC_DIR)
+    return generate_latest(registry)
+
+
+def _counter_values(counter: Counter) -> List[Tuple[Tuple[str, ...], float]]:
+    """(label values, value) per child of a labelled Counter, summed over workers in multi-worker mode."""
+    if not MULTIPROC_DIR:
+        return [(labels, metric._value.get()) for labels, metric in counter._metrics.items()]
+    out: List[Tuple[Tuple[str, ...], float]] = []
+    for family in multiprocess.MultiProcessCollector(None, path=MULTIPROC_DIR).collect():
+        if family.name != counter._name:
+            continue
+        for sample in family.samples:
+            if sample.name == counter._name + "_total":
+                out.append((tuple(sample.labels.get(n, "") for n in counter._labelnames), sample.value))
+    return out
+
+
+class StageTimer:
+    """Accumulates wall time per named stage for one request (a stage entered twice is summed)."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - start)
+
+    def observe(self, route: str) -> None:
+        """Export every recorded stage to WEBHOOK_STAGE_SECONDS."""
+        for name, seconds in self.stages.items():
+            WEBHOOK_STAGE_SECONDS.labels(stage=name, route=route).observe(seconds)
+
+    def breakdown_ms(self) -> Dict[str, float]:
+        return {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()}
+
+
 def get_request_stats() -> dict:
     """Return current request/forward counts for UI (from Prometheus counters)."""
     total_requests = 0
@@ -38,8 +163,8 @@ def get_request_stats() -> dict:
     by_status: dict[str, int] = {}
     forward_ok = 0
     forward_fail = 0
-    for labels, metric in REQUESTS_TOTAL._metrics.items():
-        val = int(metric._value.get())
+    for labels, value in _counter_values(REQUESTS_TOTAL):
+        val = int(value)
         total_requests += val
         # labels is (source, route, status) for REQUESTS_TOTAL
         if len(labels) >= 3:
@@ -47,8 +172,8 @@ def get_request_stats() -> dict:
             by_source[src] = by_source.get(src, 0) + val
             st = labels[2] or ""
             by_status[st] = by_status.get(st, 0) + val
-    for labels, metric in FORWARD_TOTAL._metrics.items():
-        val = int(metric._value.get())
+    for labels, value in _counter_values(FORWARD_TOTAL):
+        val = int(value)
         if len(labels) >= 2:
             res = labels[1]
             if res == "success":
@@ -0,0 +1,90 @@
+"""
+Single pure-ASGI middleware for every HTTP request: assigns the request id, injects security
+headers, times the request and writes the `request` log line (plus webhook stage metrics).
+"""
+import logging
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import StageTimer
+
+logger = logging.getLogger("alertbridge")
+
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "Referrer-Policy": "strict-origin-when-cross-origin",
+    "Content-Security-Policy": (
+        "default-src 'self'; script-src 'self'; "
+        "style-src 'self' 'unsafe-inline'; font-src 'self'; connect-src 'self'"
+    ),
+}
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers") or ():
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _stage_log_fields(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Export the webhook StageTimer (if any) to Prometheus and return stages_ms for the log line."""
+    timer: Optional[StageTimer] = state.get("stage_timer")
+    if timer is None or not timer.stages:
+        return {}
+    timer.observe(state.get("route_name") or "")
+    return {"stages_ms": timer.breakdown_ms()}
+
+
+class RequestContextMiddleware:
+    """
+    Handlers read and fill request.state (request_id, source, route_name, forward_result,
+    stage_timer), which Starlette backs with scope["state"].
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _header(scope, b"x-request-id") or str(uuid.uuid4())
+        state = scope.setdefault("state", {})
+        state.update(request_id=request_id, source=None, route_name=None, forward_result=None, stage_timer=None)
+        status = [500]
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = MutableHeaders(scope=message)
+                for name, value in SECURITY_HEADERS.items():
+                    headers[name] = value
+                headers["X-Request-ID"] = request_id
+            await send(message)
+
+        start_time = time.monotonic()
+        try:
+            await self.app(scope, receive, send_with_headers)
+        except Exception:
+            logger.exception("request_failed", extra=self._log_fields(state, 500, start_time))
+            raise
+        logger.info("request", extra=self._log_fields(state, status[0], start_time))
+
+    @staticmethod
+    def _log_fields(state: Dict[str, Any], http_status: int, start_time: float) -> Dict[str, Any]:
+        return {
+            "request_id": state.get("request_id"),
+            "source": state.get("source"),
+            "route": state.get("route_name"),
+            "forward_result": state.get("forward_result"),
+            "http_status": http_status,
+            "duration_ms": round((time.monotonic() - start_time) * 1000, 2),
+            **_stage_log_fields(state),
+        }
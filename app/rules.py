@@ -1,8 +1,10 @@
 import copy
+import itertools
 import re
-from typing import Any, Dict, List, Optional, Tuple
+import string
+from typing import Any, Callable, Dict, List, Literal, NamedTuple, Optional, Sequence, Tuple
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr, field_validator
 
 
 class Defaults(BaseModel):
@@ -10,8 +12,32 @@ class Defaults(BaseModel):
     target_timeout_read_sec: int = 5
 
 
+class LabelPredicate(BaseModel):
+    """Condition on one label/annotation value; every condition set here must hold."""
+    equals: Optional[str] = None
+    in_set: Optional[List[str]] = None
+    regex: Optional[str] = None
+    """Anchored like Alertmanager matchers (re.fullmatch)."""
+    exists: Optional[bool] = None
+    """True: key must be present; False: key must be absent."""
+
+    @field_validator("regex")
+    @classmethod
+    def _regex_compiles(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None:
+            try:
+                re.compile(value)
+            except re.error as exc:
+                raise ValueError(f"invalid regex {value!r}: {exc}") from exc
+        return value
+
+
 class MatchConfig(BaseModel):
     source: str
+    labels: Optional[Dict[str, LabelPredicate]] = None
+    """Alert label predicates (per alert when unroll_alerts, else bundle commonLabels or flat labels)."""
+    annotations: Optional[Dict[str, LabelPredicate]] = None
+    """Alert annotation predicates, same scope as labels."""
 
 
 class TargetConfig(BaseModel):
@@ -72,6 +98,46 @@ class TransformConfig(BaseModel):
     concat_templates: Optional[Dict[str, ConcatTemplateSpec]] = None
     output_template: Optional[OutputTemplate] = None
 
+    _plan: Optional["TransformPlan"] = PrivateAttr(default=None)
+
+    def plan(self) -> "TransformPlan":
+        """Compiled form of this config, built on first use (RuleSet loading warms it per route)."""
+        if self._plan is None:
+            self._plan = compile_transform(self)
+        return self._plan
+
+
+class AggregateConfig(BaseModel):
+    """Buffer transformed alerts per group key and forward each group as one payload."""
+    group_by: List[str]
+    """Paths in the transformed alert forming the group key (e.g. labels.namespace, labels.alertname)."""
+    group_wait_ms: int = Field(default=5000, ge=1)
+    max_group_size: int = Field(default=50, ge=1)
+    max_groups: int = Field(default=1000, ge=1)
+    """Open groups per route; starting one more emits the oldest early."""
+    output_template: Optional[OutputTemplate] = None
+    """Shape of the combined payload {group, count, alerts}; forwarded as-is when unset."""
+
+    _plan: Optional["TransformPlan"] = PrivateAttr(default=None)
+
+    def combine_plan(self) -> Optional["TransformPlan"]:
+        if self.output_template is None:
+            return None
+        if self._plan is None:
+            self._plan = compile_transform(TransformConfig(output_template=self.output_template))
+        return self._plan
+
+
+class DedupConfig(BaseModel):
+    """Suppress repeats of the same alert notification within ttl_sec (per route, in-process)."""
+    ttl_sec: int = Field(default=300, ge=1)
+    max_entries: int = Field(default=10000, ge=1)
+    """Alert identities remembered; least recently seen are evicted first."""
+    key_paths: Optional[List[str]] = None
+    """Paths in the transformed body forming the key; default: Alertmanager fingerprint (else labels)."""
+    pass_status_transitions: bool = True
+    """Always forward when status changed since the last notification (e.g. firing -> resolved)."""
+
 
 class RouteConfig(BaseModel):
     name: str
@@ -83,6 +149,16 @@ class RouteConfig(BaseModel):
     """If True, split payload.alerts[] and forward each alert separately (OCP Alertmanager)."""
     forward_enabled: bool = True
     """If False, accept webhooks and transform in-process but do not POST to the target (pause forwarding)."""
+    dlq_aggregate: bool = False
+    """If True, repeated DLQ failures for the same alert fingerprint keep one row (count, first_seen, last_seen)."""
+    dedup: Optional[DedupConfig] = None
+    """If set, repeats of an alert (fingerprint + status) within dedup.ttl_sec are not forwarded."""
+    forward_mode: Literal["all", "transitions_only"] = "all"
+    """transitions_only: forward an alert only when it is new or its status changed (see alert state table)."""
+    heartbeat_sec: Optional[int] = Field(default=None, ge=1)
+    """With transitions_only: re-send an unchanged alert once this long after it was last forwarded."""
+    aggregate: Optional[AggregateConfig] = None
+    """If set, transformed alerts are grouped for up to aggregate.group_wait_ms and forwarded per group."""
     active_pattern_id: Optional[str] = None
     """Set when a saved pattern is applied to this route via /api/patterns/apply (for UI clarity)."""
     active_pattern_name: Optional[str] = None
@@ -129,17 +205,28 @@ class RuleSet(BaseModel):
     routes: List[RouteConfig] = Field(default_factory=list)
     auth: Optional[AuthConfig] = None
 
+    _dispatch: Optional["RouteDispatch"] = PrivateAttr(default=None)
+
+    def dispatch(self) -> "RouteDispatch":
+        """Compiled route index; rebuilt when `routes` is replaced (model_copy keeps private attrs)."""
+        if self._dispatch is None or self._dispatch.routes is not self.routes:
+            self._dispatch = RouteDispatch(self.routes)
+        return self._dispatch
+
 
 _PATH_SEGMENT = re.compile(r"([^\[\]]+)(?:\[(\d+)\])?")
+# Parsed path: (key, optional [n] index) per dot-separated part.
+Segments = Sequence[Tuple[str, Optional[int]]]
 MAX_PATH_DEPTH = 20
 MAX_ARRAY_INDEX = 10000
 
 
-def select_route(rules: RuleSet, source: str) -> Optional[RouteConfig]:
-    for route in rules.routes:
-        if route.match.source == source:
-            return route
-    return None
+def select_route(rules: RuleSet, source: str, payload: Any = None) -> Optional[RouteConfig]:
+    """
+    Without payload: the first route for source (auth, HMAC and unroll settings apply per inbound path).
+    With payload: the first route for source whose label/annotation predicates match it, or None.
+    """
+    return rules.dispatch().select(source, payload)
 
 
 def _is_effectively_empty(value: Any) -> bool:
@@ -193,6 +280,11 @@ def _apply_coalesce_sources(working: Any, coalesce: Dict[str, List[str]]) -> Any
 
 
 def transform_payload(payload: Any, route: RouteConfig) -> Any:
+    return run_transform_plan(payload, route.transform.plan())
+
+
+def interpret_transform(payload: Any, route: RouteConfig) -> Any:
+    """Reference interpreter over TransformConfig (re-parses every path); transform_payload runs the compiled plan."""
     working = copy.deepcopy(payload)
     config = route.transform
 
@@ -239,6 +331,15 @@ def transform_payload(payload: Any, route: RouteConfig) -> Any:
     return working
 
 
+def unroll_alert_bundle(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    One shard per alerts[] entry, each carrying a single-item alerts list. Shards are shallow views:
+    groupLabels, commonLabels, commonAnnotations, externalURL and the alert objects are shared with
+    the bundle, so callers must not mutate them (transform_payload copies whatever it changes).
+    """
+    return [{**payload, "alerts": [alert]} for alert in payload["alerts"]]
+
+
 def _force_resolved_status_to_severity(payload: Any) -> None:
     """
     If status is resolved, force severity to clear.
@@ -249,14 +350,14 @@ def _force_resolved_status_to_severity(payload: Any) -> None:
     status = _extract_status_text(payload)
     if status != "resolved":
         return
-    _set_by_path(payload, "severity", "clear")
+    _set_by_segments(payload, _SEVERITY_SEGMENTS, "clear")
     if isinstance(payload.get("labels"), dict):
-        _set_by_path(payload, "labels.severity", "clear")
+        _set_by_segments(payload, _LABELS_SEVERITY_SEGMENTS, "clear")
 
 
 def _extract_status_text(payload: Dict[str, Any]) -> str:
-    for p in ("status", "alerts.0.status"):
-        found, value = _get_by_path(payload, p)
+    for segs in _STATUS_SEGMENTS:
+        found, value = _get_by_segments(payload, segs)
         if found and isinstance(value, str):
             s = value.strip().lower()
             if s:
@@ -264,21 +365,67 @@ def _extract_status_text(payload: Dict[str, Any]) -> str:
     return ""
 
 
+_SENSITIVE_KEY_WORDS = ("secret", "token", "auth", "password", "key")
+# Key -> masked? Payload keys repeat across alerts and requests; the memo is capped so odd keys
+# (e.g. label names generated per alert) cannot grow it without bound.
+_KEY_VERDICT_MAX = 4096
+_key_verdicts: Dict[str, bool] = {}
+
+
+def _is_sensitive_key(key: str) -> bool:
+    verdict = _key_verdicts.get(key)
+    if verdict is None:
+        lowered = key.lower()
+        verdict = any(word in lowered for word in _SENSITIVE_KEY_WORDS)
+        if len(_key_verdicts) < _KEY_VERDICT_MAX:
+            _key_verdicts[key] = verdict
+    return verdict
+
+
 def sanitize_payload(payload: Any) -> Any:
-    sensitive_keys = ("secret", "token", "auth", "password", "key")
+    """
+    Mask values under sensitive keys with "***". Copy-on-change: a dict or list with nothing to mask
+    is returned as-is, so the result may share subtrees with the input and must be treated as read-only.
+    """
     if isinstance(payload, dict):
-        sanitized = {}
-        for key, value in payload.items():
-            if any(word in key.lower() for word in sensitive_keys):
-                sanitized[key] = "***"
-            else:
-                sanitized[key] = sanitize_payload(value)
-        return sanitized
+        sanitized: Optional[Dict[str, Any]] = None
+        for i, (key, value) in enumerate(payload.items()):
+            new = "***" if _is_sensitive_key(key) else sanitize_payload(value)
+            if sanitized is None:
+                if new is value:
+                    continue
+                sanitized = dict(itertools.islice(payload.items(), i))
+            sanitized[key] = new
+        return payload if sanitized is None else sanitized
     if isinstance(payload, list):
-        return [sanitize_payload(item) for item in payload]
+        items: Optional[List[Any]] = None
+        for i, item in enumerate(payload):
+            new = sanitize_payload(item)
+            if items is None:
+                if new is item:
+                    continue
+                items = payload[:i]
+            items.append(new)
+        return payload if items is None else items
     return payload
 
 
+class SanitizeCache:
+    """Per-request memo: each object is sanitized once and the result is shared by every consumer."""
+
+    def __init__(self) -> None:
+        # id(obj) -> (obj, sanitized); holding obj keeps its id from being reused meanwhile.
+        self._done: Dict[int, Tuple[Any, Any]] = {}
+
+    def __call__(self, payload: Any) -> Any:
+        hit = self._done.get(id(payload))
+        if hit is not None and hit[0] is payload:
+            return hit[1]
+        result = sanitize_payload(payload)
+        self._done[id(payload)] = (payload, result)
+        return result
+
+
 def _apply_include_fields(payload: Any, paths: List[str]) -> Any:
     if not isinstance(payload, dict):
         return payload
@@ -331,8 +478,12 @@ def _parse_path(path: str) -> List[Tuple[str, Optional[int]]]:
 
 
 def _get_by_path(data: Any, path: str) -> Tuple[bool, Any]:
+    return _get_by_segments(data, _parse_path(path))
+
+
+def _get_by_segments(data: Any, segments: Segments) -> Tuple[bool, Any]:
     current = data
-    for key, idx in _parse_path(path):
+    for key, idx in segments:
         if isinstance(current, dict) and key in current:
             current = current[key]
         elif isinstance(current, list) and key.isdigit():
@@ -352,10 +503,13 @@ def _get_by_path(data: Any, path: str) -> Tuple[bool, Any]:
 
 
 def _set_by_path(data: Any, path: str, value: Any) -> None:
+    _set_by_segments(data, _parse_path(path), value)
+
+
+def _set_by_segments(data: Any, segments: Segments, value: Any) -> None:
     if not isinstance(data, dict):
         return
     current: Any = data
-    segments = _parse_path(path)
     for i, (key, idx) in enumerate(segments):
         is_last = i == len(segments) - 1
         if idx is None:
@@ -406,10 +560,13 @@ def _set_by_path(data: Any, path: str, value: Any) -> None:
 
 
 def _delete_by_path(data: Any, path: str) -> None:
+    _delete_by_segments(data, _parse_path(path))
+
+
+def _delete_by_segments(data: Any, segments: Segments) -> None:
     if not isinstance(data, dict):
         return
     current: Any = data
-    segments = _parse_path(path)
     for i, (key, idx) in enumerate(segments):
         is_last = i == len(segments) - 1
         if not isinstance(current, dict) or key not in current:
@@ -428,3 +585,439 @@ def _delete_by_path(data: Any, path: str) -> None:
                 current = current[idx]
             else:
                 return
+
+
+_STATUS_SEGMENTS = (_parse_path("status"), _parse_path("alerts.0.status"))
+_SEVERITY_SEGMENTS = _parse_path("severity")
+_LABELS_SEVERITY_SEGMENTS = _parse_path("labels.severity")
+
+
+# ---------- Compiled transform plans ----------
+#
+# compile_transform() turns a TransformConfig into a TransformPlan once: every path is parsed into a
+# segment tuple, steps are resolved to functions in interpreter order, and concat templates that can
+# never format are detected up front. run_transform_plan() must stay output-identical to
+# interpret_transform(); tests/test_rules.py runs every case through both.
+
+
+class TransformPlan(NamedTuple):
+    steps: Tuple[Tuple[Callable[[Any, Any], Any], Any], ...]
+    output_fields: Optional[Tuple[Tuple[Segments, Any], ...]]
+    severity_from_resolved_status: bool
+    # Projection-first: build the working dict from include_fields (or read output_template selectors)
+    # straight off the inbound payload instead of deep-copying all of it first.
+    projects_include: bool = False
+    reads_input_only: bool = False
+
+
+def _segs(path: str) -> Tuple[Tuple[str, Optional[int]], ...]:
+    return tuple(_parse_path(path))
+
+
+def _template_always_fails(template: str, nargs: int) -> bool:
+    """True when str.format(*nargs strings) raises whatever the values are (malformed or missing args)."""
+    auto = 0
+    manual = False
+    try:
+        for _, field_name, format_spec, _ in string.Formatter().parse(template):
+            if field_name is None:
+                continue
+            first = re.split(r"[.\[]", field_name, maxsplit=1)[0]
+            if first == "":
+                if manual:
+                    return True
+                auto += 1
+                if auto > nargs:
+                    return True
+            elif first.isdigit():
+                if auto:
+                    return True
+                manual = True
+                if int(first) >= nargs:
+                    return True
+            else:
+                return True
+            if format_spec and "{" in format_spec:
+                # Nested replacement fields: leave to runtime, like the interpreter.
+                return False
+    except ValueError:
+        return True
+    return False
+
+
+def _step_include(working: Any, paths: Tuple[Segments, ...]) -> Any:
+    if not isinstance(working, dict):
+        return working
+    result: Dict[str, Any] = {}
+    for segs in paths:
+        found, value = _get_by_segments(working, segs)
+        if found:
+            _set_by_segments(result, segs, value)
+    return result
+
+
+def _step_coalesce(working: Any, items: Tuple[Tuple[Segments, Tuple[Segments, ...]], ...]) -> Any:
+    if not isinstance(working, dict):
+        return working
+    for target, paths in items:
+        chosen: Any = None
+        for segs in paths:
+            found, value = _get_by_segments(working, segs)
+            if found and not _is_effectively_empty(value):
+                chosen = value
+                break
+        if chosen is None:
+            for segs in paths:
+                found, value = _get_by_segments(working, segs)
+                if found:
+                    chosen = value
+                    break
+        if chosen is not None:
+            _set_by_segments(working, target, chosen)
+    return working
+
+
+def _step_drop(working: Any, paths: Tuple[Segments, ...]) -> Any:
+    for segs in paths:
+        _delete_by_segments(working, segs)
+    return working
+
+
+def _step_rename(working: Any, pairs: Tuple[Tuple[Segments, Segments], ...]) -> Any:
+    for src, dst in pairs:
+        found, value = _get_by_segments(working, src)
+        if found:
+            _set_by_segments(working, dst, value)
+            _delete_by_segments(working, src)
+    return working
+
+
+def _step_enrich(working: Any, pairs: Tuple[Tuple[Segments, Any], ...]) -> Any:
+    if isinstance(working, dict):
+        for segs, value in pairs:
+            _set_by_segments(working, segs, value)
+    return working
+
+
+def _step_concat(working: Any, items: Tuple[Tuple[Segments, str, Tuple[Segments, ...], bool], ...]) -> Any:
+    if not isinstance(working, dict):
+        return working
+    for target, template, paths, always_fails in items:
+        parts: List[str] = []
+        for segs in paths:
+            found, value = _get_by_segments(working, segs)
+            parts.append("" if not found or value is None else str(value))
+        if always_fails:
+            text = ""
+        else:
+            try:
+                text = template.format(*parts)
+            except (IndexError, KeyError, ValueError):
+                text = ""
+        _set_by_segments(working, target, text)
+    return working
+
+
+def _step_map_values(working: Any, items: Tuple[Tuple[Segments, Dict[str, str]], ...]) -> Any:
+    for segs, mapping in items:
+        found, value = _get_by_segments(working, segs)
+        if found and value in mapping:
+            _set_by_segments(working, segs, mapping[value])
+    return working
+
+
+def _step_resolved_severity(working: Any, _: Any) -> Any:
+    _force_resolved_status_to_severity(working)
+    return working
+
+
+_WHOLE_PAYLOAD = object()
+
+
+def _compile_selector(selector: str) -> Any:
+    if selector == "$":
+        return _WHOLE_PAYLOAD
+    if not selector.startswith("$."):
+        return None
+    return _segs(selector[2:])
+
+
+def compile_transform(config: TransformConfig) -> TransformPlan:
+    """Build the immutable TransformPlan for one TransformConfig (same step order as interpret_transform)."""
+    steps: List[Tuple[Callable[[Any, Any], Any], Any]] = []
+    if config.include_fields:
+        steps.append((_step_include, tuple(_segs(p) for p in config.include_fields)))
+    if config.coalesce_sources:
+        steps.append(
+            (
+                _step_coalesce,
+                tuple((_segs(t), tuple(_segs(p) for p in paths)) for t, paths in config.coalesce_sources.items() if paths),
+            )
+        )
+    if config.drop_fields:
+        steps.append((_step_drop, tuple(_segs(p) for p in config.drop_fields)))
+    if config.rename:
+        steps.append((_step_rename, tuple((_segs(src), _segs(dst)) for src, dst in config.rename.items())))
+    if config.enrich_static:
+        steps.append((_step_enrich, tuple((_segs(p), v) for p, v in config.enrich_static.items())))
+    if config.concat_templates:
+        steps.append(
+            (
+                _step_concat,
+                tuple(
+                    (
+                        _segs(target),
+                        spec.template,
+                        tuple(_segs(p) for p in spec.paths),
+                        _template_always_fails(spec.template, len(spec.paths)),
+                    )
+                    for target, spec in config.concat_templates.items()
+                ),
+            )
+        )
+    if config.map_values:
+        steps.append((_step_map_values, tuple((_segs(p), m) for p, m in config.map_values.items())))
+    if config.severity_from_resolved_status:
+        steps.append((_step_resolved_severity, None))
+    output_fields = None
+    if config.output_template:
+        output_fields = tuple(
+            (_segs(target), _compile_selector(selector)) for target, selector in config.output_template.fields.items()
+        )
+    return TransformPlan(
+        steps=tuple(steps),
+        output_fields=output_fields,
+        severity_from_resolved_status=config.severity_from_resolved_status,
+        projects_include=bool(steps) and steps[0][0] is _step_include,
+        reads_input_only=not steps and output_fields is not None,
+    )
+
+
+def _copy_value(value: Any, memo: Dict[int, Any]) -> Any:
+    """Deep-copy containers only; one memo per payload keeps shared subtrees shared, as after one deepcopy."""
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value, memo)
+    return value
+
+
+# Batch-wide cache for _resolve_shared: (slot, id(top-level value)) -> (found, value).
+_SharedLookups = Dict[Tuple[Any, int], Tuple[bool, Any]]
+
+
+def _resolve_shared(payload: Any, segs: Segments, slot: Any, cache: _SharedLookups) -> Tuple[bool, Any]:
+    """
+    _get_by_segments on an inbound payload. A nested path's result depends only on the top-level
+    value it starts from, so shards sharing e.g. commonLabels resolve that path once per batch.
+    """
+    if len(segs) > 1 and isinstance(payload, dict):
+        top = payload.get(segs[0][0])
+        if isinstance(top, (dict, list)):
+            key = (slot, id(top))
+            hit = cache.get(key)
+            if hit is None:
+                hit = cache[key] = _get_by_segments(payload, segs)
+            return hit
+    return _get_by_segments(payload, segs)
+
+
+def _project_include(
+    payload: Dict[str, Any], paths: Tuple[Segments, ...], memo: Dict[int, Any], cache: _SharedLookups
+) -> Dict[str, Any]:
+    result: Dict[str, Any] = {}
+    for i, segs in enumerate(paths):
+        found, value = _resolve_shared(payload, segs, ("include", i), cache)
+        if found:
+            _set_by_segments(result, segs, _copy_value(value, memo))
+    return result
+
+
+def _render_output(
+    working: Any, plan: TransformPlan, shared: bool, memo: Dict[int, Any], cache: _SharedLookups
+) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for i, (target, selector) in enumerate(plan.output_fields or ()):
+        if selector is _WHOLE_PAYLOAD:
+            value = working
+        elif selector is None:
+            value = None
+        else:
+            if shared:
+                found, value = _resolve_shared(working, selector, ("output", i), cache)
+            else:
+                found, value = _get_by_segments(working, selector)
+            if not found:
+                value = None
+        if shared:
+            value = _copy_value(value, memo)
+        _set_by_segments(out, target, value)
+    if plan.severity_from_resolved_status:
+        _force_resolved_status_to_severity(out)
+    return out
+
+
+def run_transform_plan(payload: Any, plan: TransformPlan) -> Any:
+    return run_transform_plan_many([payload], plan)[0]
+
+
+def run_transform_plan_many(payloads: Sequence[Any], plan: TransformPlan) -> List[Any]:
+    """
+    Apply a compiled plan to each payload, one step at a time across the whole batch. Inbound payloads
+    are never mutated: only the subtrees that end up in a result are copied when the plan starts with
+    include_fields or is a bare output_template; any other plan deep-copies each payload once, like
+    the interpreter.
+    """
+    cache: _SharedLookups = {}
+    memos: List[Dict[int, Any]] = [{} for _ in payloads]
+    steps = plan.steps
+    shared = False
+    if plan.projects_include:
+        # The include step is a no-op on non-dict payloads, so skipping it for those is equivalent.
+        paths = steps[0][1]
+        steps = steps[1:]
+        workings = [
+            _project_include(p, paths, memo, cache) if isinstance(p, dict) else copy.deepcopy(p)
+            for p, memo in zip(payloads, memos)
+        ]
+    elif plan.reads_input_only:
+        workings = list(payloads)
+        shared = True
+    else:
+        workings = [copy.deepcopy(p) for p in payloads]
+    for step, arg in steps:
+        workings = [step(w, arg) for w in workings]
+    if plan.output_fields is None:
+        return workings
+    return [_render_output(w, plan, shared, memo, cache) for w, memo in zip(workings, memos)]
+
+
+def transform_many(payloads: Sequence[Any], route: RouteConfig) -> List[Any]:
+    """transform_payload for a batch (e.g. the shards of one unrolled bundle); outputs keep input order."""
+    return run_transform_plan_many(payloads, route.transform.plan())
+
+
+def compile_route_plans(rules: RuleSet) -> None:
+    """Compile every route's transform and the route index up front so the webhook path never parses paths."""
+    for route in rules.routes:
+        route.transform.plan()
+        if route.aggregate is not None:
+            route.aggregate.combine_plan()
+    rules.dispatch()
+
+
+# ---------- Content-based route dispatch ----------
+
+_MISSING = object()
+
+
+def _match_fields(payload: Any) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """(labels, annotations) routed on: the single alert of a shard, a bundle's common*, or flat fields."""
+    if not isinstance(payload, dict):
+        return {}, {}
+    source: Any = payload
+    alerts = payload.get("alerts")
+    if isinstance(alerts, list) and alerts:
+        if len(alerts) == 1 and isinstance(alerts[0], dict):
+            source = alerts[0]
+        else:
+            labels, annotations = payload.get("commonLabels"), payload.get("commonAnnotations")
+            return (
+                labels if isinstance(labels, dict) else {},
+                annotations if isinstance(annotations, dict) else {},
+            )
+    labels, annotations = source.get("labels"), source.get("annotations")
+    return labels if isinstance(labels, dict) else {}, annotations if isinstance(annotations, dict) else {}
+
+
+def _predicate_test(pred: LabelPredicate) -> Callable[[Any], bool]:
+    checks: List[Callable[[Any], bool]] = []
+    if pred.exists is not None:
+        want = pred.exists
+        checks.append(lambda v: (v is not _MISSING) is want)
+    if pred.equals is not None:
+        equals = pred.equals
+        checks.append(lambda v: v is not _MISSING and v is not None and str(v) == equals)
+    if pred.in_set is not None:
+        allowed = frozenset(pred.in_set)
+        checks.append(lambda v: v is not _MISSING and v is not None and str(v) in allowed)
+    if pred.regex is not None:
+        pattern = re.compile(pred.regex)
+        checks.append(lambda v: v is not _MISSING and v is not None and pattern.fullmatch(str(v)) is not None)
+    return lambda v: all(check(v) for check in checks)
+
+
+class _SourceIndex:
+    """Routes of one source: hash tables on equals / in_set values, plus routes that must be scanned."""
+
+    __slots__ = ("entry", "routes", "exact", "scan")
+
+    def __init__(self) -> None:
+        self.entry: Optional[RouteConfig] = None
+        # position -> (route, ((field kind, name, test), ...))
+        self.routes: List[Tuple[RouteConfig, Tuple[Tuple[int, str, Callable[[Any], bool]], ...]]] = []
+        # (field kind, name) -> value -> positions; each route is indexed under one equals/in_set key.
+        self.exact: Dict[Tuple[int, str], Dict[str, List[int]]] = {}
+        self.scan: List[int] = []
+
+    def add(self, route: RouteConfig) -> None:
+        if self.entry is None:
+            self.entry = route
+        pos = len(self.routes)
+        tests = []
+        key: Optional[Tuple[Tuple[int, str], List[str]]] = None
+        for kind, preds in enumerate((route.match.labels, route.match.annotations)):
+            for name, pred in (preds or {}).items():
+                tests.append((kind, name, _predicate_test(pred)))
+                if key is None:
+                    if pred.equals is not None:
+                        key = ((kind, name), [pred.equals])
+                    elif pred.in_set is not None:
+                        key = ((kind, name), list(pred.in_set))
+        self.routes.append((route, tuple(tests)))
+        if key is None:
+            self.scan.append(pos)
+            return
+        table = self.exact.setdefault(key[0], {})
+        for value in key[1]:
+            positions = table.setdefault(value, [])
+            if not positions or positions[-1] != pos:
+                positions.append(pos)
+
+    def select(self, payload: Any) -> Optional[RouteConfig]:
+        fields = _match_fields(payload)
+        candidates = list(self.scan)
+        for (kind, name), table in self.exact.items():
+            value = fields[kind].get(name)
+            if value is not None:
+                hits = table.get(str(value))
+                if hits:
+                    candidates.extend(hits)
+        if len(candidates) > 1:
+            candidates.sort()
+        for pos in candidates:
+            route, tests = self.routes[pos]
+            if all(test(fields[kind].get(name, _MISSING)) for kind, name, test in tests):
+                return route
+        return None
+
+
+class RouteDispatch:
+    """
+    Route index for one RuleSet: source -> routes in config order. Exact (equals / in_set) predicates
+    are looked up by value, so a route keyed on e.g. labels.severity costs one hash lookup however
+    many routes there are; only regex/exists-only routes and catch-alls are scanned. First match in
+    config order wins, as with the former linear scan.
+    """
+
+    def __init__(self, routes: List[RouteConfig]) -> None:
+        self.routes = routes
+        self._sources: Dict[str, _SourceIndex] = {}
+        for route in routes:
+            self._sources.setdefault(route.match.source, _SourceIndex()).add(route)
+
+    def select(self, source: str, payload: Any = None) -> Optional[RouteConfig]:
+        index = self._sources.get(source)
+        if index is None:
+            return None
+        if payload is None:
+            return index.entry
+        return index.select(payload)
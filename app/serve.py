@@ -0,0 +1,43 @@
+"""
+Container entrypoint: `python -m app.serve`. One uvicorn process by default; ALERTBRIDGE_WORKERS > 1
+starts that many workers on the same port. Multi-worker mode shares feeds, circuit breaker state,
+the stats version and applied rules through ALERTBRIDGE_SHARED_DIR (app/shared.py), collects
+Prometheus samples of all workers (PROMETHEUS_MULTIPROC_DIR) and flock()s DLQ / daily / success-log
+writes (app/filelock.py).
+"""
+import glob
+import os
+import shutil
+
+import uvicorn
+
+DEFAULT_SHARED_DIR = "/tmp/alertbridge-shared"
+
+
+def prepare_shared_dir(shared_dir: str) -> None:
+    """Start from empty shared state (like a restart of one process) and point workers at it."""
+    os.makedirs(shared_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(shared_dir, "state.db*")):
+        os.unlink(path)
+    prom_dir = os.path.join(shared_dir, "prometheus")
+    shutil.rmtree(prom_dir, ignore_errors=True)
+    os.makedirs(prom_dir)
+    # Read at import time by the workers (spawned after this), before prometheus_client loads.
+    os.environ["ALERTBRIDGE_SHARED_DIR"] = shared_dir
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = prom_dir
+
+
+def main() -> None:
+    workers = max(1, int(os.getenv("ALERTBRIDGE_WORKERS", "1")))
+    if workers > 1:
+        prepare_shared_dir(os.getenv("ALERTBRIDGE_SHARED_DIR", "").strip() or DEFAULT_SHARED_DIR)
+    uvicorn.run(
+        "app.main:app",
+        host=os.getenv("ALERTBRIDGE_HOST", "0.0.0.0"),
+        port=int(os.getenv("ALERTBRIDGE_PORT", "8080")),
+        workers=workers,
+    )
+
+
+if __name__ == "__main__":
+    main()
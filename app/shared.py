@@ -0,0 +1,177 @@
+"""
+State shared by the workers of multi-worker mode (ALERTBRIDGE_WORKERS > 1, started by app/serve.py):
+UI feed rows, circuit breaker state, the /api/stats version and the applied rules live in one SQLite
+database under ALERTBRIDGE_SHARED_DIR. Without that variable SHARED is None and every module keeps
+its in-process state as before.
+"""
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.codec import dumps, loads
+
+SHARED_DIR = os.getenv("ALERTBRIDGE_SHARED_DIR", "").strip()
+# How often a worker picks up rules and feed rows published by the others.
+SHARED_SYNC_SEC = int(os.getenv("ALERTBRIDGE_SHARED_SYNC_MS", "1000")) / 1000
+# Feed rows beyond maxlen are deleted every this many appends to a feed per worker.
+_TRIM_EVERY = 16
+# Writes waiting for the writer thread; past this (store stalled) new ones are dropped and logged.
+_WRITE_QUEUE_MAX = 10000
+
+_logger = logging.getLogger("alertbridge")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS feed_rows ("
+    " seq INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, pid INTEGER NOT NULL, record BLOB NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS feed_rows_name_seq ON feed_rows (name, seq)",
+    "CREATE TABLE IF NOT EXISTS circuit (route TEXT PRIMARY KEY, state BLOB NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL, text TEXT)",
+)
+
+
+class SharedStore:
+    """
+    SQLite (WAL) store; one connection per thread, opened on first use in each worker. Writes made
+    for a webhook go through submit(), so lock waits on another worker's transaction never block the
+    event loop.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._appends: Dict[str, int] = {}
+        self._queue: "queue.Queue[Tuple[Callable[..., Any], Tuple[Any, ...]]]" = queue.Queue(_WRITE_QUEUE_MAX)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for stmt in _SCHEMA:
+                conn.execute(stmt)
+            self._local.conn = conn
+        return conn
+
+    # ---- writer thread -----------------------------------------------------------------------
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> None:
+        """Run `fn(*args)` on this store's writer thread, in submission order."""
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="shared-writer", daemon=True)
+                self._writer.start()
+        try:
+            self._queue.put_nowait((fn, args))
+        except queue.Full:
+            _logger.warning("shared_write_dropped fn=%s: writer queue full", getattr(fn, "__name__", fn))
+
+    def _write_loop(self) -> None:
+        while True:
+            fn, args = self._queue.get()
+            try:
+                fn(*args)
+            except Exception as exc:
+                _logger.warning("shared_write_failed fn=%s: %s", getattr(fn, "__name__", fn), exc)
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Wait for the submitted writes (shutdown, tests)."""
+        self._queue.join()
+
+    # ---- feeds -------------------------------------------------------------------------------
+
+    def feed_append(self, name: str, record: bytes, maxlen: int) -> int:
+        conn = self._conn()
+        seq = conn.execute(
+            "INSERT INTO feed_rows (name, pid, record) VALUES (?, ?, ?)", (name, os.getpid(), record)
+        ).lastrowid
+        appends = self._appends.get(name, 0) + 1
+        self._appends[name] = appends
+        if appends % _TRIM_EVERY == 0:
+            conn.execute(
+                "DELETE FROM feed_rows WHERE name = ? AND seq <= ("
+                " SELECT seq FROM feed_rows WHERE name = ? ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+                (name, name, maxlen),
+            )
+        return int(seq)
+
+    def feed_rows(self, name: str, limit: int, after: int = 0) -> List[Tuple[int, int, bytes]]:
+        """(seq, pid, record) of the newest `limit` rows with seq > after, newest first."""
+        return self._conn().execute(
+            "SELECT seq, pid, record FROM feed_rows WHERE name = ? AND seq > ? ORDER BY seq DESC LIMIT ?",
+            (name, after, limit),
+        ).fetchall()
+
+    def feed_version(self, name: str) -> int:
+        row = self._conn().execute("SELECT MAX(seq) FROM feed_rows WHERE name = ?", (name,)).fetchone()
+        return int(row[0] or 0)
+
+    def feed_clear(self, name: str) -> None:
+        self._conn().execute("DELETE FROM feed_rows WHERE name = ?", (name,))
+
+    # ---- circuit breaker ---------------------------------------------------------------------
+
+    def circuit_get(self, route: str) -> Dict[str, Any]:
+        row = self._conn().execute("SELECT state FROM circuit WHERE route = ?", (route,)).fetchone()
+        return loads(row[0]) if row else {}
+
+    def circuit_update(self, route: str, change: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Apply `change` to the route's state dict (in place) in one write transaction."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT state FROM circuit WHERE route = ?", (route,)).fetchone()
+            state = loads(row[0]) if row else {}
+            result = change(state)
+            conn.execute("INSERT OR REPLACE INTO circuit (route, state) VALUES (?, ?)", (route, dumps(state)))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    # ---- counters and published text ---------------------------------------------------------
+
+    def bump(self, key: str) -> None:
+        self._conn().execute(
+            "INSERT INTO meta (key, value) VALUES (?, 1) ON CONFLICT (key) DO UPDATE SET value = value + 1",
+            (key,),
+        )
+
+    def value(self, key: str) -> int:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def publish_text(self, key: str, text: str) -> int:
+        """Store `text` under a new generation of `key`; returns that generation."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO meta (key, value, text) VALUES (?, 1, ?)"
+                " ON CONFLICT (key) DO UPDATE SET value = value + 1, text = excluded.text",
+                (key, text),
+            )
+            generation = self.value(key)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return generation
+
+    def text_since(self, key: str, generation: int) -> Tuple[int, Optional[str]]:
+        """(generation, text) when `key` was published after `generation`, else (generation, None)."""
+        row = self._conn().execute(
+            "SELECT value, text FROM meta WHERE key = ? AND value > ?", (key, generation)
+        ).fetchone()
+        return (int(row[0]), row[1]) if row else (generation, None)
+
+
+SHARED: Optional[SharedStore] = SharedStore(os.path.join(SHARED_DIR, "state.db")) if SHARED_DIR else None
@@ -154,6 +154,7 @@ let customSourceFields = [];
 let mapperMergeListenersAttached = false;
 let rateHistory = [];
 let lastTotalRequests = null;
+let statsSnapshot = {};
 let configJson = null;
 /** In-cluster webhook base from GET /api/in-cluster-webhook-base (HTTP Service URL). */
 let internalWebhookBase = null;
@@ -1080,36 +1081,41 @@ async function loadStatsAndChart() {
       if (statsStatus) statsStatus.textContent = "Could not load count";
       return;
     }
-    const data = await response.json();
-    const total = data.total_requests ?? 0;
-
-    let rate = 0;
-    if (lastTotalRequests != null) {
-      rate = Math.max(0, total - lastTotalRequests);
-    }
-    lastTotalRequests = total;
-    rateHistory.push(rate);
-    while (rateHistory.length > RATE_HISTORY_MAX) rateHistory.shift();
-
-    if (heartbeatLabel) heartbeatLabel.textContent = rate + " req/s";
-    drawHeartbeatChart(rateHistory);
-
-    if (statsTotal) statsTotal.textContent = String(total);
-    const bySource = data.by_source || {};
-    if (statsBySource) statsBySource.textContent = Object.keys(bySource).length
-      ? Object.entries(bySource)
-          .map(([k, v]) => `${k}: ${v}`)
-          .join(", ")
-      : "-";
-    if (statsForwardOk) statsForwardOk.textContent = String(data.forward_success ?? 0);
-    if (statsForwardFail) statsForwardFail.textContent = String(data.forward_fail ?? 0);
-    if (statsForwardSkipped) statsForwardSkipped.textContent = String(data.forward_skipped ?? 0);
-    if (statsStatus) statsStatus.textContent = "Last updated";
+    renderStats(await response.json());
   } catch (err) {
     if (statsStatus) statsStatus.textContent = "Failed to load count";
   }
 }
 
+/** Render /api/stats (full object, or the snapshot merged with a live-stream delta). */
+function renderStats(data) {
+  statsSnapshot = data;
+  const total = data.total_requests ?? 0;
+
+  let rate = 0;
+  if (lastTotalRequests != null) {
+    rate = Math.max(0, total - lastTotalRequests);
+  }
+  lastTotalRequests = total;
+  rateHistory.push(rate);
+  while (rateHistory.length > RATE_HISTORY_MAX) rateHistory.shift();
+
+  if (heartbeatLabel) heartbeatLabel.textContent = rate + " req/s";
+  drawHeartbeatChart(rateHistory);
+
+  if (statsTotal) statsTotal.textContent = String(total);
+  const bySource = data.by_source || {};
+  if (statsBySource) statsBySource.textContent = Object.keys(bySource).length
+    ? Object.entries(bySource)
+        .map(([k, v]) => `${k}: ${v}`)
+        .join(", ")
+    : "-";
+  if (statsForwardOk) statsForwardOk.textContent = String(data.forward_success ?? 0);
+  if (statsForwardFail) statsForwardFail.textContent = String(data.forward_fail ?? 0);
+  if (statsForwardSkipped) statsForwardSkipped.textContent = String(data.forward_skipped ?? 0);
+  if (statsStatus) statsStatus.textContent = "Last updated";
+}
+
 function renderLiveRequests(list) {
   if (!liveRequestsBody || !liveRequestsEmpty) return;
   const pageSize = Number(document.getElementById("livePageSize")?.value || 10);
@@ -2547,36 +2553,106 @@ async function loadRecentSent() {
     if (!res.ok) return;
     const list = await res.json();
     recentSentCache = Array.isArray(list) ? list : [];
-    const q = recentSentSearch ? recentSentSearch.value.trim() : "";
-    const items = filterRecentSent(recentSentCache, q);
-    if (items.length === 0) {
-      recentSentList.innerHTML = q
-        ? `<li class="text-muted">${escapeHtml(tr("noMatchesForSearch"))}</li>`
-        : "<li class=\"text-muted\">No successfully forwarded payloads yet. Send webhooks and they will appear here after transform + forward.</li>";
-    } else {
-      recentSentList.innerHTML = items.map((item, idx) =>
-        `<li class="recent-sent-item${idx === 0 ? " recent-sent-latest" : ""}">
-          <div class="payload-header">
-            <span class="payload-ts">${formatTimeGMT7(item.ts)}</span>
-            ${idx === 0 ? `<span class="recent-sent-latest-badge">${escapeHtml(tr("recentSentLatestBadge"))}</span>` : ""}
-            <span class="payload-webhook" title="${escapeHtml(String(item.base_request_id || item.request_id || ""))}">Webhook: <code>${escapeHtml(((item.base_request_id || item.request_id || "").slice(0, 8)) || "—")}</code></span>
-            <span class="payload-source">Source: <code>${escapeHtml(item.source || "")}</code></span>
-            <span class="payload-route">Route: <strong>${escapeHtml(item.route || "")}</strong></span>
-            <span class="payload-severity">${severityBadgeHtml(item.alert_severity)}</span>
-            <span class="payload-firing">${firingBadgeHtml(item.alert_firing)}</span>
-          </div>
-          <div class="payload-preview">
-            <code class="payload-preview-code">${escapeHtml(JSON.stringify(item.transformed || {}, null, 2))}</code>
-          </div>
-        </li>`
-      ).join("");
-    }
-    if (recentSentStatus) recentSentStatus.textContent = "";
+    renderRecentSent();
   } catch (err) {
     if (recentSentStatus) recentSentStatus.textContent = "Could not load recent sent.";
   }
 }
 
+function renderRecentSent() {
+  if (!recentSentList) return;
+  const q = recentSentSearch ? recentSentSearch.value.trim() : "";
+  const items = filterRecentSent(recentSentCache, q);
+  if (items.length === 0) {
+    recentSentList.innerHTML = q
+      ? `<li class="text-muted">${escapeHtml(tr("noMatchesForSearch"))}</li>`
+      : "<li class=\"text-muted\">No successfully forwarded payloads yet. Send webhooks and they will appear here after transform + forward.</li>";
+  } else {
+    recentSentList.innerHTML = items.map((item, idx) =>
+      `<li class="recent-sent-item${idx === 0 ? " recent-sent-latest" : ""}">
+        <div class="payload-header">
+          <span class="payload-ts">${formatTimeGMT7(item.ts)}</span>
+          ${idx === 0 ? `<span class="recent-sent-latest-badge">${escapeHtml(tr("recentSentLatestBadge"))}</span>` : ""}
+          <span class="payload-webhook" title="${escapeHtml(String(item.base_request_id || item.request_id || ""))}">Webhook: <code>${escapeHtml(((item.base_request_id || item.request_id || "").slice(0, 8)) || "—")}</code></span>
+          <span class="payload-source">Source: <code>${escapeHtml(item.source || "")}</code></span>
+          <span class="payload-route">Route: <strong>${escapeHtml(item.route || "")}</strong></span>
+          <span class="payload-severity">${severityBadgeHtml(item.alert_severity)}</span>
+          <span class="payload-firing">${firingBadgeHtml(item.alert_firing)}</span>
+        </div>
+        <div class="payload-preview">
+          <code class="payload-preview-code">${escapeHtml(JSON.stringify(item.transformed || {}, null, 2))}</code>
+        </div>
+      </li>`
+    ).join("");
+  }
+  if (recentSentStatus) recentSentStatus.textContent = "";
+}
+
+/** Poll timers used while /api/stream is unavailable (no EventSource or the stream is down). */
+let livePollTimers = [];
+
+function startLivePolling() {
+  if (livePollTimers.length) return;
+  livePollTimers = [
+    setInterval(loadStatsAndChart, 2500),
+    setInterval(loadLiveRequests, 2500),
+    setInterval(loadFailedEvents, 2500),
+    setInterval(loadRecentSent, 2500),
+  ];
+}
+
+function stopLivePolling() {
+  livePollTimers.forEach((t) => clearInterval(t));
+  livePollTimers = [];
+}
+
+function prependCapped(list, row, max) {
+  list.unshift(row);
+  if (list.length > max) list.length = max;
+}
+
+/**
+ * Live feed via Server-Sent Events: one row per event instead of re-fetching whole feeds.
+ * On (re)connect the feeds are fetched once to cover anything missed; polling resumes while down.
+ */
+function startLiveStream() {
+  if (typeof EventSource === "undefined") {
+    startLivePolling();
+    return;
+  }
+  const es = new EventSource("/api/stream");
+  es.addEventListener("open", () => {
+    stopLivePolling();
+    loadLiveRequests();
+    loadFailedEvents();
+    loadRecentSent();
+  });
+  es.addEventListener("error", () => { startLivePolling(); });
+  es.addEventListener("stats", (ev) => {
+    try {
+      renderStats({ ...statsSnapshot, ...JSON.parse(ev.data) });
+    } catch (err) {}
+  });
+  es.addEventListener("requests", (ev) => {
+    try {
+      prependCapped(liveRequestsCache, JSON.parse(ev.data), 20);
+      renderLiveRequests(liveRequestsCache);
+    } catch (err) {}
+  });
+  es.addEventListener("failed", (ev) => {
+    try {
+      prependCapped(failedEventsCache, JSON.parse(ev.data), 200);
+      renderFailedEvents(failedEventsCache);
+    } catch (err) {}
+  });
+  es.addEventListener("sent", (ev) => {
+    try {
+      prependCapped(recentSentCache, JSON.parse(ev.data), 50);
+      renderRecentSent();
+    } catch (err) {}
+  });
+}
+
 function copyPayloadJson(idx) {
   const item = recentPayloadsCache[idx];
   if (!item || item.payload === undefined) return;
@@ -3140,18 +3216,15 @@ loadApiKeys();
 loadHeaderVersion();
 setInterval(loadRecentPayloads, 5000);
 loadStatsAndChart();
-setInterval(loadStatsAndChart, 2500);
 loadLiveRequests();
 loadFailedEvents();
-setInterval(loadLiveRequests, 2500);
-setInterval(loadFailedEvents, 2500);
 setInterval(() => {
   const panel = document.getElementById("dlqPanel");
   if (!panel || panel.style.display === "none") return;
   refreshDlq({ preserve: true, quiet: true });
 }, 3000);
 loadRecentSent();
-setInterval(loadRecentSent, 2500);
+startLiveStream();
 setInterval(loadEffectiveTargets, 5000);
 setInterval(loadPortalStatus, 8000);
 setInterval(loadDailyMetrics, 30000);
@@ -3181,7 +3254,7 @@ if (dlqSearch) {
   dlqSearch.addEventListener("input", () => { dlqPage = 1; renderDlqTable(); });
 }
 if (recentSentSearch) {
-  recentSentSearch.addEventListener("input", () => { loadRecentSent(); });
+  recentSentSearch.addEventListener("input", () => { renderRecentSent(); });
 }
 
 const patternModal = document.getElementById("patternModal");
@@ -1,11 +1,12 @@
 """Optional on-disk success log: one JSON object per successful forward."""
-import json
 import logging
 import os
-import threading
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.codec import dumps
+from app.filelock import FileLock
+from app.jsonl_pages import read_jsonl_page
 
-_lock = threading.Lock()
 _logger = logging.getLogger("alertbridge")
 
 
@@ -18,45 +19,27 @@ def success_log_file_path() -> str:
     return os.getenv("ALERTBRIDGE_SUCCESS_LOG_FILE", "").strip()
 
 
-def read_recent_success(limit: int = 50, max_read_bytes: int = 2_000_000) -> List[Dict[str, Any]]:
+_lock = FileLock(success_log_file_path)
+
+
+def read_success_page(cursor: Optional[int] = None, limit: int = 50) -> Tuple[List[Dict[str, Any]], Optional[int]]:
     """
-    Return up to `limit` newest JSONL rows (newest first). Reads only the file tail for speed.
+    Return (rows, next_cursor): up to `limit` rows older than byte offset `cursor` (newest first).
+    Pass next_cursor back to continue; None means the oldest row was reached.
     """
     path = success_log_file_path()
     if not path or not os.path.isfile(path):
-        return []
-    limit = max(1, min(int(limit), 500))
-    try:
-        size = os.path.getsize(path)
-    except OSError:
-        return []
-    read_size = min(size, max_read_bytes)
+        return [], None
     try:
-        with _lock:
-            with open(path, "rb") as handle:
-                if read_size < size:
-                    handle.seek(-read_size, os.SEEK_END)
-                else:
-                    handle.seek(0)
-                chunk = handle.read()
+        return read_jsonl_page(path, _lock, cursor=cursor, limit=limit)
     except OSError as exc:
         _logger.warning("success_log_read_failed path=%s: %s", path, exc)
-        return []
-    lines = chunk.split(b"\n")
-    if read_size < size and lines:
-        lines = lines[1:]
-    out: List[Dict[str, Any]] = []
-    for raw in reversed(lines):
-        if len(out) >= limit:
-            break
-        line = raw.strip()
-        if not line:
-            continue
-        try:
-            out.append(json.loads(line.decode("utf-8")))
-        except (json.JSONDecodeError, UnicodeDecodeError):
-            continue
-    return out
+        return [], None
+
+
+def read_recent_success(limit: int = 50) -> List[Dict[str, Any]]:
+    """Return up to `limit` newest JSONL rows (newest first)."""
+    return read_success_page(limit=limit)[0]
 
 
 def record_success_forward(record: Dict[str, Any]) -> None:
@@ -69,13 +52,13 @@ def record_success_forward(record: Dict[str, Any]) -> None:
     path = success_log_file_path()
     if not path:
         return
-    line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+    line = dumps(record) + b"\n"
     try:
         parent = os.path.dirname(path)
         if parent:
             os.makedirs(parent, exist_ok=True)
         with _lock:
-            with open(path, "a", encoding="utf-8") as handle:
+            with open(path, "ab") as handle:
                 handle.write(line)
     except OSError as exc:
         _logger.warning("success_log_write_failed path=%s: %s", path, exc)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: JSON parse / serialize of webhook payloads with the stdlib vs app.codec
+(orjson or msgspec when installed).
+
+Payloads: the samples of scripts/load_test_webhook.py, plus Alertmanager bundles of 10 / 100 / 500
+alerts built from them (the shape tests/ post to /webhook/ocp with unroll_alerts).
+
+Usage:
+  python scripts/bench_json.py
+  python scripts/bench_json.py --iterations 2000
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Allow run from project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import codec
+from scripts.load_test_webhook import FLAT_JSON_PAYLOADS, OCP_PAYLOADS
+
+
+def _bundle(n: int) -> dict:
+    alerts = []
+    for i in range(n):
+        a = dict(OCP_PAYLOADS[i % len(OCP_PAYLOADS)])
+        a["labels"] = {**a["labels"], "instance": f"node-{i}", "namespace": f"ns-{i % 7}"}
+        a["fingerprint"] = f"{i:016x}"
+        alerts.append(a)
+    return {
+        "version": "4",
+        "status": "firing",
+        "receiver": "alertbridge",
+        "groupLabels": {"alertname": "Bench"},
+        "commonLabels": {"severity": "warning"},
+        "commonAnnotations": {},
+        "externalURL": "https://alertmanager.example",
+        "alerts": alerts,
+    }
+
+
+def _stdlib_dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _time(fn, arg, iterations: int) -> float:
+    """Median microseconds per call over 5 rounds."""
+    samples = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn(arg)
+        samples.append((time.perf_counter() - start) / iterations * 1e6)
+    return statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="stdlib json vs app.codec")
+    parser.add_argument("--iterations", type=int, default=500, help="Calls per round (default 500)")
+    args = parser.parse_args()
+
+    cases = {
+        "flat sample": FLAT_JSON_PAYLOADS[0],
+        "alert sample": OCP_PAYLOADS[0],
+        "bundle x10": _bundle(10),
+        "bundle x100": _bundle(100),
+        "bundle x500": _bundle(500),
+    }
+    print(f"codec: {codec.CODEC}")
+    print(f"{'payload':14s} {'bytes':>8s} {'loads json':>11s} {'loads codec':>12s} {'dumps json':>11s} {'dumps codec':>12s}  (us/call)")
+    for name, payload in cases.items():
+        raw = _stdlib_dumps(payload)
+        iterations = max(10, args.iterations * 1000 // max(len(raw), 1000))
+        row = (
+            _time(json.loads, raw, iterations),
+            _time(codec.loads, raw, iterations),
+            _time(_stdlib_dumps, payload, iterations),
+            _time(codec.dumps, payload, iterations),
+        )
+        print(f"{name:14s} {len(raw):8d} {row[0]:11.1f} {row[1]:12.1f} {row[2]:11.1f} {row[3]:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
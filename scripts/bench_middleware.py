@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-request overhead of the HTTP middleware stack.
+
+Compares the former pair of @app.middleware("http") layers (BaseHTTPMiddleware: security headers +
+request logging) with app.middleware.RequestContextMiddleware, on a trivial endpoint driven
+directly through ASGI (no sockets, no server), so the difference is the middleware cost.
+
+Usage:
+  python scripts/bench_middleware.py
+  python scripts/bench_middleware.py --requests 20000 --rounds 5
+"""
+import argparse
+import asyncio
+import logging
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Allow run from project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import JSONResponse
+
+from app.middleware import SECURITY_HEADERS, RequestContextMiddleware, _stage_log_fields
+
+logger = logging.getLogger("alertbridge")
+
+
+def _endpoint_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/webhook/{source}")
+    async def webhook(source: str, request: Request) -> Response:
+        request.state.source = source
+        return JSONResponse({"status": "ok", "request_id": request.state.request_id})
+
+    return app
+
+
+def build_before() -> FastAPI:
+    """The two decorator middlewares as they were in app/main.py."""
+    app = _endpoint_app()
+
+    @app.middleware("http")
+    async def security_headers_middleware(request: Request, call_next) -> Response:
+        response: Response = await call_next(request)
+        for name, value in SECURITY_HEADERS.items():
+            response.headers[name] = value
+        return response
+
+    @app.middleware("http")
+    async def request_logging_middleware(request: Request, call_next) -> Response:
+        request_id = request.headers.get("X-Request-ID") or str(uuid.uuid4())
+        request.state.request_id = request_id
+        request.state.source = None
+        request.state.route_name = None
+        request.state.forward_result = None
+        request.state.stage_timer = None
+        start_time = time.monotonic()
+        response: Response = await call_next(request)
+        response.headers["X-Request-ID"] = request_id
+        logger.info(
+            "request",
+            extra={
+                "request_id": request_id,
+                "source": request.state.source,
+                "http_status": response.status_code,
+                "duration_ms": round((time.monotonic() - start_time) * 1000, 2),
+                **_stage_log_fields({}),
+            },
+        )
+        return response
+
+    return app
+
+
+def build_after() -> FastAPI:
+    app = _endpoint_app()
+    app.add_middleware(RequestContextMiddleware)
+    return app
+
+
+async def _drive(app, n: int) -> float:
+    """Seconds for n POST /webhook/ocp requests through the ASGI app."""
+    body = b'{"status":"firing"}'
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/webhook/ocp",
+        "raw_path": b"/webhook/ocp",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8080),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+async def _bench(requests: int, rounds: int) -> None:
+    logger.setLevel(logging.INFO)
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    apps = {"before (2x BaseHTTPMiddleware)": build_before(), "after (RequestContextMiddleware)": build_after()}
+    for app in apps.values():
+        await _drive(app, 200)  # warm-up (route compilation, first-call imports)
+    results = {}
+    for name, app in apps.items():
+        samples = [await _drive(app, requests) / requests * 1e6 for _ in range(rounds)]
+        results[name] = statistics.median(samples)
+        print(f"{name:36s} median {results[name]:8.1f} us/request  (rounds: {', '.join(f'{s:.1f}' for s in samples)})")
+    before, after = results.values()
+    print(f"saved {before - after:.1f} us/request ({(before - after) / before * 100:.0f}%)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Middleware per-request overhead")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per round (default 5000)")
+    parser.add_argument("--rounds", type=int, default=5, help="Rounds per variant (default 5)")
+    args = parser.parse_args()
+    asyncio.run(_bench(args.requests, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+from fastapi.testclient import TestClient
+
+from app.admission import AdmissionController
+from app.config import set_rules
+from app.main import app
+from app.rules import MatchConfig, RouteConfig, RuleSet, TargetConfig
+
+
+def test_admit_sheds_past_inflight_and_byte_caps() -> None:
+    ctl = AdmissionController(max_inflight=2, max_bytes=100, critical_share=0)
+    first = ctl.admit(60)
+    assert first is not None
+    assert ctl.admit(50) is None  # bytes
+    second = ctl.admit(40)
+    assert ctl.admit(0) is None  # in flight
+    ctl.release(first)
+    ctl.release(second)
+    assert (ctl.inflight, ctl.inflight_bytes) == (0, 0)
+    # A lone body over the byte cap is still admitted (the body size limit applies to it).
+    big = ctl.admit(500)
+    assert big is not None
+    ctl.release(big)
+
+
+def test_critical_reserve_keeps_capacity_for_critical_alerts() -> None:
+    ctl = AdmissionController(max_inflight=4, max_bytes=0, critical_share=0.5)
+    tickets = []
+    for _ in range(2):
+        tickets.append(ctl.admit(10))
+        assert ctl.classify(tickets[-1], False)
+    tickets.append(ctl.admit(10))
+    assert not ctl.classify(tickets[-1], False)  # a third non-critical would eat the reserve
+    assert ctl.classify(tickets[-1], True)
+    assert ctl.normal_inflight == 2
+    for ticket in tickets:
+        ctl.release(ticket)
+    assert (ctl.inflight, ctl.normal_inflight, ctl.normal_bytes) == (0, 0, 0)
+
+
+def test_webhook_returns_503_with_retry_after_when_full(monkeypatch) -> None:
+    async def fake_forward(payload, route, request_id, defaults):
+        return True, 200, None, {"attempts_used": 1, "max_attempts": 1, "retried": False, "circuit_open": False}
+
+    monkeypatch.setattr("app.main.forward_payload", fake_forward)
+    ctl = AdmissionController(max_inflight=1, max_bytes=0, critical_share=0)
+    monkeypatch.setattr("app.admission.ADMISSION", ctl)
+    monkeypatch.setattr("app.main.ADMISSION", ctl)
+    route = RouteConfig(name="adm-route", match=MatchConfig(source="adm"), target=TargetConfig(url_env="UNUSED_ADM"))
+    body = {"alerts": [{"status": "firing", "labels": {"alertname": "A", "severity": "warning"}}]}
+    with TestClient(app) as client:
+        set_rules(RuleSet(version=1, routes=[route]))
+        assert client.post("/webhook/adm", json=body).status_code == 200
+        held = ctl.admit(0)  # a webhook still in flight
+        resp = client.post("/webhook/adm", json=body)
+        ctl.release(held)
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "5"
+    assert ctl.inflight == 0
@@ -0,0 +1,84 @@
+from fastapi.testclient import TestClient
+
+from app.aggregate import AggregateBuffer, combine_group
+from app.config import set_rules
+from app.daily_metrics import read_daily
+from app.main import app
+from app.rules import AggregateConfig, MatchConfig, OutputTemplate, RouteConfig, RuleSet, TargetConfig
+
+
+def _route(**kwargs) -> RouteConfig:
+    return RouteConfig(
+        name="agg-route",
+        match=MatchConfig(source="agg"),
+        target=TargetConfig(url_env="UNUSED_AGG_TEST"),
+        aggregate=AggregateConfig(group_by=["ns"], **kwargs),
+    )
+
+
+def test_buffer_emits_on_size_wait_and_group_bound() -> None:
+    buf = AggregateBuffer()
+    route = _route(group_wait_ms=1000, max_group_size=2, max_groups=2)
+    assert buf.add(route, {"ns": "a", "n": 1}, now=0.0) == []
+    full = buf.add(route, {"ns": "a", "n": 2}, now=0.1)
+    assert [g.items for g in full] == [[{"ns": "a", "n": 1}, {"ns": "a", "n": 2}]]
+
+    buf.add(route, {"ns": "b"}, now=0.2)
+    buf.add(route, {"ns": "c"}, now=0.3)
+    early = buf.add(route, {"ns": "d"}, now=0.4)
+    assert [g.key for g in early] == [{"ns": "b"}]
+    assert buf.due(now=1.0) == []
+    assert [g.key for g in buf.due(now=1.35)] == [{"ns": "c"}]
+    assert [g.key for g in buf.drain()] == [{"ns": "d"}]
+    assert len(buf) == 0
+
+
+def test_combine_group_uses_output_template() -> None:
+    buf = AggregateBuffer()
+    route = _route(
+        max_group_size=2,
+        output_template=OutputTemplate(fields={"namespace": "$.group.ns", "total": "$.count", "first": "$.alerts[0].n"}),
+    )
+    buf.add(route, {"ns": "a", "n": 1})
+    (group,) = buf.add(route, {"ns": "a", "n": 2})
+    assert combine_group(group) == {"namespace": "a", "total": 2, "first": 1}
+
+
+def test_webhook_buffers_and_flushes_groups(monkeypatch) -> None:
+    sent = []
+
+    async def fake_forward(payload, route, request_id, defaults):
+        sent.append(payload)
+        return True, 200, None, {"attempts_used": 1, "max_attempts": 1, "retried": False, "circuit_open": False}
+
+    monkeypatch.setattr("app.main.forward_payload", fake_forward)
+    rules = RuleSet(version=1, routes=[_route(group_wait_ms=60000, max_group_size=2).model_copy(update={"unroll_alerts": True})])
+
+    def bundle(*names: str) -> dict:
+        return {"alerts": [{"status": "firing", "labels": {"alertname": n}} for n in names]}
+
+    with TestClient(app) as client:
+        set_rules(rules)
+        first = client.post("/webhook/agg", json=bundle("A", "B", "C"))
+        assert first.status_code == 200 and first.json()["buffered"] is True
+    # A+B filled a group at once; C was still buffered and is flushed on shutdown.
+    assert [p["count"] for p in sent] == [2, 1]
+    assert [a["alerts"][0]["labels"]["alertname"] for a in sent[0]["alerts"]] == ["A", "B"]
+
+
+def test_failed_group_counts_daily_and_failed_feed(monkeypatch, tmp_path) -> None:
+    monkeypatch.setenv("ALERTBRIDGE_DAILY_METRICS_FILE", str(tmp_path / "daily.json"))
+
+    async def dead_forward(payload, route, request_id, defaults):
+        return False, 503, RuntimeError("down"), {"attempts_used": 1, "max_attempts": 1, "retried": False, "circuit_open": False}
+
+    monkeypatch.setattr("app.main.forward_payload", dead_forward)
+    rules = RuleSet(version=1, routes=[_route(group_wait_ms=60000, max_group_size=2)])
+    with TestClient(app) as client:
+        set_rules(rules)
+        client.post("/webhook/agg", json={"ns": "a", "n": 1})
+        client.post("/webhook/agg", json={"ns": "a", "n": 2})  # fills the group
+        failed = client.get("/api/recent-failed").json()
+    (today,) = read_daily(1)
+    assert today["incoming"] == 2 and today["forward_fail"] == 2 and today["dlq"] == 2
+    assert failed[0]["route"] == "agg-route" and failed[0]["error"] == "down"
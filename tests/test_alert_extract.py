@@ -1,5 +1,5 @@
 """Alert summary / severity extraction from webhook payloads."""
-from app.main import (
+from app.alert_bundle import (
     extract_alert_severity,
     extract_bundle_alert_names,
     extract_bundle_firing_status,
@@ -144,3 +144,25 @@ def test_resolve_stored_firing_unroll_uses_inbound_per_shard():
     out = {"custom": True}
     assert resolve_stored_alert_firing(out, inbound, 0, 2) == "firing"
     assert resolve_stored_alert_firing(out, inbound, 1, 2) == "resolved"
+
+
+def test_bundle_summary_single_pass_matches_extractors():
+    from app.alert_bundle import AlertBundleSummary, BundleSummaries
+
+    p = {
+        "status": "firing",
+        "commonLabels": {"severity": "warning"},
+        "alerts": [
+            {"status": "firing", "labels": {"alertname": "A", "severity": "warning"}},
+            {"status": "resolved", "labels": {"severity": "critical"}, "annotations": {"summary": "Disk"}},
+            "bad",
+        ],
+    }
+    s = AlertBundleSummary(p)
+    assert s.names == ["A", "Disk", "(invalid #2)"]
+    assert s.statuses == ["firing", "resolved", ""]
+    assert s.firing == "mixed" and s.severity == "critical"
+    assert s.summary == "A"
+    assert s.ui() == ("[0] A (firing) · [1] Disk (resolved) · [2] (invalid #2)", "[0] A — firing\n[1] Disk — resolved\n[2] (invalid #2)")
+    analyze = BundleSummaries()
+    assert analyze(p) is analyze(p)
@@ -0,0 +1,118 @@
+import json
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from app.alert_state import (
+    active_alerts,
+    load_alert_state,
+    mark_forwarded,
+    observe_alerts,
+    reset_alert_state,
+    snapshot_alert_state,
+)
+from app.config import set_rules
+from app.main import app
+from app.rules import MatchConfig, RouteConfig, RuleSet, TargetConfig
+
+
+def _route(**kwargs) -> RouteConfig:
+    return RouteConfig(
+        name="state-route",
+        match=MatchConfig(source="state"),
+        target=TargetConfig(url_env="UNUSED_STATE_TEST"),
+        **kwargs,
+    )
+
+
+def _shard(status: str, fp: str = "fp1") -> dict:
+    return {"status": status, "alerts": [{"status": status, "fingerprint": fp, "labels": {"alertname": "A"}}]}
+
+
+def test_transitions_only_with_heartbeat() -> None:
+    reset_alert_state()
+    route = _route(forward_mode="transitions_only", heartbeat_sec=600)
+    assert observe_alerts(route, _shard("firing"), now=0.0)
+    mark_forwarded(_shard("firing"), now=0.0)
+    assert not observe_alerts(route, _shard("firing"), now=10.0)
+    assert observe_alerts(route, _shard("firing"), now=600.0)
+    mark_forwarded(_shard("firing"), now=600.0)
+    assert not observe_alerts(route, _shard("firing"), now=700.0)
+    assert observe_alerts(route, _shard("resolved"), now=710.0)
+    # The resolved forward failed (not marked): the re-send is still a transition.
+    assert observe_alerts(route, _shard("resolved"), now=715.0)
+    mark_forwarded(_shard("resolved"), now=715.0)
+    assert not observe_alerts(route, _shard("resolved"), now=716.0)
+    assert observe_alerts(_route(), _shard("resolved"), now=720.0)
+
+
+def test_eviction_drops_resolved_first_in_batches(monkeypatch) -> None:
+    monkeypatch.setattr("app.alert_state.ALERT_STATE_MAX", 10)
+    reset_alert_state()
+    route = _route()
+    observe_alerts(route, _shard("resolved", "old-resolved"), now=0.0)
+    for i in range(10):
+        observe_alerts(route, _shard("firing", f"f{i}"), now=1.0 + i)
+    active = [a["fingerprint"] for a in active_alerts()]
+    assert len(active) == 9 and "f0" not in active and "old-resolved" not in active
+
+
+def test_snapshot_roundtrip_and_active_list(monkeypatch, tmp_path: Path) -> None:
+    snap = tmp_path / "alerts.json"
+    monkeypatch.setenv("ALERTBRIDGE_ALERT_STATE_FILE", str(snap))
+    reset_alert_state()
+    route = _route()
+    observe_alerts(route, _shard("firing", "a"), now=100.0)
+    observe_alerts(route, _shard("resolved", "b"), now=200.0)
+    assert snapshot_alert_state()
+    assert len(json.loads(snap.read_text(encoding="utf-8"))["alerts"]) == 2
+
+    reset_alert_state()
+    assert active_alerts() == []
+    assert load_alert_state() == 2
+    active = active_alerts()
+    assert [a["fingerprint"] for a in active] == ["a"]
+    assert active[0]["route"] == "state-route" and active[0]["last_seen"].startswith("1970-01-01T00:01:40")
+
+
+def test_multi_worker_snapshots_merge_every_workers_alerts(monkeypatch, tmp_path: Path) -> None:
+    snap = tmp_path / "alerts.json"
+    monkeypatch.setenv("ALERTBRIDGE_ALERT_STATE_FILE", str(snap))
+    monkeypatch.setattr("app.alert_state.SHARED", object())
+    route = _route()
+    # Worker 1 saw "a" (firing) and "b"; worker 2 saw "a" later (resolved) and "c".
+    reset_alert_state()
+    observe_alerts(route, _shard("firing", "a"), now=100.0)
+    observe_alerts(route, _shard("firing", "b"), now=100.0)
+    assert snapshot_alert_state()
+    reset_alert_state()
+    observe_alerts(route, _shard("resolved", "a"), now=200.0)
+    observe_alerts(route, _shard("firing", "c"), now=200.0)
+    assert snapshot_alert_state()
+
+    reset_alert_state()
+    assert load_alert_state() == 3
+    assert sorted(a["fingerprint"] for a in active_alerts()) == ["b", "c"]
+
+
+def test_webhook_forwards_only_transitions(monkeypatch) -> None:
+    reset_alert_state()
+    sent = []
+
+    async def fake_forward(payload, route, request_id, defaults):
+        sent.append(payload["alerts"][0]["status"])
+        return True, 200, None, {"attempts_used": 1, "max_attempts": 1, "retried": False, "circuit_open": False}
+
+    monkeypatch.setattr("app.main.forward_payload", fake_forward)
+    with TestClient(app) as client:
+        set_rules(RuleSet(version=1, routes=[_route(forward_mode="transitions_only")]))
+        client.post("/webhook/state", json=_shard("firing"))
+        repeat = client.post("/webhook/state", json=_shard("firing"))
+        active = client.get("/api/alerts/active").json()
+        client.post("/webhook/state", json=_shard("resolved"))
+        after = client.get("/api/alerts/active").json()
+
+    assert repeat.status_code == 200 and repeat.json()["unchanged"] is True
+    assert sent == ["firing", "resolved"]
+    assert active["count"] == 1 and active["alerts"][0]["fingerprint"] == "fp1"
+    assert after["count"] == 0
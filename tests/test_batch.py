@@ -0,0 +1,84 @@
+import hashlib
+import hmac
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.batch import BatchFormatError, BatchParser
+from app.config import set_rules
+from app.main import app
+from app.rules import MatchConfig, RouteConfig, RuleSet, TargetConfig, VerifyHmac
+
+ITEMS = [{"alerts": [{"status": "firing", "labels": {"alertname": f"B{i}", "note": "é" * i}}]} for i in range(6)]
+
+
+def _parse(body: bytes, chunk: int) -> list:
+    parser = BatchParser()
+    for i in range(0, len(body), chunk):
+        parser.feed(body[i:i + chunk])
+    parser.close()
+    return parser.items
+
+
+@pytest.mark.parametrize("chunk", [1, 5, 64, 1 << 20])
+def test_parser_reads_ndjson_and_arrays_across_chunk_boundaries(chunk) -> None:
+    ndjson = b"\n".join(json.dumps(item).encode() for item in ITEMS) + b"\n\n"
+    array = b"  " + json.dumps(ITEMS + [12345], indent=1).encode()
+    assert _parse(ndjson, chunk) == ITEMS
+    assert _parse(array, chunk) == ITEMS + [12345]
+
+
+@pytest.mark.parametrize("body", [b"[1,2", b"[1,,2]", b"[1] x", b"[{} {}]", b'{"a": 1}\n{bad}\n'])
+def test_parser_rejects_malformed_bodies(body) -> None:
+    with pytest.raises(BatchFormatError):
+        _parse(body, 3)
+
+
+def _batch_rules(monkeypatch, **route_kwargs) -> RuleSet:
+    async def fake_forward(payload, route, request_id, defaults):
+        return True, 200, None, {"attempts_used": 1, "max_attempts": 1, "retried": False, "circuit_open": False}
+
+    monkeypatch.setattr("app.main.forward_payload", fake_forward)
+    route = RouteConfig(
+        name="batch-route",
+        match=MatchConfig(source="batch"),
+        target=TargetConfig(url_env="UNUSED_BATCH"),
+        **route_kwargs,
+    )
+    return RuleSet(version=1, routes=[route])
+
+
+def test_batch_returns_per_item_results(monkeypatch) -> None:
+    rules = _batch_rules(monkeypatch)
+    body = json.dumps(ITEMS[:2] + [["not", "an", "object"]])
+    with TestClient(app) as client:
+        set_rules(rules)
+        resp = client.post("/webhook/batch/batch", content=body, headers={"X-Request-ID": "rq"})
+    data = resp.json()
+    assert resp.status_code == 202
+    assert data["items"] == 3 and data["forwarded"] == 2
+    assert [r["http_status"] for r in data["results"]] == [200, 200, 400]
+    assert [r["request_id"] for r in data["results"]] == ["rq.0", "rq.1", "rq.2"]
+
+
+def test_batch_caps_and_single_hmac_check(monkeypatch) -> None:
+    monkeypatch.setenv("BATCH_HMAC_SECRET", "s3cret")
+    monkeypatch.setattr("app.main.BATCH_MAX_ITEMS", 3)
+    rules = _batch_rules(monkeypatch, verify_hmac=VerifyHmac(header="X-Sig", secret_env="BATCH_HMAC_SECRET"))
+    body = b"\n".join(json.dumps(item).encode() for item in ITEMS[:3])
+    sig = "sha256=" + hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+    body4 = body + b"\n{}"
+    sig4 = "sha256=" + hmac.new(b"s3cret", body4, hashlib.sha256).hexdigest()
+    with TestClient(app) as client:
+        set_rules(rules)
+        ok = client.post("/webhook/batch/batch", content=body, headers={"X-Sig": sig})
+        bad_sig = client.post("/webhook/batch/batch", content=body, headers={"X-Sig": "sha256=00"})
+        bad_json = client.post("/webhook/batch/batch", content=b"{nope}", headers={"X-Sig": "sha256=00"})
+        too_many = client.post("/webhook/batch/batch", content=body4, headers={"X-Sig": sig4})
+        too_many_unsigned = client.post("/webhook/batch/batch", content=body4 + b"\n{}", headers={"X-Sig": "sha256=00"})
+    assert ok.status_code == 200 and ok.json()["forwarded"] == 3
+    assert bad_sig.status_code == 401
+    assert bad_json.status_code == 401  # signature is checked before parse errors are reported
+    assert too_many.status_code == 413
+    assert too_many_unsigned.status_code == 401  # the item cap is not revealed before the signature
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.main import _read_body_with_limit
+
+
+class FakeRequest:
+    def __init__(self, chunks, content_length=None):
+        self._chunks = chunks
+        self.headers = {} if content_length is None else {"content-length": str(content_length)}
+        self.read = 0
+
+    async def stream(self):
+        for chunk in self._chunks:
+            self.read += 1
+            yield chunk
+
+
+def _read(req, limit=100):
+    return asyncio.run(_read_body_with_limit(req, limit))
+
+
+def test_declared_oversize_is_rejected_before_reading() -> None:
+    req = FakeRequest([b"x" * 10], content_length=101)
+    with pytest.raises(HTTPException) as exc:
+        _read(req)
+    assert exc.value.status_code == 413 and req.read == 0
+
+
+@pytest.mark.parametrize("content_length", [None, 9, 4])
+def test_chunks_are_assembled_once(content_length) -> None:
+    body = _read(FakeRequest([b"abc", b"", b"def", b"ghi"], content_length=content_length))
+    assert bytes(body) == b"abcdefghi"
+
+
+def test_single_chunk_is_returned_as_is_and_stream_limit_applies() -> None:
+    chunk = b'{"a": 1}'
+    assert _read(FakeRequest([chunk], content_length=len(chunk))) is chunk
+    with pytest.raises(HTTPException) as exc:
+        _read(FakeRequest([b"x" * 60, b"x" * 60]))
+    assert exc.value.status_code == 413
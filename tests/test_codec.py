@@ -0,0 +1,31 @@
+import json
+import math
+from datetime import datetime
+
+import pytest
+
+from app.codec import _stdlib_dumps, _stdlib_loads, dumps, loads
+
+
+@pytest.mark.parametrize("impl_loads", [loads, _stdlib_loads])
+def test_loads_accepts_buffers_and_raises_stdlib_error(impl_loads) -> None:
+    raw = bytearray('{"a": [1, "ä"]}'.encode("utf-8"))
+    assert impl_loads(raw) == impl_loads(memoryview(raw)) == {"a": [1, "ä"]}
+    with pytest.raises(json.JSONDecodeError):
+        impl_loads(b"{not json")
+
+
+@pytest.mark.parametrize("impl_dumps", [dumps, _stdlib_dumps])
+def test_dumps_matches_stdlib_semantics(impl_dumps) -> None:
+    value = {"b": 1, "a": "ä", "when": datetime(2026, 1, 2), "big": 2**70}
+    assert json.loads(impl_dumps(value)) == {"b": 1, "a": "ä", "when": "2026-01-02 00:00:00", "big": 2**70}
+    assert impl_dumps({"b": 1, "a": 2}, sort_keys=True) == b'{"a":2,"b":1}'
+
+
+@pytest.mark.parametrize("impl_loads", [loads, _stdlib_loads])
+def test_loads_keeps_wide_integers_and_non_finite_numbers(impl_loads) -> None:
+    raw = b'{"a": 123456789012345678901234567890, "b": -9223372036854775809, "c": 18446744073709551615}'
+    assert impl_loads(raw) == {"a": 123456789012345678901234567890, "b": -9223372036854775809, "c": 2**64 - 1}
+    assert impl_loads('{"id": "12345678901234567890"}') == {"id": "12345678901234567890"}
+    value = impl_loads(b'{"x": NaN, "y": Infinity}')
+    assert math.isnan(value["x"]) and value["y"] == math.inf
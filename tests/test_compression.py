@@ -0,0 +1,26 @@
+import gzip
+
+from fastapi.testclient import TestClient
+
+from app.compression import choose_encoding
+from app.main import app
+
+
+def test_choose_encoding_honours_q_values() -> None:
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("") is None
+    assert choose_encoding("*") in ("br", "gzip")
+
+
+def test_large_admin_response_is_gzipped_webhook_is_not() -> None:
+    with TestClient(app) as client:
+        schemas = client.get("/api/pattern-schemas", headers={"Accept-Encoding": "gzip"})
+        plain = client.get("/api/pattern-schemas", headers={"Accept-Encoding": "identity"})
+        hook = client.post("/webhook/ocp", json={}, headers={"Accept-Encoding": "gzip"})
+
+    assert schemas.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in schemas.headers["vary"]
+    assert schemas.json() == plain.json() and "content-encoding" not in plain.headers
+    assert len(gzip.compress(plain.content)) < len(plain.content)
+    assert "content-encoding" not in hook.headers
@@ -0,0 +1,104 @@
+from fastapi.testclient import TestClient
+
+from app.config import set_rules
+from app.dedup import DedupWindow, reset_dedup
+from app.main import app
+from app.rules import DedupConfig, MatchConfig, RouteConfig, RuleSet, TargetConfig
+
+
+def test_dedup_window_ttl_transitions_and_bound() -> None:
+    window = DedupWindow(DedupConfig(ttl_sec=60, max_entries=2))
+    assert window.admit("a", "firing", now=0.0)
+    assert not window.admit("a", "firing", now=30.0)
+    assert window.admit("a", "resolved", now=31.0)
+    assert window.admit("a", "firing", now=32.0)
+    assert not window.admit("a", "firing", now=33.0)
+    assert window.admit("a", "firing", now=93.0)
+
+    window.admit("b", "firing", now=94.0)
+    window.admit("c", "firing", now=95.0)
+    assert len(window) == 2
+    assert window.admit("a", "firing", now=96.0)
+
+    strict = DedupWindow(DedupConfig(ttl_sec=60, pass_status_transitions=False))
+    assert strict.admit("a", "firing", now=0.0)
+    assert strict.admit("a", "resolved", now=1.0)
+    assert not strict.admit("a", "firing", now=2.0)
+
+
+def test_webhook_suppresses_repeated_notifications(monkeypatch) -> None:
+    reset_dedup()
+    sent = []
+
+    async def fake_forward(payload, route, request_id, defaults):
+        sent.append(payload["alerts"][0]["status"])
+        return True, 200, None, {"attempts_used": 1, "max_attempts": 1, "retried": False, "circuit_open": False}
+
+    monkeypatch.setattr("app.main.forward_payload", fake_forward)
+    rules = RuleSet(
+        version=1,
+        routes=[
+            RouteConfig(
+                name="dedup-route",
+                match=MatchConfig(source="dedup"),
+                target=TargetConfig(url_env="UNUSED_DEDUP_TEST"),
+                unroll_alerts=True,
+                dedup=DedupConfig(ttl_sec=300),
+            )
+        ],
+    )
+
+    def bundle(status: str) -> dict:
+        return {"status": status, "alerts": [{"status": status, "fingerprint": "fp1", "labels": {"alertname": "A"}}]}
+
+    with TestClient(app) as client:
+        set_rules(rules)
+        first = client.post("/webhook/dedup", json=bundle("firing"))
+        repeat = client.post("/webhook/dedup", json=bundle("firing"))
+        resolved = client.post("/webhook/dedup", json=bundle("resolved"))
+        metrics = client.get("/metrics").text
+
+    assert first.status_code == 200 and first.json()["forwarded"] is True
+    assert repeat.status_code == 200 and repeat.json()["deduplicated"] is True
+    assert resolved.json()["forwarded"] is True
+    assert sent == ["firing", "resolved"]
+    assert 'alertbridge_dedup_total{result="suppressed",route="dedup-route"} 1.0' in metrics
+
+
+def test_rollback_lets_resend_of_undelivered_notification_through() -> None:
+    window = DedupWindow(DedupConfig(ttl_sec=60))
+    first = window.admit("a", "firing", now=0.0)
+    window.rollback(first)
+    assert len(window) == 0
+    assert window.admit("a", "firing", now=1.0)
+    resolved = window.admit("a", "resolved", now=2.0)
+    window.rollback(resolved)
+    assert not window.admit("a", "firing", now=3.0)  # earlier delivered window kept
+    assert window.admit("a", "resolved", now=4.0)
+
+
+def test_failed_forward_is_not_deduplicated(monkeypatch) -> None:
+    reset_dedup()
+    results = [False, True]
+    sent = []
+
+    async def flaky_forward(payload, route, request_id, defaults):
+        ok = results.pop(0)
+        sent.append(ok)
+        meta = {"attempts_used": 1, "max_attempts": 1, "retried": False, "circuit_open": False}
+        return ok, 200 if ok else 503, None if ok else RuntimeError("down"), meta
+
+    monkeypatch.setattr("app.main.forward_payload", flaky_forward)
+    route = RouteConfig(
+        name="dedup-retry",
+        match=MatchConfig(source="deduprt"),
+        target=TargetConfig(url_env="UNUSED_DEDUP_TEST"),
+        dedup=DedupConfig(ttl_sec=300),
+    )
+    body = {"status": "firing", "alerts": [{"status": "firing", "fingerprint": "fp2", "labels": {"alertname": "B"}}]}
+    with TestClient(app) as client:
+        set_rules(RuleSet(version=1, routes=[route]))
+        assert client.post("/webhook/deduprt", json=body).status_code == 202
+        assert client.post("/webhook/deduprt", json=body).json()["forwarded"] is True
+        assert client.post("/webhook/deduprt", json=body).json()["deduplicated"] is True
+    assert sent == [False, True]
@@ -1,11 +1,22 @@
 import base64
 import json
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 from fastapi.testclient import TestClient
 
+from app import dlq as dlq_module
 from app.config import set_rules
-from app.dlq import purge_dlq_all, purge_dlq_by_ids, read_recent_dlq
+from app.dlq import (
+    compact_dlq,
+    dlq_fingerprint,
+    purge_dlq_all,
+    purge_dlq_by_ids,
+    read_dlq_page,
+    read_recent_dlq,
+    record_failed_forward,
+    search_dlq,
+)
 from app.main import app
 from app.rules import Defaults, MatchConfig, RouteConfig, RuleSet, TargetConfig, TransformConfig
 
@@ -156,6 +167,8 @@ def test_api_dlq_purge_by_ids(monkeypatch, tmp_path: Path) -> None:
     body = r.json()
     assert body.get("ok") is True
     assert body.get("removed") == 1
+    assert [r["n"] for r in read_recent_dlq(limit=10)] == [2]
+    compact_dlq(force=True)
     lines = [ln for ln in p.read_text(encoding="utf-8").splitlines() if ln.strip()]
     assert len(lines) == 1
     assert json.loads(lines[0])["n"] == 2
@@ -188,6 +201,8 @@ def test_api_dlq_purge_by_request_id_legacy_row(monkeypatch, tmp_path: Path) ->
         )
     assert r.status_code == 200
     assert r.json().get("removed") == 1
+    assert [r["n"] for r in read_recent_dlq(limit=10)] == [2]
+    compact_dlq(force=True)
     lines = [ln for ln in p.read_text(encoding="utf-8").splitlines() if ln.strip()]
     assert len(lines) == 1
     assert json.loads(lines[0])["n"] == 2
@@ -200,13 +215,55 @@ def test_purge_dlq_by_ids_helpers(monkeypatch, tmp_path: Path) -> None:
     n, err = purge_dlq_by_ids({"x"})
     assert err is None
     assert n == 1
+    assert [r["dlq_id"] for r in read_recent_dlq(limit=10)] == ["y"]
+    compact_dlq(force=True)
     rest = p.read_text(encoding="utf-8").strip()
     assert "y" in rest and "x" not in rest
+    assert not (tmp_path / "q.jsonl.tombstones").exists()
     ok, err2 = purge_dlq_all()
     assert ok and err2 is None
     assert p.read_text(encoding="utf-8") == ""
 
 
+def test_compaction_keeps_ids_purged_while_it_runs(monkeypatch, tmp_path: Path) -> None:
+    p = tmp_path / "q.jsonl"
+    monkeypatch.setenv("ALERTBRIDGE_DLQ_FILE", str(p))
+    monkeypatch.setattr(dlq_module, "DLQ_COMPACT_RATIO", 1.0)  # no background pass; compact below
+    p.write_text("".join(json.dumps({"dlq_id": x}) + "\n" for x in "xyz"), encoding="utf-8")
+    assert purge_dlq_by_ids({"x"})[0] == 1
+    copy_live_rows = dlq_module._copy_live_rows
+
+    def copy_then_purge(*args):
+        if not (tmp_path / "q.jsonl.tombstones").read_text(encoding="utf-8").count("y"):
+            dlq_module._append_tombstones(str(p), ["y"])  # another request / worker purges meanwhile
+        return copy_live_rows(*args)
+
+    monkeypatch.setattr(dlq_module, "_copy_live_rows", copy_then_purge)
+    assert compact_dlq(force=True) == 1
+    assert (tmp_path / "q.jsonl.tombstones").read_text(encoding="utf-8") == "y\n"
+    assert [r["dlq_id"] for r in read_recent_dlq(limit=10)] == ["z"]
+
+
+def test_purge_dlq_by_ids_is_tombstone_below_compact_ratio(monkeypatch, tmp_path: Path) -> None:
+    """Purging a small fraction of rows leaves the JSONL untouched; readers skip the rows."""
+    p = tmp_path / "q.jsonl"
+    monkeypatch.setenv("ALERTBRIDGE_DLQ_FILE", str(p))
+    p.write_text("".join(json.dumps({"dlq_id": f"id-{i}", "n": i}) + "\n" for i in range(20)), encoding="utf-8")
+    before = p.read_text(encoding="utf-8")
+    n, err = purge_dlq_by_ids({"id-3", "id-3", "missing"})
+    assert err is None
+    assert n == 2
+    assert compact_dlq() == 0
+    assert p.read_text(encoding="utf-8") == before
+    rows = read_recent_dlq(limit=50)
+    assert len(rows) == 19
+    assert all(r["n"] != 3 for r in rows)
+    n2, _ = purge_dlq_by_ids({"id-3"})
+    assert n2 == 0
+    assert compact_dlq(force=True) == 1
+    assert len(p.read_text(encoding="utf-8").splitlines()) == 19
+
+
 def test_webhook_forward_paused_skips_outbound_but_records_failed_and_dlq(monkeypatch, tmp_path: Path) -> None:
     dlq = tmp_path / "paused.jsonl"
     monkeypatch.setenv("ALERTBRIDGE_DLQ_FILE", str(dlq))
@@ -306,3 +363,220 @@ def test_webhook_forward_paused_unroll_one_dlq_row_per_shard(monkeypatch, tmp_pa
     assert "Beta" not in (row0.get("alert_bundle_preview") or "")
     assert "Beta" in (row1.get("alert_bundle_preview") or "")
     assert "Alpha" not in (row1.get("alert_bundle_preview") or "")
+
+
+def test_read_dlq_page_walks_whole_file_by_cursor(monkeypatch, tmp_path: Path) -> None:
+    """Pages cross block boundaries and reach rows far beyond the newest tail."""
+    p = tmp_path / "q.jsonl"
+    monkeypatch.setenv("ALERTBRIDGE_DLQ_FILE", str(p))
+    monkeypatch.setattr("app.jsonl_pages.READ_BLOCK_BYTES", 64)
+    p.write_text(
+        "".join(json.dumps({"dlq_id": f"id-{i}", "n": i, "pad": "x" * (i % 7) * 10}) + "\n" for i in range(40)),
+        encoding="utf-8",
+    )
+    purge_dlq_by_ids({"id-5"})
+    seen = []
+    cursor = None
+    for _ in range(20):
+        rows, cursor = read_dlq_page(cursor=cursor, limit=7)
+        seen.extend(r["n"] for r in rows)
+        if cursor is None:
+            break
+    assert seen == [i for i in range(39, -1, -1) if i != 5]
+
+
+def test_api_dlq_recent_returns_next_cursor(monkeypatch, tmp_path: Path) -> None:
+    p = tmp_path / "q.jsonl"
+    monkeypatch.setenv("ALERTBRIDGE_DLQ_FILE", str(p))
+    p.write_text("".join(json.dumps({"n": i}) + "\n" for i in range(3)), encoding="utf-8")
+    with TestClient(app) as ac:
+        first = ac.get("/api/dlq/recent?limit=2").json()
+        second = ac.get(f"/api/dlq/recent?limit=2&cursor={first['next_cursor']}").json()
+    assert [e["n"] for e in first["entries"]] == [2, 1]
+    assert isinstance(first["next_cursor"], str)
+    assert [e["n"] for e in second["entries"]] == [0]
+    assert second["next_cursor"] is None
+
+
+def test_dlq_cursors_are_stale_after_compaction(monkeypatch, tmp_path: Path) -> None:
+    p = tmp_path / "q.jsonl"
+    monkeypatch.setenv("ALERTBRIDGE_DLQ_FILE", str(p))
+    monkeypatch.setattr("app.dlq.DLQ_COMPACT_RATIO", 1.0)
+    p.write_text("".join(json.dumps({"dlq_id": f"id-{i}", "n": i}) + "\n" for i in range(6)), encoding="utf-8")
+    with TestClient(app) as ac:
+        recent = ac.get("/api/dlq/recent?limit=2").json()
+        found = ac.get("/api/dlq/search?limit=2").json()
+        purge_dlq_by_ids({"id-5", "id-4"})
+        assert compact_dlq(force=True) == 2
+        stale_recent = ac.get(f"/api/dlq/recent?limit=2&cursor={recent['next_cursor']}")
+        stale_search = ac.get(f"/api/dlq/search?limit=2&cursor={found['next_cursor']}")
+        fresh = ac.get("/api/dlq/recent?limit=2").json()
+        again = ac.get(f"/api/dlq/recent?limit=2&cursor={fresh['next_cursor']}").json()
+        bad = ac.get("/api/dlq/recent?cursor=12")
+    assert [e["n"] for e in recent["entries"]] == [5, 4]
+    assert stale_recent.status_code == 409 and stale_search.status_code == 409
+    assert [e["n"] for e in fresh["entries"]] == [3, 2]
+    assert [e["n"] for e in again["entries"]] == [1, 0]
+    assert bad.status_code == 400
+
+
+def _dlq_row(n: int, route: str, error_type: str, severity: str, ts: str) -> dict:
+    return {
+        "dlq_id": f"id-{n}",
+        "n": n,
+        "ts": ts,
+        "route": route,
+        "error_type": error_type,
+        "http_status": 503 if error_type == "HTTPStatusError" else None,
+        "alert_severity": severity,
+    }
+
+
+def test_search_dlq_filters_and_groups_from_index(monkeypatch, tmp_path: Path) -> None:
+    p = tmp_path / "q.jsonl"
+    monkeypatch.setenv("ALERTBRIDGE_DLQ_FILE", str(p))
+    # Legacy row written before the index existed; the first search indexes it.
+    p.write_text(json.dumps(_dlq_row(0, "a", "ConnectError", "warning", "2026-05-01T10:00:00.000+07:00")) + "\n")
+    record_failed_forward(_dlq_row(1, "a", "HTTPStatusError", "critical", "2026-05-02T10:00:00.000+07:00"))
+    record_failed_forward(_dlq_row(2, "b", "ConnectError", "Critical", "2026-05-03T10:00:00.000+07:00"))
+    record_failed_forward(_dlq_row(3, "a", "ConnectError", "critical", "2026-05-04T10:00:00.000+07:00"))
+
+    res = search_dlq(severity="critical", group_by="error_type")
+    assert [r["n"] for r in res["entries"]] == [3, 2, 1]
+    assert res["total"] == 3
+    assert res["groups"] == [
+        {"key": "ConnectError", "count": 2},
+        {"key": "HTTPStatusError", "count": 1},
+    ]
+
+    res = search_dlq(route="a", error_type="ConnectError")
+    assert [r["n"] for r in res["entries"]] == [3, 0]
+    assert search_dlq(http_status=503)["total"] == 1
+
+    since = datetime(2026, 5, 2, 0, 0, tzinfo=timezone(timedelta(hours=7))).timestamp()
+    until = datetime(2026, 5, 3, 23, 0, tzinfo=timezone(timedelta(hours=7))).timestamp()
+    assert [r["n"] for r in search_dlq(since=since, until=until)["entries"]] == [2, 1]
+
+    page1 = search_dlq(limit=2)
+    page2 = search_dlq(limit=2, cursor=page1["next_cursor"])
+    assert [r["n"] for r in page1["entries"] + page2["entries"]] == [3, 2, 1, 0]
+    assert page2["next_cursor"] is None
+
+    purge_dlq_by_ids({"id-2"})
+    compact_dlq(force=True)
+    assert [r["n"] for r in search_dlq(severity="critical")["entries"]] == [3, 1]
+
+
+def test_search_dlq_reads_rows_beyond_the_index_cache_from_disk(monkeypatch, tmp_path: Path) -> None:
+    p = tmp_path / "q.jsonl"
+    monkeypatch.setenv("ALERTBRIDGE_DLQ_FILE", str(p))
+    monkeypatch.setattr(dlq_module, "DLQ_INDEX_CACHE_MAX", 5)
+    for i in range(12):
+        record_failed_forward(_dlq_row(i, "ab"[i % 2], "ConnectError", "warning", f"2026-05-{i + 1:02d}T10:00:00.000+07:00"))
+
+    res = search_dlq(route="a", limit=50)
+    assert [r["n"] for r in res["entries"]] == [10, 8, 6, 4, 2, 0]
+    assert len(dlq_module._index_cache["entries"]) <= 5
+    page1 = search_dlq(limit=7)
+    page2 = search_dlq(limit=7, cursor=page1["next_cursor"])
+    assert [r["n"] for r in page1["entries"] + page2["entries"]] == list(range(11, -1, -1))
+
+    purge_dlq_by_ids({"id-0", "id-11"})
+    compact_dlq(force=True)
+    assert not (tmp_path / "q.jsonl.idx.tmp").exists()
+    assert search_dlq(limit=50)["total"] == 10
+
+
+def test_search_dlq_closes_the_index_handle_when_the_dlq_open_fails(monkeypatch, tmp_path: Path) -> None:
+    p = tmp_path / "q.jsonl"
+    monkeypatch.setenv("ALERTBRIDGE_DLQ_FILE", str(p))
+    monkeypatch.setattr(dlq_module, "DLQ_INDEX_CACHE_MAX", 5)
+    for i in range(12):
+        record_failed_forward(_dlq_row(i, "a", "ConnectError", "warning", f"2026-05-{i + 1:02d}T10:00:00.000+07:00"))
+    search_dlq(limit=1)  # index cache trimmed: the search also opens the .idx
+    opened = []
+
+    def failing_open(file, mode="r", *args, **kwargs):
+        if str(file) == str(p) and mode == "rb":
+            raise OSError("gone")
+        handle = open(file, mode, *args, **kwargs)
+        opened.append(handle)
+        return handle
+
+    monkeypatch.setattr(dlq_module, "open", failing_open, raising=False)
+    assert search_dlq(limit=5)["entries"] == []
+    assert any(h.name.endswith(".idx") for h in opened)
+    assert all(h.closed for h in opened)
+
+
+def test_api_dlq_search_rejects_unknown_group_by(monkeypatch, tmp_path: Path) -> None:
+    p = tmp_path / "q.jsonl"
+    monkeypatch.setenv("ALERTBRIDGE_DLQ_FILE", str(p))
+    record_failed_forward(_dlq_row(1, "a", "ConnectError", "warning", "2026-05-01T10:00:00.000+07:00"))
+    with TestClient(app) as ac:
+        bad = ac.get("/api/dlq/search?group_by=transformed")
+        ok = ac.get("/api/dlq/search?route=a&since=2026-05-01T00:00:00&group_by=route")
+    assert bad.status_code == 400
+    assert ok.status_code == 200
+    body = ok.json()
+    assert body["total"] == 1
+    assert body["groups"] == [{"key": "a", "count": 1}]
+
+
+def test_record_failed_forward_aggregates_by_fingerprint(monkeypatch, tmp_path: Path) -> None:
+    p = tmp_path / "q.jsonl"
+    monkeypatch.setenv("ALERTBRIDGE_DLQ_FILE", str(p))
+    inbound = {"alerts": [{"fingerprint": "abc123", "status": "firing"}]}
+    fp = dlq_fingerprint("r", inbound, {"x": 1})
+    assert fp == dlq_fingerprint("r", inbound, {"x": 2})
+    assert fp != dlq_fingerprint("other", inbound, {"x": 1})
+    assert dlq_fingerprint("r", {}, {"x": 1}) != dlq_fingerprint("r", {}, {"x": 2})
+
+    for i, ts in enumerate(["2026-05-01T10:00:00.000+07:00", "2026-05-01T10:05:00.000+07:00", "2026-05-01T10:10:00.000+07:00"]):
+        record_failed_forward({"ts": ts, "n": i, "route": "r", "fingerprint": fp}, aggregate=True)
+    record_failed_forward({"ts": "2026-05-01T10:11:00.000+07:00", "n": 9, "route": "r", "fingerprint": "other"}, aggregate=True)
+
+    rows = read_recent_dlq(limit=10)
+    assert [r["n"] for r in rows] == [9, 2]
+    assert rows[1]["count"] == 3
+    assert rows[1]["first_seen"] == "2026-05-01T10:00:00.000+07:00"
+    assert rows[1]["last_seen"] == "2026-05-01T10:10:00.000+07:00"
+    assert rows[0]["count"] == 1
+
+    compact_dlq(force=True)
+    assert len(p.read_text(encoding="utf-8").splitlines()) == 2
+    # Purged by the operator: the next failure starts a fresh row.
+    purge_dlq_by_ids({rows[1]["dlq_id"]})
+    record_failed_forward({"ts": "2026-05-01T11:00:00.000+07:00", "n": 10, "route": "r", "fingerprint": fp}, aggregate=True)
+    assert read_recent_dlq(limit=1)[0]["count"] == 1
+
+
+def test_webhook_dlq_aggregate_keeps_one_row_per_alert(monkeypatch, tmp_path: Path) -> None:
+    dlq = tmp_path / "agg.jsonl"
+    monkeypatch.setenv("ALERTBRIDGE_DLQ_FILE", str(dlq))
+    rules = RuleSet(
+        version=1,
+        routes=[
+            RouteConfig(
+                name="agg",
+                match=MatchConfig(source="probe"),
+                target=TargetConfig(url_env="UNUSED_AGG", url="http://127.0.0.1:9/"),
+                forward_enabled=False,
+                unroll_alerts=True,
+                dlq_aggregate=True,
+            )
+        ],
+    )
+    body = {
+        "alerts": [
+            {"status": "firing", "fingerprint": "f1", "labels": {"alertname": "A"}},
+            {"status": "firing", "fingerprint": "f2", "labels": {"alertname": "B"}},
+        ]
+    }
+    with TestClient(app) as ac:
+        set_rules(rules)
+        for _ in range(3):
+            assert ac.post("/webhook/probe", json=body).status_code == 200
+    rows = read_recent_dlq(limit=50)
+    assert len(rows) == 2
+    assert all(r["count"] == 3 and r.get("fingerprint") for r in rows)
@@ -0,0 +1,39 @@
+from fastapi.testclient import TestClient
+
+from app.config import get_rules, set_rules
+from app.main import app
+from app.rules import MatchConfig, RouteConfig, RuleSet, TargetConfig
+
+
+def test_recent_requests_and_stats_answer_304_until_changed(monkeypatch) -> None:
+    async def fake_forward(payload, route, request_id, defaults):
+        return True, 200, None, {"attempts_used": 1, "max_attempts": 1, "retried": False, "circuit_open": False}
+
+    monkeypatch.setattr("app.main.forward_payload", fake_forward)
+    route = RouteConfig(name="etag-route", match=MatchConfig(source="etag"), target=TargetConfig(url_env="UNUSED_ETAG"))
+    with TestClient(app) as client:
+        set_rules(RuleSet(version=1, routes=[route]))
+        for path in ("/api/recent-requests", "/api/stats"):
+            first = client.get(path)
+            etag = first.headers["etag"]
+            assert etag.startswith('W/"')
+            again = client.get(path, headers={"If-None-Match": etag})
+            assert again.status_code == 304 and again.content == b""
+            assert again.headers["etag"] == etag
+
+        old_live = client.get("/api/recent-requests").headers["etag"]
+        old_stats = client.get("/api/stats").headers["etag"]
+        client.post("/webhook/etag", json={"alerts": [{"status": "firing", "labels": {"alertname": "E"}}]})
+        live = client.get("/api/recent-requests", headers={"If-None-Match": old_live})
+        stats = client.get("/api/stats", headers={"If-None-Match": old_stats})
+
+    assert live.status_code == 200 and live.json()[0]["alert_summary"] == "E"
+    assert stats.status_code == 200 and stats.headers["etag"] != old_stats
+
+
+def test_config_etag_moves_with_set_rules() -> None:
+    with TestClient(app) as client:
+        etag = client.get("/api/config").headers["etag"]
+        assert client.get("/api/config", headers={"If-None-Match": f"{etag}, W/\"other\""}).status_code == 304
+        set_rules(get_rules().model_copy())
+        assert client.get("/api/config", headers={"If-None-Match": etag}).status_code == 200
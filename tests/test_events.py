@@ -0,0 +1,51 @@
+import asyncio
+
+from app.events import BUS, EventBus, stats_delta
+from app.feed import FeedRecord
+from app.main import RECENT_WEBHOOKS, _stream_events
+
+
+def test_slow_subscriber_drops_oldest_and_events_render_once() -> None:
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"n": 1}
+
+    async def scenario():
+        bus = EventBus(maxlen=2)
+        fast, slow = bus.subscribe(), bus.subscribe()
+        bus.publish("a", build)
+        first = await fast.get(0.1)
+        for name in ("b", "c"):
+            bus.publish(name, {"x": name})
+        got = [(await slow.get(0.1)).name, (await slow.get(0.1)).name]
+        return first, got, slow.dropped, await slow.get(0.01)
+
+    first, got, dropped, empty = asyncio.run(scenario())
+    assert first.text() == first.text() == 'event: a\ndata: {"n":1}\n\n' and calls == [1]
+    assert got == ["b", "c"] and dropped == 1 and empty is None
+
+
+def test_stats_delta_keeps_changed_keys() -> None:
+    assert stats_delta(None, {"a": 1}) == {"a": 1}
+    assert stats_delta({"a": 1, "b": {"x": 1}}, {"a": 1, "b": {"x": 2}}) == {"b": {"x": 2}}
+
+
+def test_stream_sends_stats_then_feed_rows() -> None:
+    class FakeRequest:
+        async def is_disconnected(self) -> bool:
+            return False
+
+    async def scenario():
+        stream = _stream_events(FakeRequest())
+        hello = await stream.__anext__()
+        RECENT_WEBHOOKS.append(FeedRecord("sse-1", "ocp", "r", payload={"alerts": []}, http_status=200))
+        row = await stream.__anext__()
+        await stream.aclose()
+        return hello, row
+
+    hello, row = asyncio.run(scenario())
+    assert hello.startswith("retry: 3000\nevent: stats\ndata: {")
+    assert row.startswith("event: requests\ndata: {") and '"request_id":"sse-1"' in row
+    assert len(BUS) == 0
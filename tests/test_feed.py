@@ -0,0 +1,69 @@
+from fastapi.testclient import TestClient
+
+from app.alert_bundle import BundleSummaries
+from app.config import set_rules
+from app.feed import FeedRecord, RecentFeed, failed_row, webhook_row
+from app.main import RECENT_PAYLOADS, RECENT_WEBHOOKS, app
+from app.rules import MatchConfig, RouteConfig, RuleSet, SanitizeCache, TargetConfig
+
+
+def _bundle() -> dict:
+    return {
+        "alerts": [
+            {"status": "firing", "labels": {"alertname": "A", "severity": "warning"}},
+            {"status": "resolved", "labels": {"alertname": "B", "severity": "critical", "password": "x"}},
+        ]
+    }
+
+
+def test_rows_are_formatted_once_on_read() -> None:
+    feed = RecentFeed(2, webhook_row)
+    for rid in ("r1", "r2", "r3"):
+        feed.append(FeedRecord(rid, "ocp", "route", payload=_bundle(), http_status=200, forwarded=True))
+    assert len(feed) == 2
+    rows = feed.rows()
+    assert [r["request_id"] for r in rows] == ["r3", "r2"]
+    assert rows[0]["alert_severity"] == "critical"
+    assert rows[0]["alert_firing"] == "mixed"
+    assert rows[0]["alerts_in_bundle"] == 2
+    assert feed.rows()[0] is rows[0]
+
+
+def test_failed_row_prefers_bundle_then_output() -> None:
+    output = {"alerts": [{"status": "firing", "labels": {"severity": "major", "token": "t"}}]}
+    row = failed_row(
+        FeedRecord("r1", "ocp", "route", payload={"text": "flat"}, output=output, http_status=202, error="boom"),
+        BundleSummaries(),
+        SanitizeCache(),
+    )
+    assert row["alert_severity"] == "major" and row["alert_firing"] == "firing"
+    assert '"token":"***"' in row["payload_preview"] and row["error"] == "boom"
+
+
+def test_eager_feed_keeps_only_the_formatted_row() -> None:
+    feed = RecentFeed(2, failed_row, eager=True)
+    record = FeedRecord("r1", "ocp", "route", payload=_bundle(), output={"k": "v"}, http_status=202, error="boom")
+    entry = feed.append(record)
+    assert record.payload is None and record.output is None and record.shard is None
+    row = feed.rows()[0]
+    assert row is entry.record.row
+    assert row["alert_bundle_preview"] == "[0] A (firing) · [1] B (resolved)" and row["error"] == "boom"
+
+
+def test_webhook_feeds_sanitize_lazily(monkeypatch) -> None:
+    async def fake_forward(payload, route, request_id, defaults):
+        return True, 200, None, {"attempts_used": 1, "max_attempts": 1, "retried": False, "circuit_open": False}
+
+    monkeypatch.setattr("app.main.forward_payload", fake_forward)
+    route = RouteConfig(name="feed-route", match=MatchConfig(source="feed"), target=TargetConfig(url_env="UNUSED_FEED"))
+    with TestClient(app) as client:
+        set_rules(RuleSet(version=1, routes=[route]))
+        client.post("/webhook/feed", json=_bundle())
+        assert RECENT_PAYLOADS._entries[-1].row is None
+        live = client.get("/api/recent-requests").json()[0]
+        payloads = client.get("/api/recent-payloads").json()[0]
+
+    assert live["route"] == "feed-route" and live["forwarded"] is True
+    assert live["alert_bundle_preview"] == "[0] A (firing) · [1] B (resolved)"
+    assert payloads["payload"]["alerts"][1]["labels"]["password"] == "***"
+    assert RECENT_WEBHOOKS._entries[-1].record is RECENT_PAYLOADS._entries[-1].record
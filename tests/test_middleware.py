@@ -0,0 +1,21 @@
+import logging
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def test_headers_request_id_and_log_line(caplog) -> None:
+    with TestClient(app) as client:
+        with caplog.at_level(logging.INFO, logger="alertbridge"):
+            resp = client.get("/healthz", headers={"X-Request-ID": "rid-123"})
+            other = client.get("/no-such-path")
+
+    assert resp.headers["x-request-id"] == "rid-123"
+    assert resp.headers["x-frame-options"] == "DENY"
+    assert "default-src 'self'" in resp.headers["content-security-policy"]
+    assert other.status_code == 404 and other.headers["x-content-type-options"] == "nosniff"
+    assert len(other.headers["x-request-id"]) == 36
+    logged = [r for r in caplog.records if r.getMessage() == "request"]
+    assert [(r.request_id, r.http_status) for r in logged][:1] == [("rid-123", 200)]
+    assert logged[1].http_status == 404
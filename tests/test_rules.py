@@ -1,3 +1,8 @@
+import json
+
+import pytest
+
+import app.rules as rules_module
 from app.rules import (
     ConcatTemplateSpec,
     MatchConfig,
@@ -5,10 +10,26 @@ from app.rules import (
     RouteConfig,
     TargetConfig,
     TransformConfig,
+    interpret_transform,
+    transform_many,
     transform_payload,
+    unroll_alert_bundle,
 )
 
 
+@pytest.fixture(autouse=True)
+def _plan_matches_interpreter(monkeypatch):
+    """Every transform in this module also runs through the interpreter; outputs must be byte-identical."""
+
+    def checked(payload, route):
+        compiled = rules_module.transform_payload(payload, route)
+        reference = interpret_transform(payload, route)
+        assert json.dumps(compiled, ensure_ascii=False) == json.dumps(reference, ensure_ascii=False)
+        return compiled
+
+    monkeypatch.setitem(globals(), "transform_payload", checked)
+
+
 def test_load_rules_from_yaml_text_restores_patterns():
     from app.config import load_rules_from_yaml_text
     from app.patterns import list_patterns
@@ -374,3 +395,319 @@ def test_build_transform_concat_template():
     spec = cfg.concat_templates["annotations.description"]
     assert spec.template == "[{0}] {1}"
     assert spec.paths == ["alerts.0.status", "alerts.0.annotations.description"]
+
+
+def test_compiled_plan_is_built_once_and_handles_bad_templates():
+    transform = TransformConfig(
+        concat_templates={
+            "a": ConcatTemplateSpec(template="{0}-{1}", paths=["x"]),
+            "b": ConcatTemplateSpec(template="{name}", paths=["x"]),
+            "c": ConcatTemplateSpec(template="{0[1]}", paths=["x"]),
+            "d": ConcatTemplateSpec(template="{0", paths=["x"]),
+        },
+    )
+    route = RouteConfig(
+        name="r",
+        match=MatchConfig(source="ocp"),
+        target=TargetConfig(url_env="TARGET_URL"),
+        transform=transform,
+    )
+    assert transform.plan() is transform.plan()
+    result = transform_payload({"x": "hi"}, route)
+    assert result["a"] == "" and result["b"] == "" and result["d"] == ""
+    assert result["c"] == "i"
+
+
+def test_projection_first_plans_leave_inbound_payload_untouched():
+    payload = {
+        "status": "resolved",
+        "labels": {"severity": "critical", "alertname": "DiskFull"},
+        "alerts": [{"labels": {"instance": "n1"}} for _ in range(50)],
+    }
+    snapshot = json.loads(json.dumps(payload))
+    included = TransformConfig(
+        include_fields=["status", "labels"],
+        rename={"labels.alertname": "name"},
+        severity_from_resolved_status=True,
+    )
+    assert included.plan().projects_include
+    result = transform_payload(payload, _route(included))
+    assert result == {"status": "resolved", "labels": {"severity": "clear"}, "name": "DiskFull", "severity": "clear"}
+
+    selected = TransformConfig(
+        output_template=OutputTemplate(fields={"labels": "$.labels", "first": "$.alerts[0]", "all": "$"})
+    )
+    assert selected.plan().reads_input_only
+    out = transform_payload(payload, _route(selected))
+    out["labels"]["severity"] = "changed"
+    out["first"]["labels"]["instance"] = "changed"
+    assert payload == snapshot
+
+
+def test_unroll_alert_bundle_shares_group_fields_without_mutating_bundle():
+    bundle = {
+        "status": "firing",
+        "groupLabels": {"alertname": "DiskFull"},
+        "commonLabels": {"severity": "critical"},
+        "alerts": [{"status": "firing", "labels": {"instance": f"n{i}"}} for i in range(3)],
+        "externalURL": "http://am",
+    }
+    snapshot = json.loads(json.dumps(bundle))
+    shards = unroll_alert_bundle(bundle)
+
+    assert [list(s) for s in shards] == [list(bundle)] * 3
+    assert [s["alerts"] for s in shards] == [[a] for a in bundle["alerts"]]
+    assert all(s["commonLabels"] is bundle["commonLabels"] for s in shards)
+    transform = TransformConfig(
+        rename={"alerts.0.labels.instance": "instance"},
+        enrich_static={"commonLabels.team": "ops"},
+    )
+    outputs = [transform_payload(s, _route(transform)) for s in shards]
+    assert [o["instance"] for o in outputs] == ["n0", "n1", "n2"]
+    assert bundle == snapshot
+
+
+def test_transform_many_matches_per_item_interpreter():
+    bundle = {
+        "status": "resolved",
+        "commonLabels": {"severity": "critical", "namespace": "prod"},
+        "alerts": [{"status": "resolved", "labels": {"alertname": f"A{i}"}} for i in range(4)],
+    }
+    shards = unroll_alert_bundle(bundle)
+    transforms = [
+        TransformConfig(
+            include_fields=["commonLabels", "alerts.0.labels.alertname"],
+            rename={"commonLabels.namespace": "ns"},
+            severity_from_resolved_status=True,
+        ),
+        TransformConfig(output_template=OutputTemplate(fields={"ns": "$.commonLabels.namespace", "a": "$.alerts[0]"})),
+        TransformConfig(concat_templates={"t": ConcatTemplateSpec(template="{0}/{1}", paths=["status", "commonLabels.severity"])}),
+    ]
+    for transform in transforms:
+        route = _route(transform)
+        outputs = transform_many(shards, route)
+        assert json.dumps(outputs) == json.dumps([interpret_transform(s, route) for s in shards])
+    assert transform_many([], route) == []
+
+
+def test_preview_transform_batch_mode():
+    from fastapi.testclient import TestClient
+
+    from app.config import set_rules
+    from app.main import app
+    from app.rules import RuleSet
+
+    route = RouteConfig(
+        name="preview",
+        match=MatchConfig(source="probe"),
+        target=TargetConfig(url_env="TARGET_URL"),
+        transform=TransformConfig(rename={"a": "b"}),
+    )
+    with TestClient(app) as client:
+        set_rules(RuleSet(version=1, routes=[route]))
+        ok = client.post("/api/transform/probe?batch=1", json=[{"a": 1}, {"a": 2}])
+        bad = client.post("/api/transform/probe?batch=1", json={"a": 1})
+        single = client.post("/api/transform/probe", json={"a": 3})
+    assert ok.status_code == 200 and ok.json() == [{"b": 1}, {"b": 2}]
+    assert bad.status_code == 400
+    assert single.json() == {"b": 3}
+
+
+def test_content_routing_dispatch_index():
+    from app.rules import LabelPredicate, RuleSet, select_route
+
+    def route(name, labels=None, annotations=None):
+        return RouteConfig(
+            name=name,
+            match=MatchConfig(source="ocp", labels=labels, annotations=annotations),
+            target=TargetConfig(url_env="TARGET_URL"),
+        )
+
+    rules = RuleSet(
+        version=1,
+        routes=[
+            route("crit-x", labels={"severity": LabelPredicate(equals="critical"), "namespace": LabelPredicate(in_set=["x", "y"])}),
+            route("db", annotations={"summary": LabelPredicate(regex="DB .*")}),
+            route("no-team", labels={"team": LabelPredicate(exists=False), "severity": LabelPredicate(equals="info")}),
+            route("default"),
+        ],
+    )
+
+    def alert(labels, annotations=None):
+        return {"alerts": [{"labels": labels, "annotations": annotations or {}}]}
+
+    assert select_route(rules, "ocp").name == "crit-x"
+    assert select_route(rules, "other") is None
+    assert select_route(rules, "ocp", alert({"severity": "critical", "namespace": "y"})).name == "crit-x"
+    assert select_route(rules, "ocp", alert({"severity": "critical", "namespace": "z"})).name == "default"
+    assert select_route(rules, "ocp", alert({"severity": "warning"}, {"summary": "DB down"})).name == "db"
+    assert select_route(rules, "ocp", alert({"severity": "warning"}, {"summary": "xDB down"})).name == "default"
+    assert select_route(rules, "ocp", alert({"severity": "info"})).name == "no-team"
+    assert select_route(rules, "ocp", alert({"severity": "info", "team": "a"})).name == "default"
+    bundle = {"commonLabels": {"severity": "critical", "namespace": "x"}, "alerts": [{}, {}]}
+    assert select_route(rules, "ocp", bundle).name == "crit-x"
+    assert select_route(rules, "ocp", {"labels": {"severity": "critical", "namespace": "x"}}).name == "crit-x"
+
+    strict = RuleSet(version=1, routes=[route("only-crit", labels={"severity": LabelPredicate(equals="critical")})])
+    assert select_route(strict, "ocp", alert({"severity": "warning"})) is None
+    with pytest.raises(ValueError):
+        LabelPredicate(regex="(")
+
+
+def test_unrolled_alerts_are_routed_independently(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.config import load_rules_from_yaml_text, set_rules
+    from app.main import app
+
+    sent = []
+
+    async def fake_forward(payload, route, request_id, defaults):
+        sent.append((route.name, payload["alerts"][0]["labels"]["alertname"]))
+        return True, 200, None, {"attempts_used": 1, "max_attempts": 1, "retried": False, "circuit_open": False}
+
+    monkeypatch.setattr("app.main.forward_payload", fake_forward)
+    rules = load_rules_from_yaml_text(
+        """
+version: 1
+routes:
+  - name: critical
+    match:
+      source: ocp
+      labels:
+        severity: {equals: critical}
+    target: {url_env: TARGET_URL}
+    unroll_alerts: true
+  - name: rest
+    match: {source: ocp}
+    target: {url_env: TARGET_URL}
+    unroll_alerts: true
+"""
+    )
+    payload = {
+        "alerts": [
+            {"status": "firing", "labels": {"alertname": "A", "severity": "warning"}},
+            {"status": "firing", "labels": {"alertname": "B", "severity": "critical"}},
+        ]
+    }
+    with TestClient(app) as client:
+        set_rules(rules)
+        r = client.post("/webhook/ocp", json=payload)
+    assert r.status_code == 200
+    assert sent == [("rest", "A"), ("critical", "B")]
+
+
+@pytest.mark.parametrize("critical_first", [True, False])
+def test_forward_pause_follows_each_unrolled_alerts_route(monkeypatch, critical_first):
+    from fastapi.testclient import TestClient
+
+    from app.config import load_rules_from_yaml_text, set_rules
+    from app.main import app
+
+    sent = []
+
+    async def fake_forward(payload, route, request_id, defaults):
+        sent.append(route.name)
+        return True, 200, None, {"attempts_used": 1, "max_attempts": 1, "retried": False, "circuit_open": False}
+
+    monkeypatch.setattr("app.main.forward_payload", fake_forward)
+    rules = load_rules_from_yaml_text(
+        """
+version: 1
+routes:
+  - name: crit
+    match:
+      source: ocp
+      labels:
+        severity: {equals: critical}
+    target: {url_env: TARGET_URL}
+    unroll_alerts: true
+  - name: warn-paused
+    match: {source: ocp}
+    target: {url_env: TARGET_URL}
+    unroll_alerts: true
+    forward_enabled: false
+"""
+    )
+    alerts = [
+        {"status": "firing", "labels": {"alertname": "C", "severity": "critical"}},
+        {"status": "firing", "labels": {"alertname": "W", "severity": "warning"}},
+    ]
+    if not critical_first:
+        alerts.reverse()
+    with TestClient(app) as client:
+        set_rules(rules)
+        r = client.post("/webhook/ocp", json={"alerts": alerts})
+        failed = client.get("/api/recent-failed").json()
+    assert r.status_code == 200
+    assert sent == ["crit"]
+    assert r.json()["forwarded"] is True
+    assert r.json()["forward_paused"] is True
+    assert failed[0]["route"] == "warn-paused"
+
+
+def _unrouted_count(metrics: str) -> float:
+    prefix = 'alertbridge_unrouted_alerts_total{source="ocp"} '
+    return next((float(ln[len(prefix):]) for ln in metrics.splitlines() if ln.startswith(prefix)), 0.0)
+
+
+def test_unrouted_alerts_are_counted(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.config import load_rules_from_yaml_text, set_rules
+    from app.main import app
+
+    async def fake_forward(payload, route, request_id, defaults):
+        return True, 200, None, {"attempts_used": 1, "max_attempts": 1, "retried": False, "circuit_open": False}
+
+    monkeypatch.setattr("app.main.forward_payload", fake_forward)
+    rules = load_rules_from_yaml_text(
+        """
+version: 1
+routes:
+  - name: critical-only
+    match:
+      source: ocp
+      labels:
+        severity: {equals: critical}
+    target: {url_env: TARGET_URL}
+    unroll_alerts: true
+"""
+    )
+    alerts = [
+        {"status": "firing", "labels": {"alertname": "A", "severity": "warning"}},
+        {"status": "firing", "labels": {"alertname": "B", "severity": "critical"}},
+    ]
+    with TestClient(app) as client:
+        set_rules(rules)
+        metrics_before = client.get("/metrics").text
+        assert client.post("/webhook/ocp", json={"alerts": alerts}).status_code == 200
+        assert client.post("/webhook/ocp", json={"alerts": alerts[:1]}).status_code == 404
+        metrics = client.get("/metrics").text
+    before = _unrouted_count(metrics_before)
+    assert _unrouted_count(metrics) == before + 2
+
+
+def test_sanitize_payload_masks_and_copies_only_on_change():
+    from app.rules import SanitizeCache, sanitize_payload
+
+    clean = {"labels": {"alertname": "A"}, "alerts": [{"status": "firing"}]}
+    assert sanitize_payload(clean) is clean
+
+    payload = {
+        "labels": {"alertname": "A"},
+        "alerts": [{"status": "firing"}, {"annotations": {"API_Token": "t", "summary": "s"}}],
+        "password": "p",
+    }
+    result = sanitize_payload(payload)
+    assert result == {
+        "labels": {"alertname": "A"},
+        "alerts": [{"status": "firing"}, {"annotations": {"API_Token": "***", "summary": "s"}}],
+        "password": "***",
+    }
+    assert result["labels"] is payload["labels"]
+    assert result["alerts"][0] is payload["alerts"][0]
+    assert payload["password"] == "p" and payload["alerts"][1]["annotations"]["API_Token"] == "t"
+
+    sanitize = SanitizeCache()
+    assert sanitize(payload) is sanitize(payload)
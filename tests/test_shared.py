@@ -0,0 +1,112 @@
+import os
+
+import pytest
+
+from app import filelock
+from app.feed import FeedRecord, SharedFeed, webhook_row
+from app.shared import SharedStore
+
+
+def test_shared_feed_serves_rows_of_every_worker(tmp_path, monkeypatch) -> None:
+    store = SharedStore(str(tmp_path / "state.db"))
+    published = []
+    worker_a = SharedFeed("requests", store, 3, webhook_row, published.append)
+    store_b = SharedStore(store.path)
+    worker_b = SharedFeed("requests", store_b, 3, webhook_row)
+    worker_a.sync()  # first call only sets the watermark
+    payload = {"alerts": [{"status": "firing", "labels": {"alertname": "Shared", "severity": "critical"}}]}
+    for i in range(5):
+        worker_b.append(FeedRecord(f"r{i}", "ocp", "ocp-route", payload=payload, http_status=200, forwarded=True))
+    store_b.flush()  # rows are written on the store's writer thread
+
+    rows = worker_a.rows()
+    assert [r["request_id"] for r in rows] == ["r4", "r3", "r2"]
+    assert rows[0]["alert_summary"] == "Shared"
+    # Only the formatted row is stored, not the inbound payload.
+    assert b"labels" not in store.feed_rows("requests", 1)[0][2]
+    assert worker_a.version == worker_b.version
+
+    # Rows appended by another process are streamed by sync(); pretend worker_b is another pid.
+    monkeypatch.setattr("app.feed.os.getpid", lambda: -1)
+    worker_a.sync()
+    assert [build()["request_id"] for build in published] == ["r2", "r3", "r4"]
+
+
+def test_circuit_update_and_published_rules(tmp_path) -> None:
+    store = SharedStore(str(tmp_path / "state.db"))
+    other = SharedStore(store.path)
+
+    def fail(state):
+        state["failures"] = state.get("failures", 0) + 1
+
+    store.circuit_update("r", fail)
+    other.circuit_update("r", fail)
+    assert store.circuit_get("r") == {"failures": 2}
+    assert store.circuit_get("missing") == {}
+
+    generation = store.publish_text("rules", "version: 1\n")
+    assert other.text_since("rules", 0) == (generation, "version: 1\n")
+    assert other.text_since("rules", generation) == (generation, None)
+    store.bump("stats")
+    other.bump("stats")
+    assert store.value("stats") == 2
+
+
+def test_file_lock_flocks_only_in_multi_worker_mode(tmp_path, monkeypatch) -> None:
+    target = str(tmp_path / "sub" / "dlq.jsonl")
+    lock = filelock.FileLock(lambda: target)
+    with lock:
+        pass
+    assert not os.path.exists(target + ".lock")
+
+    monkeypatch.setattr(filelock, "SHARED", object())
+    with lock:
+        assert os.path.exists(target + ".lock")
+    with lock:  # released and re-acquirable
+        pass
+
+
+def test_feed_append_trims_every_feed_when_names_interleave(tmp_path) -> None:
+    store = SharedStore(str(tmp_path / "state.db"))
+    # A repeating pattern whose length divides the trim interval used to trim only one feed.
+    for _ in range(100):
+        for name in ("sent", "sent", "requests", "payloads"):
+            store.feed_append(name, b"{}", 5)
+    for name in ("sent", "requests", "payloads"):
+        assert len(store.feed_rows(name, 1000)) <= 5 + 16
+
+
+def test_multi_worker_mode_rejects_per_worker_route_options(monkeypatch) -> None:
+    from app.config import enforce_single_worker_options, load_rules_from_yaml_text
+
+    text = """
+version: 1
+routes:
+  - name: plain
+    match: {source: ocp}
+    target: {url_env: TARGET_URL}
+  - name: deduped
+    match: {source: ocp}
+    target: {url_env: TARGET_URL}
+    dedup: {ttl_sec: 60}
+    forward_mode: transitions_only
+"""
+    rules = load_rules_from_yaml_text(text)
+    monkeypatch.setattr("app.config.SHARED", object())
+    with pytest.raises(ValueError, match=r"deduped\(dedup, forward_mode: transitions_only\)"):
+        load_rules_from_yaml_text(text)
+    with pytest.raises(ValueError):
+        enforce_single_worker_options(rules)
+    enforce_single_worker_options(rules.model_copy(update={"routes": rules.routes[:1]}))
+
+
+def test_multi_worker_file_io_runs_off_the_event_loop(monkeypatch) -> None:
+    import asyncio
+    import threading
+
+    from app.main import _file_io
+
+    loop_thread = threading.get_ident()
+    assert asyncio.run(_file_io(threading.get_ident)) == loop_thread
+    monkeypatch.setattr("app.main.SHARED", object())
+    assert asyncio.run(_file_io(threading.get_ident)) != loop_thread
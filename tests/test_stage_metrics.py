@@ -0,0 +1,57 @@
+"""Per-stage webhook timings: Prometheus histogram and request log breakdown."""
+import logging
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.config import set_rules
+from app.main import app
+from app.metrics import StageTimer
+from app.rules import Defaults, MatchConfig, RouteConfig, RuleSet, TargetConfig
+
+
+def _stage_count(stage: str, route: str) -> float:
+    return REGISTRY.get_sample_value(
+        "alertbridge_webhook_stage_seconds_count", {"stage": stage, "route": route}
+    ) or 0.0
+
+
+def test_stage_timer_sums_repeated_stages():
+    timer = StageTimer()
+    with timer.stage("transform"):
+        pass
+    with timer.stage("transform"):
+        pass
+    with timer.stage("forward"):
+        pass
+    assert set(timer.breakdown_ms()) == {"transform", "forward"}
+    assert timer.stages["transform"] >= 0.0
+
+
+def test_webhook_exports_stage_histogram_and_log_breakdown(monkeypatch, caplog):
+    async def fake_forward(*args, **kwargs):
+        return True, 200, None, {"attempts_used": 1, "max_attempts": 1, "retried": False, "circuit_open": False}
+
+    monkeypatch.setattr("app.main.forward_payload", fake_forward)
+    rules = RuleSet(
+        version=1,
+        defaults=Defaults(),
+        routes=[
+            RouteConfig(
+                name="stage-route",
+                match=MatchConfig(source="probe"),
+                target=TargetConfig(url_env="UNUSED_STAGE_TEST", url="http://127.0.0.1:9/"),
+            )
+        ],
+    )
+    before = {s: _stage_count(s, "stage-route") for s in ("body_read", "json_parse", "transform", "forward")}
+    with TestClient(app) as ac:
+        set_rules(rules)
+        with caplog.at_level(logging.INFO, logger="alertbridge"):
+            r = ac.post("/webhook/probe", json={"alerts": [{"status": "firing", "labels": {"alertname": "A"}}]})
+    assert r.status_code == 200
+    for stage, count in before.items():
+        assert _stage_count(stage, "stage-route") == count + 1, stage
+    request_lines = [rec for rec in caplog.records if rec.getMessage() == "request" and getattr(rec, "stages_ms", None)]
+    assert request_lines
+    assert {"api_key", "body_read", "json_parse", "transform", "forward"} <= set(request_lines[-1].stages_ms)
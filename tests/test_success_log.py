@@ -56,3 +56,25 @@ def test_success_log_persists_and_recent_sent_reads_from_file(monkeypatch, tmp_p
     ids = [str(x.get("request_id") or "") for x in arr]
     assert any(i.endswith("-0") for i in ids)
     assert any(i.endswith("-1") for i in ids)
+
+
+def test_api_success_log_recent_pages_with_cursor(monkeypatch, tmp_path: Path) -> None:
+    success_file = tmp_path / "success.jsonl"
+    monkeypatch.setenv("ALERTBRIDGE_SUCCESS_LOG_ENABLED", "true")
+    monkeypatch.setenv("ALERTBRIDGE_SUCCESS_LOG_FILE", str(success_file))
+    monkeypatch.setattr("app.jsonl_pages.READ_BLOCK_BYTES", 32)
+    success_file.write_text(
+        "".join(json.dumps({"request_id": f"r-{i}"}) + "\n" for i in range(10)), encoding="utf-8"
+    )
+    ids = []
+    cursor = None
+    with TestClient(app) as ac:
+        for _ in range(10):
+            url = "/api/success-log/recent?limit=4" + (f"&cursor={cursor}" if cursor is not None else "")
+            body = ac.get(url).json()
+            assert body["configured"] is True
+            ids.extend(e["request_id"] for e in body["entries"])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+    assert ids == [f"r-{i}" for i in range(9, -1, -1)]